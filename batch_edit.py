@@ -0,0 +1,60 @@
+import re
+from datetime import timedelta
+from collections import namedtuple
+
+METADATA_FIELDS = ('DateTimeOriginal', 'DateTimeDigitized', 'DateTime', 'FileModificationTime')
+
+BatchEditResult = namedtuple('BatchEditResult', ['path', 'success', 'message'])
+
+SHIFT_PART = re.compile(r'(\d+)\s*(d|h|m|s)', re.IGNORECASE)
+SHIFT_UNITS = {'d': 'days', 'h': 'hours', 'm': 'minutes', 's': 'seconds'}
+
+
+def parse_shift(text):
+    """
+    Parse a relative shift like '+1h 3m', '-2d' or '30s' into a timedelta.
+
+    Raises:
+        ValueError: If the text isn't a shift
+    """
+    text = text.strip()
+    sign = -1 if text.startswith('-') else 1
+    body = text[1:] if text[:1] in '+-' else text
+
+    parts = SHIFT_PART.findall(body)
+    if not parts or SHIFT_PART.sub('', body).strip():
+        raise ValueError(f"Invalid time shift: {text!r} (expected e.g. +1h 3m)")
+
+    shift = timedelta()
+    for amount, unit in parts:
+        shift += timedelta(**{SHIFT_UNITS[unit.lower()]: int(amount)})
+    return sign * shift
+
+
+def resolve_changes(metadata_changes, current_dates):
+    """
+    Turn a batch edit into the absolute metadata changes for one image.
+
+    Args:
+        metadata_changes: Field -> datetime (set) or timedelta (shift)
+        current_dates: Field -> datetime of the image, from its current metadata
+
+    Raises:
+        ValueError: If a field is shifted but the image doesn't have it
+    """
+    resolved = {}
+    for field, change in metadata_changes.items():
+        if change is None:
+            continue
+        if isinstance(change, timedelta):
+            current = current_dates.get(field)
+            if current is None:
+                raise ValueError(f"Cannot shift {field}, the image doesn't have it")
+            resolved[field] = current + change
+        else:
+            resolved[field] = change
+    return resolved
+
+
+def has_shifts(metadata_changes):
+    return any(isinstance(change, timedelta) for change in metadata_changes.values())
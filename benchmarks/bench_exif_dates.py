@@ -0,0 +1,86 @@
+"""
+Compare the header-only EXIF date reader against exifread.
+
+Usage:
+    python benchmarks/bench_exif_dates.py <folder> [--limit N]
+
+Reads every JPG below folder with both readers and prints files/sec. Run it
+twice so both readers see a warm page cache.
+"""
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import exifread
+import exif_header
+from image_formats import format_for_signature
+
+
+def find_jpgs(folder, limit):
+    paths = []
+    for root, _, files in os.walk(folder):
+        for filename in files:
+            if filename.lower().endswith(('.jpg', '.jpeg')):
+                paths.append(os.path.join(root, filename))
+                if limit and len(paths) >= limit:
+                    return paths
+    return paths
+
+
+def read_with_exifread(path):
+    with open(path, 'rb') as f:
+        tags = exifread.process_file(f)
+    return tags.get('EXIF DateTimeOriginal')
+
+
+def read_header_dates(path):
+    """The dates found by the header-only reader of the file's format, None if it needs exifread."""
+    data = exif_header.read_header(path)
+    image_format = format_for_signature(data)
+    if image_format is None:
+        return None
+    return exif_header.dates_from_tags(image_format.find_date_tags(path, data))
+
+
+def read_with_header(path):
+    dates = read_header_dates(path)
+    if dates is None:
+        return read_with_exifread(path)
+    return dates.DateTimeOriginal
+
+
+def time_reader(name, reader, paths):
+    start = time.perf_counter()
+    for path in paths:
+        reader(path)
+    elapsed = time.perf_counter() - start
+    rate = len(paths) / elapsed if elapsed else float('inf')
+    print(f"{name:<12} {len(paths)} files in {elapsed:.2f}s ({rate:.0f} files/sec)")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('folder')
+    parser.add_argument('--limit', type=int, default=0, help="Stop after this many files")
+    args = parser.parse_args()
+
+    paths = find_jpgs(args.folder, args.limit)
+    if not paths:
+        print("No JPG files found")
+        return 1
+
+    fallbacks = sum(1 for path in paths if read_header_dates(path) is None)
+    print(f"{fallbacks} of {len(paths)} files need the exifread fallback")
+
+    slow = time_reader('exifread', read_with_exifread, paths)
+    fast = time_reader('header', read_with_header, paths)
+    print(f"Speedup: {slow / fast:.1f}x")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
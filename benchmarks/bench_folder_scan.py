@@ -0,0 +1,101 @@
+"""
+Compare the os.scandir scan engine against the old listdir + re.match listing.
+
+Usage:
+    python benchmarks/bench_folder_scan.py [--entries N] [--folder PATH] [--keep]
+
+Creates a folder with N empty files (default 100000, use 1000000 for the
+full benchmark): mostly IMG_XXXX.JPG with some duplicates in other case,
+other JPGs and non-image files. Prints the scan time and the peak Python
+memory (tracemalloc) of each approach.
+"""
+import os
+import re
+import sys
+import time
+import random
+import shutil
+import argparse
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from folder_scan import scan_folder
+
+
+def create_folder(folder, entries):
+    rng = random.Random(1)
+    os.makedirs(folder, exist_ok=True)
+    for i in range(entries):
+        kind = rng.random()
+        if kind < 0.8:
+            name = f"IMG_{i:07d}.JPG"
+        elif kind < 0.82:
+            name = f"img_{i - 1:07d}.jpg"
+        elif kind < 0.95:
+            name = f"photo_{i}.jpeg"
+        else:
+            name = f"notes_{i}.txt"
+        open(os.path.join(folder, name), 'wb').close()
+
+
+def legacy_listing(folder):
+    """get_image_files before the scan engine."""
+    standard_images = []
+    other_images = []
+    for filename in os.listdir(folder):
+        if re.match(r'IMG_\d+\.JPG', filename, re.IGNORECASE):
+            match = re.match(r'IMG_(\d+)\.JPG', filename, re.IGNORECASE)
+            if match:
+                standard_images.append((int(match.group(1)), filename))
+        elif filename.lower().endswith(('.jpg', '.jpeg')):
+            other_images.append(filename)
+    standard_images.sort(key=lambda x: x[0])
+    return standard_images, other_images
+
+
+def measure(name, function, folder, runs=3):
+    """Best time of a few runs, then the peak memory of a separate traced run (tracing slows it down)."""
+    elapsed = float('inf')
+    for _ in range(runs):
+        start = time.perf_counter()
+        function(folder)
+        elapsed = min(elapsed, time.perf_counter() - start)
+
+    tracemalloc.start()
+    result = function(folder)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{name:<22} {elapsed:7.2f}s  peak {peak / 1024 / 1024:7.1f} MB")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--entries', type=int, default=100000, help="Files in the test folder (default: %(default)s)")
+    parser.add_argument('--folder', help="Folder to create the files in, an existing one is scanned as is (default: a temp folder)")
+    parser.add_argument('--keep', action='store_true', help="Don't delete the test folder")
+    args = parser.parse_args()
+
+    folder = args.folder or os.path.join(tempfile.gettempdir(), f"bench_folder_scan_{args.entries}")
+    if not os.path.isdir(folder):
+        print(f"Creating {args.entries} files in {folder}...")
+        create_folder(folder, args.entries)
+
+    try:
+        # Warm the dentry cache so both approaches read the same way
+        os.listdir(folder)
+        measure('listdir + re.match', legacy_listing, folder)
+        scan = measure('scandir, names only', lambda f: scan_folder(f, with_stat=False), folder)
+        measure('scandir + stat', lambda f: scan_folder(f, with_stat=True), folder)
+        print(f"{scan.standard_count} standard, {len(scan.other_images)} other, "
+              f"{len(scan.duplicate_codes())} duplicate codes, {len(scan.gaps())} gaps")
+    finally:
+        if not args.keep and not args.folder:
+            shutil.rmtree(folder, ignore_errors=True)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,74 @@
+"""
+Check the cold-start import cost of the GUI and the batch entry point.
+
+Usage:
+    python benchmarks/check_import_time.py [--gui-budget MS] [--cli-budget MS] [--runs N]
+
+Runs `python -X importtime` in a fresh interpreter, takes the best of N
+runs and exits with status 1 if a budget is exceeded or a module that must
+be imported lazily shows up at startup.
+"""
+import os
+import sys
+import argparse
+import subprocess
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Module imported at startup -> modules that must not be imported with it
+CHECKS = {
+    'gui.app': ('tkcalendar', 'PIL', 'exifread', 'piexif', 'gui.edit_picture_tab', 'concurrent', 'multiprocessing'),
+    'image_processor': ('tkinter', 'tkcalendar', 'PIL', 'exifread', 'piexif', 'concurrent', 'multiprocessing'),
+}
+
+
+def measure_import(module):
+    """Return (cumulative microseconds, imported module names) for importing module."""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=REPO_ROOT, capture_output=True, text=True, check=True
+    )
+
+    total = None
+    imported = set()
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        name = name.strip()
+        imported.add(name)
+        if name == module:
+            total = int(cumulative)
+
+    return total, imported
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--gui-budget', type=float, default=150.0, help="Budget for gui.app in ms (default: %(default)s)")
+    parser.add_argument('--cli-budget', type=float, default=100.0, help="Budget for image_processor in ms (default: %(default)s)")
+    parser.add_argument('--runs', type=int, default=5, help="Best of this many runs (default: %(default)s)")
+    args = parser.parse_args()
+
+    budgets = {'gui.app': args.gui_budget, 'image_processor': args.cli_budget}
+    failed = False
+
+    for module, forbidden in CHECKS.items():
+        measurements = [measure_import(module) for _ in range(args.runs)]
+        best = min(total for total, _ in measurements) / 1000
+        imported = measurements[0][1]
+
+        status = "ok" if best <= budgets[module] else "OVER BUDGET"
+        print(f"{module:<16} {best:7.1f} ms (budget {budgets[module]:.0f} ms) {status}")
+        failed |= best > budgets[module]
+
+        eager = sorted(name for name in imported if name.split('.')[0] in forbidden or name in forbidden)
+        if eager:
+            print(f"{module:<16} imports at startup: {', '.join(eager)}")
+            failed = True
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,149 @@
+"""
+Deterministic synthetic photo archive for the benchmarks.
+
+Usage:
+    python benchmarks/corpus.py <root> [--folders N] [--images N] [--seed N]
+
+The same arguments (and Pillow version) produce the same tree, byte for
+byte: nested albums with a target folder each, decoy folders, IMG_XXXX.JPG
+and other JPG names, tiny and large JPGs, with and without EXIF, and a few
+files that aren't images.
+"""
+import io
+import os
+import sys
+import random
+import argparse
+
+import PIL.Image
+import piexif
+
+TARGET_FOLDER_NAME = "01. Foto's"
+
+# (share of the images, kind)
+IMAGE_MIX = (
+    (0.55, 'standard'),     # IMG_XXXX.JPG with EXIF dates
+    (0.20, 'other'),        # other name with EXIF dates
+    (0.15, 'no_exif'),      # other name, no EXIF at all
+    (0.10, 'large'),        # IMG_XXXX.JPG, large file with EXIF dates
+)
+LARGE_SIZE = (3000, 2000)
+TINY_SIZE = (32, 24)
+
+
+def encode_jpeg(rng, size, noise):
+    """A JPEG without EXIF. Noise makes it as big as a real photo of that size."""
+    if noise:
+        image = PIL.Image.frombytes('RGB', size, rng.randbytes(size[0] * size[1] * 3))
+    else:
+        image = PIL.Image.new('RGB', size, (rng.randrange(256), rng.randrange(256), rng.randrange(256)))
+    buffer = io.BytesIO()
+    image.save(buffer, 'JPEG', quality=85)
+    return buffer.getvalue()
+
+
+def exif_bytes(date):
+    value = date.encode('ascii')
+    return piexif.dump({
+        '0th': {piexif.ImageIFD.DateTime: value},
+        'Exif': {piexif.ExifIFD.DateTimeOriginal: value, piexif.ExifIFD.DateTimeDigitized: value},
+    })
+
+
+def random_date(rng):
+    return (f"{rng.randint(2005, 2024):04d}:{rng.randint(1, 12):02d}:{rng.randint(1, 28):02d} "
+            f"{rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}:{rng.randint(0, 59):02d}")
+
+
+def pick_kind(rng):
+    roll = rng.random()
+    for share, kind in IMAGE_MIX:
+        if roll < share:
+            return kind
+        roll -= share
+    return IMAGE_MIX[-1][1]
+
+
+def write_folder(folder, rng, images, templates):
+    """Fill one target folder. Returns the number of images written."""
+    os.makedirs(folder, exist_ok=True)
+    codes = rng.sample(range(1, images * 3 + 10), images)
+
+    for code in codes:
+        kind = pick_kind(rng)
+        if kind in ('standard', 'large'):
+            name = f"IMG_{code:04d}.JPG"
+        else:
+            name = f"{rng.choice(['DSC', 'photo', 'WhatsApp Image', 'P'])}_{code:05d}.{rng.choice(['jpg', 'jpeg', 'JPG'])}"
+
+        data = templates['large' if kind == 'large' else 'tiny']
+        if kind != 'no_exif':
+            output = io.BytesIO()
+            piexif.insert(exif_bytes(random_date(rng)), data, output)
+            data = output.getvalue()
+
+        with open(os.path.join(folder, name), 'wb') as f:
+            f.write(data)
+
+    # Files that must be left alone
+    with open(os.path.join(folder, 'Thumbs.db'), 'wb') as f:
+        f.write(rng.randbytes(64))
+    with open(os.path.join(folder, 'notes.txt'), 'w') as f:
+        f.write("not an image\n")
+
+    return images
+
+
+def generate_corpus(root, folders=10, images_per_folder=100, seed=0):
+    """
+    Create the corpus below root, which must not exist yet.
+
+    Returns:
+        Dict with the target folders and the image count
+    """
+    rng = random.Random(seed)
+    templates = {
+        'tiny': encode_jpeg(rng, TINY_SIZE, noise=False),
+        'large': encode_jpeg(rng, LARGE_SIZE, noise=True),
+    }
+
+    os.makedirs(root)
+    target_folders = []
+    images = 0
+
+    for i in range(folders):
+        # Albums nested one to three levels deep, next to decoy folders
+        depth = rng.randint(1, 3)
+        parts = [f"{2005 + i % 20}"] + [f"album_{i:04d}_{level}" for level in range(depth)]
+        album = os.path.join(root, *parts)
+
+        target = os.path.join(album, TARGET_FOLDER_NAME)
+        images += write_folder(target, rng, images_per_folder, templates)
+        target_folders.append(target)
+
+        decoy = os.path.join(album, "02. Video's")
+        os.makedirs(decoy, exist_ok=True)
+        with open(os.path.join(decoy, 'IMG_0001.JPG'), 'wb') as f:
+            f.write(templates['tiny'])
+
+    return {'target_folders': sorted(target_folders), 'images': images}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('root', help="Folder to create, must not exist")
+    parser.add_argument('--folders', type=int, default=10, help="Target folders (default: %(default)s)")
+    parser.add_argument('--images', type=int, default=100, help="Images per target folder (default: %(default)s)")
+    parser.add_argument('--seed', type=int, default=0, help="Random seed (default: %(default)s)")
+    args = parser.parse_args()
+
+    if os.path.exists(args.root):
+        parser.error(f"{args.root} already exists")
+
+    corpus = generate_corpus(args.root, args.folders, args.images, args.seed)
+    print(f"Created {len(corpus['target_folders'])} target folders with {corpus['images']} images in {args.root}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
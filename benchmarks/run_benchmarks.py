@@ -0,0 +1,222 @@
+"""
+Time the main ImageProcessor entry points on synthetic corpora.
+
+Usage:
+    python benchmarks/run_benchmarks.py [--scales small,medium] [--runs N]
+                                        [--output results.json] [--compare baseline.json]
+
+For every scale a corpus is generated (benchmarks/corpus.py, fixed seed)
+in a temp folder, then find_target_folders, get_image_files,
+get_exif_creation_date, set_image_metadata and process_folder are timed,
+best of --runs. get_exif_creation_date is timed with a cold metadata cache
+and again with a warm one (get_exif_creation_date_cached). Calls that change files get a fresh copy of the corpus
+for every run. Results are written as JSON. With --compare, the results
+are checked against an earlier file and the exit status is 1 if an entry
+point got slower than --threshold.
+"""
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import logging
+import argparse
+import platform
+import tempfile
+import subprocess
+from datetime import datetime
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from corpus import generate_corpus, TARGET_FOLDER_NAME
+from image_processor import ImageProcessor
+from processor_logging import LOGGER_NAME
+
+# name -> (target folders, images per folder)
+SCALES = {
+    'small': (5, 50),
+    'medium': (20, 200),
+    'large': (50, 1000),
+}
+SEED = 1234
+
+
+def git_commit():
+    try:
+        result = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=REPO_ROOT, capture_output=True, text=True, check=True)
+        return result.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def image_paths(processor, folders):
+    paths = []
+    for folder in folders:
+        standard_images, other_images = processor.get_image_files(folder)
+        paths.extend(os.path.join(folder, name) for name in [name for _, name in standard_images] + other_images)
+    return paths
+
+
+def best_of(runs, function, prepare=None):
+    """Best wall time of function() over runs. prepare() runs untimed before each run and returns its argument."""
+    times = []
+    for _ in range(runs):
+        argument = prepare() if prepare else None
+        start = time.perf_counter()
+        function(argument)
+        times.append(time.perf_counter() - start)
+    return min(times), times
+
+
+def bench_scale(name, folders, images, runs, work_dir):
+    """Generate one corpus and time every entry point on it."""
+    corpus_root = os.path.join(work_dir, f"corpus_{name}")
+    copy_root = os.path.join(work_dir, f"copy_{name}")
+    # Never the user's metadata cache, runs would warm it for each other
+    metadata_cache_path = os.path.join(work_dir, f"metadata_{name}.db")
+
+    start = time.perf_counter()
+    corpus = generate_corpus(corpus_root, folders, images, SEED)
+    print(f"[{name}] generated {corpus['images']} images in {len(corpus['target_folders'])} folders "
+          f"({time.perf_counter() - start:.1f}s)")
+
+    processor = ImageProcessor(corpus_root, TARGET_FOLDER_NAME, log_to_file=False, metadata_cache_path=metadata_cache_path)
+    paths = image_paths(processor, corpus['target_folders'])
+
+    def fresh_copy():
+        shutil.rmtree(copy_root, ignore_errors=True)
+        shutil.copytree(corpus_root, copy_root)
+        # Same random codes and dates in every run
+        random.seed(SEED)
+        return ImageProcessor(copy_root, TARGET_FOLDER_NAME, log_to_file=False, metadata_cache_path=metadata_cache_path)
+
+    def cold_cache():
+        processor.close_metadata_cache()
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(metadata_cache_path + suffix):
+                os.remove(metadata_cache_path + suffix)
+
+    def copied(path):
+        return os.path.join(copy_root, os.path.relpath(path, corpus_root))
+
+    benchmarks = {
+        'find_target_folders': (
+            len(corpus['target_folders']),
+            lambda _: processor.find_target_folders(),
+            None
+        ),
+        'get_image_files': (
+            len(corpus['target_folders']),
+            lambda _: [processor.get_image_files(folder) for folder in corpus['target_folders']],
+            None
+        ),
+        'get_exif_creation_date': (
+            len(paths),
+            lambda _: [processor.get_exif_creation_date(path) for path in paths],
+            cold_cache
+        ),
+        'get_exif_creation_date_cached': (
+            len(paths),
+            lambda _: [processor.get_exif_creation_date(path) for path in paths],
+            None
+        ),
+        'set_image_metadata': (
+            len(paths),
+            lambda copy: [copy.set_image_metadata(copied(path), datetime(2020, 1, 1, 12, 0, 0)) for path in paths],
+            fresh_copy
+        ),
+        'process_folder': (
+            len(corpus['target_folders']),
+            lambda copy: [copy.process_folder(copied(folder)) for folder in corpus['target_folders']],
+            fresh_copy
+        ),
+    }
+
+    results = {}
+    for entry_point, (items, function, prepare) in benchmarks.items():
+        seconds, times = best_of(runs, function, prepare)
+        results[entry_point] = {
+            'seconds': seconds,
+            'runs': times,
+            'items': items,
+            'us_per_item': seconds / items * 1e6 if items else None,
+        }
+        print(f"[{name}] {entry_point:<30} {seconds:8.3f}s  {results[entry_point]['us_per_item']:10.1f} us/item")
+
+    processor.close_metadata_cache()
+    shutil.rmtree(copy_root, ignore_errors=True)
+    shutil.rmtree(corpus_root, ignore_errors=True)
+    return {'folders': folders, 'images_per_folder': images, 'images': corpus['images'], 'results': results}
+
+
+def compare(results, baseline_path, threshold):
+    """Print the change against a baseline. Returns True if something got slower than threshold."""
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = json.load(f)
+
+    print(f"\nCompared to {baseline_path} (commit {baseline.get('commit')}):")
+    regressed = False
+    for scale, scale_results in results['scales'].items():
+        old_scale = baseline.get('scales', {}).get(scale)
+        if old_scale is None:
+            continue
+        for entry_point, values in scale_results['results'].items():
+            old = old_scale['results'].get(entry_point)
+            if old is None or not old['seconds']:
+                continue
+            ratio = values['seconds'] / old['seconds']
+            slower = ratio > 1 + threshold
+            regressed |= slower
+            print(f"[{scale}] {entry_point:<30} {old['seconds']:8.3f}s -> {values['seconds']:8.3f}s "
+                  f"({ratio:5.2f}x){'  SLOWER' if slower else ''}")
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--scales', default='small,medium', help=f"Comma separated, of {', '.join(SCALES)} (default: %(default)s)")
+    parser.add_argument('--runs', type=int, default=3, help="Best of this many runs (default: %(default)s)")
+    parser.add_argument('--output', default='benchmark_results.json', help="JSON results file (default: %(default)s)")
+    parser.add_argument('--compare', metavar='BASELINE', help="Earlier results file to compare with")
+    parser.add_argument('--threshold', type=float, default=0.10, help="Allowed slowdown for --compare (default: %(default)s)")
+    parser.add_argument('--work-dir', help="Where to generate the corpora (default: a temp folder)")
+    args = parser.parse_args()
+
+    # Time the work, not the logging (warnings would go to stderr otherwise)
+    logging.getLogger(LOGGER_NAME).addHandler(logging.NullHandler())
+
+    scales = [scale.strip() for scale in args.scales.split(',') if scale.strip()]
+    unknown = [scale for scale in scales if scale not in SCALES]
+    if unknown:
+        parser.error(f"Unknown scales: {', '.join(unknown)}")
+
+    results = {
+        'commit': git_commit(),
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'runs': args.runs,
+        'scales': {},
+    }
+
+    work_dir = tempfile.mkdtemp(prefix='image_processor_bench_', dir=args.work_dir)
+    try:
+        for scale in scales:
+            folders, images = SCALES[scale]
+            results['scales'][scale] = bench_scale(scale, folders, images, args.runs, work_dir)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.compare and compare(results, args.compare, args.threshold):
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
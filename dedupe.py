@@ -0,0 +1,146 @@
+import os
+import hashlib
+from collections import namedtuple
+
+DEFAULT_DUPLICATE_FOLDER = '_duplicates'
+
+# A file with the same contents as original, which is kept
+Duplicate = namedtuple('Duplicate', ['name', 'original'])
+
+
+class DuplicateReport:
+    """
+    Files of a folder with identical contents.
+
+    Attributes:
+        groups: Lists of names with the same contents, the first one of each
+                group (in the order the names were given) is kept
+        files_hashed: Files whose head and tail (or all of it) were hashed
+        bytes_hashed: Bytes read for hashing
+    """
+
+    def __init__(self, groups, files_hashed=0, bytes_hashed=0):
+        self.groups = groups
+        self.files_hashed = files_hashed
+        self.bytes_hashed = bytes_hashed
+
+    @property
+    def duplicates(self):
+        return [Duplicate(name, group[0]) for group in self.groups for name in group[1:]]
+
+    def __len__(self):
+        return sum(len(group) - 1 for group in self.groups)
+
+
+def _hash_range(path, offset, length):
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        return hashlib.blake2b(f.read(length), digest_size=16).digest()
+
+
+def _edge_hash(path, size, edge_bytes):
+    """Hash of the first and last edge_bytes, or of the whole file if it's that small."""
+    if size <= 2 * edge_bytes:
+        return _hash_range(path, 0, size)
+    with open(path, 'rb') as f:
+        head = f.read(edge_bytes)
+        f.seek(size - edge_bytes)
+        tail = f.read(edge_bytes)
+    return hashlib.blake2b(head + tail, digest_size=16).digest()
+
+
+def find_duplicates(folder, names, stat_of=None, edge_bytes=64 * 1024, chunk_size=4 * 1024 * 1024, threads=4):
+    """
+    Find the files with identical contents among names.
+
+    Files are grouped by size first, which costs one stat per file (none if
+    stat_of has it already). Only files sharing a size have their first and
+    last edge_bytes hashed, and only those that still collide are hashed
+    completely, in chunk_size pieces read in parallel.
+
+    Args:
+        names: Files in the order they are sequenced, the first of a group is kept
+        stat_of: Optional function name -> (size, mtime_ns), e.g. FolderScan.stat_of
+
+    Returns:
+        DuplicateReport
+    """
+    by_size = {}
+    for name in names:
+        try:
+            size = stat_of(name)[0] if stat_of else os.stat(os.path.join(folder, name)).st_size
+        except OSError:
+            continue
+        # Empty files are broken, not duplicates
+        if size > 0:
+            by_size.setdefault(size, []).append(name)
+
+    candidates = [(name, size) for size, group in by_size.items() if len(group) > 1 for name in group]
+    if not candidates:
+        return DuplicateReport([])
+
+    # Imported here, most folders have no two files of the same size
+    import concurrent.futures
+
+    files_hashed = 0
+    bytes_hashed = 0
+    order = {name: i for i, name in enumerate(names)}
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=threads) as executor:
+        edge_hashes = executor.map(
+            lambda candidate: _edge_hash(os.path.join(folder, candidate[0]), candidate[1], edge_bytes),
+            candidates
+        )
+        by_edges = {}
+        for (name, size), digest in zip(candidates, edge_hashes):
+            by_edges.setdefault((size, digest), []).append(name)
+            files_hashed += 1
+            bytes_hashed += min(size, 2 * edge_bytes)
+
+        # Small files were hashed completely already, the others need a full hash
+        groups = []
+        full_hash_candidates = []
+        for (size, _), group in by_edges.items():
+            if len(group) < 2:
+                continue
+            if size <= 2 * edge_bytes:
+                groups.append(group)
+            else:
+                full_hash_candidates.extend((name, size) for name in group)
+
+        # Every chunk of every file is a separate read, so one large file uses all threads
+        chunk_futures = {
+            name: [
+                executor.submit(_hash_range, os.path.join(folder, name), offset, min(chunk_size, size - offset))
+                for offset in range(0, size, chunk_size)
+            ]
+            for name, size in full_hash_candidates
+        }
+        by_contents = {}
+        for name, size in full_hash_candidates:
+            digest = hashlib.blake2b(digest_size=16)
+            for future in chunk_futures.pop(name):
+                digest.update(future.result())
+            by_contents.setdefault((size, digest.digest()), []).append(name)
+            bytes_hashed += size
+        groups.extend(group for group in by_contents.values() if len(group) > 1)
+
+    groups = [sorted(group, key=order.__getitem__) for group in groups]
+    groups.sort(key=lambda group: order[group[0]])
+    return DuplicateReport(groups, files_hashed, bytes_hashed)
+
+
+def move_duplicate(folder, name, duplicate_folder=DEFAULT_DUPLICATE_FOLDER):
+    """Move a file into a subfolder of its folder, never overwriting. Returns the new path."""
+    target_folder = os.path.join(folder, duplicate_folder)
+    os.makedirs(target_folder, exist_ok=True)
+
+    base, extension = os.path.splitext(name)
+    destination = os.path.join(target_folder, name)
+    counter = 1
+    while os.path.exists(destination):
+        destination = os.path.join(target_folder, f"{base}_{counter}{extension}")
+        counter += 1
+
+    os.rename(os.path.join(folder, name), destination)
+    return destination
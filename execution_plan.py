@@ -0,0 +1,96 @@
+import json
+from collections import namedtuple
+from datetime import datetime
+
+from rename_planner import RenamePlan, RenameStep
+from dedupe import Duplicate
+
+DEFAULT_PLAN_PATH = 'image_processor_plan.jsonl'
+
+# One EXIF/mtime write, by final filename, in sequence order
+MetadataWrite = namedtuple('MetadataWrite', ['name', 'original_name', 'date'])
+
+
+class FolderPlan:
+    """
+    Everything process_folder will do to one folder.
+
+    Attributes:
+        folder: Path of the target folder
+        rename_plan: RenamePlan for the folder
+        writes: List of MetadataWrite in sequence order
+        estimated_bytes: Estimated bytes written to disk, None if not estimated
+        duplicates: List of Duplicate left out of the sequence
+        duplicate_folder: Subfolder the duplicates are moved to, None to leave them alone
+        file_stats: {name: (size, mtime_ns)} of the original files when the
+                    plan was made, empty if they weren't recorded
+    """
+
+    def __init__(self, folder, rename_plan, writes, estimated_bytes=None, duplicates=None, duplicate_folder=None,
+                 file_stats=None):
+        self.folder = folder
+        self.rename_plan = rename_plan
+        self.writes = writes
+        self.estimated_bytes = estimated_bytes
+        self.duplicates = duplicates or []
+        self.duplicate_folder = duplicate_folder
+        self.file_stats = file_stats or {}
+
+    @property
+    def original_names(self):
+        return [current for current, _ in self.rename_plan.targets]
+
+    def to_dict(self):
+        return {
+            'folder': self.folder,
+            'targets': [list(pair) for pair in self.rename_plan.targets],
+            'unchanged': self.rename_plan.unchanged,
+            'renames': [[list(step) for step in sequence] for sequence in self.rename_plan.sequences],
+            'writes': [
+                {'name': write.name, 'original_name': write.original_name, 'date': write.date.isoformat()}
+                for write in self.writes
+            ],
+            'rename_count': self.rename_plan.rename_count,
+            'estimated_bytes': self.estimated_bytes,
+            'duplicates': [list(duplicate) for duplicate in self.duplicates],
+            'duplicate_folder': self.duplicate_folder,
+            'file_stats': {name: list(stat) for name, stat in self.file_stats.items()}
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        rename_plan = RenamePlan(
+            [tuple(pair) for pair in data['targets']],
+            data['unchanged'],
+            [[RenameStep(*step) for step in sequence] for sequence in data['renames']]
+        )
+        writes = [
+            MetadataWrite(write['name'], write['original_name'], datetime.fromisoformat(write['date']))
+            for write in data['writes']
+        ]
+        duplicates = [Duplicate(*duplicate) for duplicate in data.get('duplicates', [])]
+        file_stats = {name: tuple(stat) for name, stat in data.get('file_stats', {}).items()}
+        return cls(data['folder'], rename_plan, writes, data.get('estimated_bytes'), duplicates, data.get('duplicate_folder'),
+                   file_stats)
+
+
+class PlanWriter:
+    """Append folder plans to a JSON Lines file as they are produced."""
+
+    def __init__(self, path=DEFAULT_PLAN_PATH):
+        self.path = path
+        self.file = open(path, 'w', encoding='utf-8')
+
+    def write(self, folder_plan):
+        self.file.write(json.dumps(folder_plan.to_dict(), ensure_ascii=False) + '\n')
+
+    def close(self):
+        self.file.close()
+
+
+def read_plans(path):
+    """Yield the FolderPlans stored in a JSON Lines plan file."""
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                yield FolderPlan.from_dict(json.loads(line))
@@ -0,0 +1,273 @@
+"""
+Minimal JPEG/EXIF header parsing for the three date tags.
+
+Only the APP1 segment is read (the file is read up to MAX_HEADER_BYTES) and
+parsing stops as soon as DateTime, DateTimeOriginal and DateTimeDigitized
+are located. Anything unusual makes the functions return None so callers
+can fall back to exifread/piexif.
+
+The TIFF structure parsing also works on the EXIF block of other formats
+(tiff= its offset) and, through FileView, on TIFF files themselves.
+"""
+import os
+import struct
+from collections import namedtuple
+from datetime import datetime
+
+# APP1 segments are limited to 64 KiB, leave room for APP0/ICC segments before it
+MAX_HEADER_BYTES = 256 * 1024
+
+EXIF_DATE_FORMAT = '%Y:%m:%d %H:%M:%S'
+
+# Tag id -> field name
+IFD0_DATE_TAGS = {0x0132: 'DateTime'}
+EXIF_DATE_TAGS = {0x9003: 'DateTimeOriginal', 0x9004: 'DateTimeDigitized'}
+EXIF_IFD_POINTER = 0x8769
+THUMBNAIL_OFFSET_TAG = 0x0201
+THUMBNAIL_LENGTH_TAG = 0x0202
+ASCII_TYPE = 2
+
+DATE_FIELDS = ('DateTimeOriginal', 'DateTimeDigitized', 'DateTime')
+
+# Location of a tag value in the file
+DateTag = namedtuple('DateTag', ['offset', 'count', 'value'])
+
+
+# The raw 'YYYY:MM:DD HH:MM:SS' strings of the EXIF date tags (None if absent)
+ExifDates = namedtuple('ExifDates', DATE_FIELDS)
+
+
+def parse_exif_datetime(value):
+    """Parse an EXIF date string, returning None if it is empty or malformed."""
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, EXIF_DATE_FORMAT)
+    except ValueError:
+        return None
+
+
+class FileView:
+    """
+    Read-only bytes-like view of an open file, for parsing structures that
+    can be anywhere in it (like the IFDs of a TIFF). Slices are read on
+    demand, block_size bytes at a time.
+    """
+
+    def __init__(self, f, block_size=64 * 1024):
+        self.f = f
+        self.size = os.fstat(f.fileno()).st_size
+        self.block_size = block_size
+        self.block_start = 0
+        self.block = b''
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            raise TypeError("FileView only supports slices")
+        start, stop, _ = index.indices(self.size)
+        if stop <= start:
+            return b''
+        if start < self.block_start or stop > self.block_start + len(self.block):
+            self.f.seek(start)
+            self.block_start = start
+            self.block = self.f.read(max(self.block_size, stop - start))
+        return self.block[start - self.block_start:stop - self.block_start]
+
+
+def read_header(image_path, max_bytes=MAX_HEADER_BYTES):
+    """Read the start of a file, enough to cover the EXIF header of a JPEG."""
+    with open(image_path, 'rb') as f:
+        return f.read(max_bytes)
+
+
+def find_app1_exif(data):
+    """
+    Walk the JPEG markers and locate the EXIF APP1 segment.
+
+    Returns:
+        Offset of the TIFF header inside data, or None if the segment can't be
+        found within data (not a JPEG, no EXIF, or header larger than data)
+    """
+    if data[:2] != b'\xff\xd8':
+        return None
+
+    pos = 2
+    while pos + 4 <= len(data):
+        if data[pos] != 0xFF:
+            return None
+        marker = data[pos + 1]
+
+        # Fill bytes
+        if marker == 0xFF:
+            pos += 1
+            continue
+
+        # Start of scan or end of image, there is no EXIF header
+        if marker in (0xDA, 0xD9):
+            return None
+
+        length = struct.unpack('>H', data[pos + 2:pos + 4])[0]
+        if marker == 0xE1 and data[pos + 4:pos + 10] == b'Exif\x00\x00':
+            if pos + 2 + length > len(data):
+                return None
+            return pos + 10
+
+        pos += 2 + length
+
+    return None
+
+
+def _tiff_header(data, tiff=None):
+    """
+    Return (tiff_offset, endian, ifd0_offset) of the EXIF block, or None.
+    tiff is the offset of the TIFF header, looked up in the JPEG APP1 segment if not given.
+    """
+    if tiff is None:
+        tiff = find_app1_exif(data)
+        if tiff is None:
+            return None
+
+    byte_order = data[tiff:tiff + 2]
+    if byte_order == b'II':
+        endian = '<'
+    elif byte_order == b'MM':
+        endian = '>'
+    else:
+        return None
+
+    if struct.unpack(endian + 'H', data[tiff + 2:tiff + 4])[0] != 42:
+        return None
+
+    return tiff, endian, struct.unpack(endian + 'I', data[tiff + 4:tiff + 8])[0]
+
+
+def find_date_tags(data, tiff=None):
+    """
+    Locate the date tags in a JPEG header, or in the TIFF structure at
+    offset tiff of data.
+
+    Returns:
+        Dict mapping field name to DateTag (offsets relative to the start of
+        the file) for the tags that exist, or None if the header can't be
+        parsed by this simple reader
+    """
+    try:
+        header = _tiff_header(data, tiff)
+        if header is None:
+            return None
+
+        tiff, endian, ifd0_offset = header
+        tags = {}
+        exif_offset = _scan_ifd(data, tiff, ifd0_offset, endian, IFD0_DATE_TAGS, tags)
+        if exif_offset is not None:
+            _scan_ifd(data, tiff, exif_offset, endian, EXIF_DATE_TAGS, tags)
+        return tags
+    except (struct.error, ValueError, IndexError):
+        return None
+
+
+def _scan_ifd(data, tiff, ifd_offset, endian, wanted, tags):
+    """Collect the wanted ASCII tags of one IFD into tags, return the EXIF IFD pointer if present."""
+    start = tiff + ifd_offset
+    entry_count = struct.unpack(endian + 'H', data[start:start + 2])[0]
+    exif_offset = None
+    remaining = len(wanted)
+
+    for i in range(entry_count):
+        entry = start + 2 + i * 12
+        tag, tag_type, count, value = struct.unpack(endian + 'HHII', data[entry:entry + 12])
+
+        if tag == EXIF_IFD_POINTER:
+            exif_offset = value
+        elif tag in wanted:
+            if tag_type != ASCII_TYPE:
+                raise ValueError(f"Unexpected type {tag_type} for tag {tag:#06x}")
+            # Values of up to 4 bytes are stored inline in the entry
+            offset = entry + 8 if count <= 4 else tiff + value
+            if offset + count > len(data):
+                raise ValueError("Tag value outside of the header")
+            raw = data[offset:offset + count].split(b'\x00', 1)[0]
+            tags[wanted[tag]] = DateTag(offset, count, raw.decode('ascii', 'replace').strip())
+            remaining -= 1
+
+        # Tags are sorted, stop once everything in this IFD is found
+        if remaining == 0 and (exif_offset is not None or tag > EXIF_IFD_POINTER):
+            break
+
+    return exif_offset
+
+
+def find_thumbnail(data):
+    """
+    Return the embedded JPEG thumbnail (IFD1) of a JPEG header as bytes.
+
+    Returns None if there is no thumbnail or it isn't inside data.
+    """
+    try:
+        header = _tiff_header(data)
+        if header is None:
+            return None
+
+        tiff, endian, ifd0_offset = header
+        start = tiff + ifd0_offset
+        entry_count = struct.unpack(endian + 'H', data[start:start + 2])[0]
+        next_ifd = start + 2 + entry_count * 12
+        ifd1_offset = struct.unpack(endian + 'I', data[next_ifd:next_ifd + 4])[0]
+        if ifd1_offset == 0:
+            return None
+
+        start = tiff + ifd1_offset
+        entry_count = struct.unpack(endian + 'H', data[start:start + 2])[0]
+        thumbnail_offset = thumbnail_length = None
+        for i in range(entry_count):
+            entry = start + 2 + i * 12
+            tag, _, _, value = struct.unpack(endian + 'HHII', data[entry:entry + 12])
+            if tag == THUMBNAIL_OFFSET_TAG:
+                thumbnail_offset = value
+            elif tag == THUMBNAIL_LENGTH_TAG:
+                thumbnail_length = value
+
+        if not thumbnail_offset or not thumbnail_length:
+            return None
+        thumbnail = data[tiff + thumbnail_offset:tiff + thumbnail_offset + thumbnail_length]
+        if len(thumbnail) != thumbnail_length or thumbnail[:2] != b'\xff\xd8':
+            return None
+        return thumbnail
+    except (struct.error, IndexError):
+        return None
+
+
+def read_thumbnail(image_path, max_bytes=MAX_HEADER_BYTES):
+    """Read the embedded EXIF thumbnail of a JPEG, None if it has none."""
+    return find_thumbnail(read_header(image_path, max_bytes))
+
+
+def dates_from_tags(tags):
+    """ExifDates of the tags found by find_date_tags, None if they couldn't be parsed."""
+    if tags is None:
+        return None
+    return ExifDates(*(tags[field].value if field in tags else None for field in DATE_FIELDS))
+
+
+def date_tag_writes(tags, date_values):
+    """
+    Work out the in-place writes that set date_values on the tags found by find_date_tags.
+
+    Returns:
+        List of (offset, bytes), or None if a tag is missing or has an
+        unexpected size
+    """
+    if tags is None:
+        return None
+
+    writes = []
+    for field, value in date_values.items():
+        raw = value.encode('ascii') + b'\x00'
+        tag = tags.get(field)
+        if tag is None or tag.count != len(raw):
+            return None
+        writes.append((tag.offset, raw))
+    return writes
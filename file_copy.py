@@ -0,0 +1,90 @@
+"""
+Copying byte ranges between open files without the bytes passing through Python.
+
+copy_file_range lets the kernel do the copy (and share the blocks instead on
+filesystems that support reflinks, when the offsets allow it), sendfile is
+the older Linux way to the same. Where neither works, e.g. on Windows or
+between filesystems on old kernels, a read/write loop with a fixed buffer
+size is used, so memory use never depends on the size of the range.
+"""
+import os
+import sys
+import errno
+
+CHUNK_SIZE = 1024 * 1024
+
+# errno values that mean "not possible here", the next method is tried then
+UNSUPPORTED_ERRORS = {errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP, errno.ENOTSOCK, errno.EBADF}
+
+
+def _copy_file_range(source_fd, destination_fd, start, length, destination_offset):
+    copied = 0
+    while copied < length:
+        count = os.copy_file_range(source_fd, destination_fd, min(length - copied, 1 << 30),
+                                   start + copied, destination_offset + copied)
+        if count == 0:
+            break
+        copied += count
+    return copied
+
+
+def _sendfile(source_fd, destination_fd, start, length, destination_offset):
+    # sendfile writes at the current position of the destination
+    os.lseek(destination_fd, destination_offset, os.SEEK_SET)
+    copied = 0
+    while copied < length:
+        count = os.sendfile(destination_fd, source_fd, start + copied, min(length - copied, 1 << 30))
+        if count == 0:
+            break
+        copied += count
+    return copied
+
+
+def _kernel_copy_methods():
+    methods = []
+    if hasattr(os, 'copy_file_range'):
+        methods.append(_copy_file_range)
+    # Only Linux can sendfile to a regular file
+    if sys.platform.startswith('linux') and hasattr(os, 'sendfile'):
+        methods.append(_sendfile)
+    return methods
+
+
+KERNEL_COPY_METHODS = _kernel_copy_methods()
+
+
+def copy_range(source, destination, start, end, chunk_size=CHUNK_SIZE):
+    """
+    Copy bytes start..end of source to the current position of destination.
+
+    Both are binary files opened by open(), destination is left positioned
+    after the copied bytes.
+
+    Raises:
+        ValueError: If source ends before end
+    """
+    length = end - start
+    if length <= 0:
+        return
+
+    destination.flush()
+    destination_offset = destination.tell()
+    copied = 0
+    for method in KERNEL_COPY_METHODS:
+        try:
+            copied = method(source.fileno(), destination.fileno(), start, length, destination_offset)
+            break
+        except OSError as e:
+            if e.errno not in UNSUPPORTED_ERRORS:
+                raise
+    destination.seek(destination_offset + copied)
+
+    # Whatever the kernel didn't copy
+    source.seek(start + copied)
+    remaining = length - copied
+    while remaining > 0:
+        chunk = source.read(min(chunk_size, remaining))
+        if not chunk:
+            raise ValueError("File is shorter than expected")
+        destination.write(chunk)
+        remaining -= len(chunk)
@@ -0,0 +1,168 @@
+import os
+import re
+import operator
+from array import array
+
+from image_formats import FORMATS, IMAGE_EXTENSIONS
+
+# One pass decides the class of a name: group 1 is the code of an IMG_XXXX.JPG
+# (or .PNG/.TIF), anything else that matches is another image
+IMAGE_NAME = re.compile(
+    r'IMG_(\d+)(?:%s)|.*(?:%s)' % (
+        '|'.join(re.escape(image_format.standard_extension) for image_format in FORMATS),
+        '|'.join(re.escape(extension) for extension in IMAGE_EXTENSIONS)
+    ),
+    re.IGNORECASE | re.DOTALL
+)
+
+# Longer codes don't fit the arrays, such names count as other images
+MAX_CODE_DIGITS = 18
+
+
+def standard_code(name):
+    """Code of a standard IMG_XXXX.JPG (.PNG, .TIF) name, None for any other name."""
+    m = IMAGE_NAME.fullmatch(name)
+    if m is None or m.group(1) is None or len(m.group(1)) > MAX_CODE_DIGITS:
+        return None
+    return int(m.group(1))
+
+
+class FolderScan:
+    """
+    The image files of one folder, from a single os.scandir pass.
+
+    Standard IMG_XXXX.JPG (.PNG, .TIF) files are sorted by code (then name),
+    the other images by name, so the order doesn't depend on the directory listing.
+    Codes, sizes and modification times are kept in arrays rather than
+    Python objects, which matters for folders with 100k+ files.
+
+    Attributes:
+        names: Standard names in code order, followed by the other names
+        codes: array of the codes of the standard names
+        sizes: array of file sizes, parallel to names (-1 if not collected yet)
+        mtimes_ns: array of modification times, parallel to names (-1 if not collected yet)
+    """
+
+    def __init__(self, folder, names, codes, sizes, mtimes_ns):
+        self.folder = folder
+        self.names = names
+        self.codes = codes
+        self.sizes = sizes
+        self.mtimes_ns = mtimes_ns
+        self._index = None
+
+    @property
+    def standard_count(self):
+        return len(self.codes)
+
+    @property
+    def standard_images(self):
+        """List of (code, filename), as returned by get_image_files."""
+        return list(zip(self.codes, self.names))
+
+    @property
+    def other_images(self):
+        return self.names[len(self.codes):]
+
+    def stat_of(self, name):
+        """(size, mtime_ns) of a file, from the scan or stat'ed (once) if the scan didn't collect it."""
+        if self._index is None:
+            self._index = {name: i for i, name in enumerate(self.names)}
+        i = self._index[name]
+        if self.sizes[i] < 0:
+            stat = os.stat(os.path.join(self.folder, name))
+            self.sizes[i], self.mtimes_ns[i] = stat.st_size, stat.st_mtime_ns
+        return self.sizes[i], self.mtimes_ns[i]
+
+    def duplicate_codes(self):
+        """Codes used by more than one file, e.g. IMG_0001.JPG and img_0001.jpg. Returns {code: [names]}."""
+        duplicates = {}
+        for i in range(1, len(self.codes)):
+            if self.codes[i] == self.codes[i - 1]:
+                duplicates.setdefault(self.codes[i], [self.names[i - 1]]).append(self.names[i])
+        return duplicates
+
+    def gaps(self):
+        """Missing code ranges between the lowest and highest code, as (first, last) pairs."""
+        gaps = []
+        for i in range(1, len(self.codes)):
+            if self.codes[i] > self.codes[i - 1] + 1:
+                gaps.append((self.codes[i - 1] + 1, self.codes[i] - 1))
+        return gaps
+
+
+def scan_folder(folder, with_stat=os.name == 'nt', stop_check=None):
+    """
+    Classify the image files of a folder in one os.scandir pass.
+
+    Args:
+        with_stat: Keep the size and mtime of every image. On Windows they
+                   come with the directory listing, elsewhere it costs one
+                   stat per image, so by default they are only kept on Windows
+                   and FolderScan.stat_of fetches them when needed.
+        stop_check: Optional function, the scan ends early when it returns True
+
+    Returns:
+        FolderScan
+    """
+    match = IMAGE_NAME.fullmatch
+    standard_names = []
+    standard_codes = array('q')
+    other_names = []
+    # Sizes and mtimes of the standard and the other names, in scan order
+    stats = ((array('q'), array('q')), (array('q'), array('q')))
+
+    with os.scandir(folder) as it:
+        for count, entry in enumerate(it):
+            if stop_check is not None and not count % 1024 and stop_check():
+                break
+
+            name = entry.name
+            m = match(name)
+            if m is None or not entry.is_file():
+                continue
+
+            code = m.group(1)
+            standard = code is not None and len(code) <= MAX_CODE_DIGITS
+
+            if with_stat:
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                sizes, mtimes_ns = stats[0 if standard else 1]
+                sizes.append(stat.st_size)
+                mtimes_ns.append(stat.st_mtime_ns)
+
+            if standard:
+                standard_codes.append(int(code))
+                standard_names.append(name)
+            else:
+                other_names.append(name)
+
+    # Sort by code, then the rare ties (IMG_0001.JPG and img_0001.jpg) by name
+    standard_order = sorted(range(len(standard_codes)), key=standard_codes.__getitem__)
+    codes = array('q', map(standard_codes.__getitem__, standard_order))
+    if len(codes) > 1 and min(map(operator.sub, codes[1:], codes)) == 0:
+        start = 0
+        for i in range(1, len(codes) + 1):
+            if i == len(codes) or codes[i] != codes[start]:
+                if i - start > 1:
+                    standard_order[start:i] = sorted(standard_order[start:i], key=standard_names.__getitem__)
+                start = i
+    other_order = sorted(range(len(other_names)), key=other_names.__getitem__)
+
+    names = list(map(standard_names.__getitem__, standard_order))
+    names.extend(map(other_names.__getitem__, other_order))
+
+    if with_stat:
+        (standard_sizes, standard_mtimes), (other_sizes, other_mtimes) = stats
+        sizes = array('q', map(standard_sizes.__getitem__, standard_order))
+        sizes.extend(map(other_sizes.__getitem__, other_order))
+        mtimes_ns = array('q', map(standard_mtimes.__getitem__, standard_order))
+        mtimes_ns.extend(map(other_mtimes.__getitem__, other_order))
+    else:
+        sizes = array('q', [-1]) * len(names)
+        mtimes_ns = array('q', [-1]) * len(names)
+
+    return FolderScan(folder, names, codes, sizes, mtimes_ns)
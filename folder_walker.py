@@ -0,0 +1,128 @@
+import os
+import fnmatch
+
+
+class FolderWalker:
+    """
+    Find directories with a given name using os.scandir.
+
+    Matched folders are not descended into (their contents are processed by
+    process_folder, not searched), directories matching one of the ignore
+    patterns are skipped entirely and symlinked directories are reported but
+    never followed, like os.walk. With more than one thread, sibling subtrees
+    are scanned concurrently to hide filesystem latency on network shares.
+    The result is always in os.walk top-down order, regardless of threads.
+    """
+
+    def __init__(self, target_name, ignore_patterns=None, threads=1, prune_matches=True,
+                 stop_check=None, on_error=None):
+        self.target_name = target_name
+        self.ignore_patterns = list(ignore_patterns or [])
+        self.threads = max(1, int(threads or 1))
+        self.prune_matches = prune_matches
+        self.stop_check = stop_check
+        self.on_error = on_error
+
+    def is_ignored(self, name):
+        """Check if a directory name matches one of the ignore patterns."""
+        return any(fnmatch.fnmatch(name, pattern) for pattern in self.ignore_patterns)
+
+    def should_stop(self):
+        return self.stop_check is not None and self.stop_check()
+
+    def scan_directory(self, path):
+        """
+        Scan one directory.
+
+        Returns:
+            (matches, subdirs): matching folder paths and the subdirectories
+            that still have to be scanned, both in listing order
+        """
+        matches = []
+        subdirs = []
+
+        try:
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    try:
+                        # DirEntry caches d_type, so this does not stat on most filesystems
+                        if not entry.is_dir():
+                            continue
+                        is_symlink = entry.is_symlink()
+                    except OSError:
+                        continue
+
+                    name = entry.name
+                    if name == self.target_name:
+                        matches.append(entry.path)
+                        if self.prune_matches:
+                            continue
+
+                    if is_symlink or self.is_ignored(name):
+                        continue
+
+                    subdirs.append(entry.path)
+        except OSError as e:
+            if self.on_error:
+                self.on_error(e)
+
+        return matches, subdirs
+
+    def walk(self, root_path):
+        """Return all folders named target_name below root_path."""
+        if self.threads > 1:
+            scanned = self._scan_parallel(root_path)
+        else:
+            scanned = self._scan_serial(root_path)
+
+        return self._collect(root_path, scanned)
+
+    def _scan_serial(self, root_path):
+        scanned = {}
+        pending = [root_path]
+
+        while pending and not self.should_stop():
+            path = pending.pop()
+            scanned[path] = self.scan_directory(path)
+            pending.extend(scanned[path][1])
+
+        return scanned
+
+    def _scan_parallel(self, root_path):
+        import concurrent.futures
+
+        scanned = {}
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.threads) as executor:
+            pending = {executor.submit(self.scan_directory, root_path): root_path}
+
+            while pending:
+                done, _ = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+
+                if self.should_stop():
+                    for future in pending:
+                        future.cancel()
+                    break
+
+                for future in done:
+                    path = pending.pop(future)
+                    scanned[path] = future.result()
+                    for subdir in scanned[path][1]:
+                        pending[executor.submit(self.scan_directory, subdir)] = subdir
+
+        return scanned
+
+    def _collect(self, root_path, scanned):
+        """Flatten the per-directory results into os.walk top-down order."""
+        target_folders = []
+        stack = [root_path]
+
+        while stack:
+            path = stack.pop()
+            if path not in scanned:
+                continue
+            matches, subdirs = scanned[path]
+            target_folders.extend(matches)
+            stack.extend(reversed(subdirs))
+
+        return target_folders
@@ -1,11 +1,18 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 import os
+import queue
 import threading
+import collections
 
 from image_processor import ImageProcessor
 from gui.edit_all_tab import EditAllTab
-from gui.edit_picture_tab import EditPictureTab
+
+# How often the log queue is drained into the log widget (ms)
+LOG_POLL_INTERVAL = 100
+
+# Wait this long after the last resize event before redrawing the preview (ms)
+RESIZE_DEBOUNCE = 150
 
 class ImageProcessorApp:
     def __init__(self, root):
@@ -16,12 +23,21 @@ class ImageProcessorApp:
         
         self.processor = None
         self.processing_thread = None
+        self.resize_after_id = None
+        
+        # Log messages from the processing thread, drained on a timer
+        self.log_queue = queue.SimpleQueue()
+        
+        # Latest RunStats snapshot from the processing thread, shown by the same timer
+        self.latest_stats = None
         
-        # Create a processor instance with empty values for now
-        self.processor = ImageProcessor("", "", self.update_log)
+        # The Edit tabs keep their own processor, self.processor is replaced (and
+        # possibly stopped) by every batch run
+        self.edit_processor = ImageProcessor("", "", self.update_log)
         
         self.create_widgets()
         self.setup_bindings()
+        self.root.after(LOG_POLL_INTERVAL, self.drain_log_queue)
     
     def create_widgets(self):
         # Create notebook (tabs)
@@ -29,12 +45,13 @@ class ImageProcessorApp:
         self.notebook.pack(fill=tk.BOTH, expand=True)
         
         # Tab 1: Edit All (renamed from "Rename All")
-        self.edit_all_tab = EditAllTab(self.notebook, self.processor, self)
+        self.edit_all_tab = EditAllTab(self.notebook, self.edit_processor, self)
         self.notebook.add(self.edit_all_tab, text="Edit All")
         
-        # Tab 2: Edit Picture
-        self.edit_picture_tab = EditPictureTab(self.notebook, self.processor, self)
-        self.notebook.add(self.edit_picture_tab, text="Edit Picture")
+        # Tab 2: Edit Picture, built when it is first selected (it pulls in tkcalendar and PIL)
+        self.edit_picture_frame = ttk.Frame(self.notebook)
+        self.notebook.add(self.edit_picture_frame, text="Edit Picture")
+        self.edit_picture_tab = None
         
         # Status bar
         self.status_var = tk.StringVar()
@@ -45,30 +62,69 @@ class ImageProcessorApp:
     def setup_bindings(self):
         # Configure canvas update when window is resized
         self.root.bind('<Configure>', self.on_resize)
+        self.notebook.bind('<<NotebookTabChanged>>', self.on_tab_changed)
+    
+    def on_tab_changed(self, event):
+        if self.edit_picture_tab is None and self.notebook.index(self.notebook.select()) == 1:
+            self.build_edit_picture_tab()
+    
+    def build_edit_picture_tab(self):
+        """Create the Edit Picture tab inside its placeholder frame"""
+        from gui.edit_picture_tab import EditPictureTab
+        
+        self.edit_picture_tab = EditPictureTab(self.edit_picture_frame, self.edit_processor, self)
+        self.edit_picture_tab.pack(fill=tk.BOTH, expand=True)
     
     def on_resize(self, event):
+        # <Configure> fires for every widget while dragging, redraw once it settles
+        if self.resize_after_id is not None:
+            self.root.after_cancel(self.resize_after_id)
+        self.resize_after_id = self.root.after(RESIZE_DEBOUNCE, self.on_resize_settled)
+    
+    def on_resize_settled(self):
+        self.resize_after_id = None
+        
         # Only reload preview if we're on the Edit Picture tab and have an image loaded
         if (self.notebook.index(self.notebook.select()) == 1 and 
-            hasattr(self.edit_picture_tab, 'current_image_path') and 
+            self.edit_picture_tab is not None and 
             self.edit_picture_tab.current_image_path):
             self.edit_picture_tab.load_image_preview()
     
     def update_log(self, message):
-        """Update the log in the Edit All tab"""
-        def _update():
-            if hasattr(self, 'edit_all_tab'):
-                self.edit_all_tab.update_log(message)
+        """Queue a message for the log in the Edit All tab, safe to call from any thread"""
+        self.log_queue.put(message)
+    
+    def drain_log_queue(self):
+        """Move all queued log messages into the log widget in one batch"""
+        # Only the last lines are kept by the widget, so don't insert the rest
+        lines = collections.deque(maxlen=self.edit_all_tab.max_log_lines)
+        try:
+            while True:
+                lines.append(self.log_queue.get_nowait())
+        except queue.Empty:
+            pass
         
-        self.root.after(0, _update)
+        if lines:
+            self.edit_all_tab.append_log_lines(lines)
+        
+        stats, self.latest_stats = self.latest_stats, None
+        if stats is not None:
+            self.edit_all_tab.update_progress(stats)
+        
+        self.root.after(LOG_POLL_INTERVAL, self.drain_log_queue)
+    
+    def update_stats(self, stats):
+        """Remember the latest progress snapshot, safe to call from any thread"""
+        self.latest_stats = stats
     
     def set_status(self, message):
         """Update the status bar message"""
         self.status_var.set(message)
     
-    def start_processing(self, root_path, target_folder):
+    def start_processing(self, root_path, target_folder, **options):
         """
         Start the image processing operation
-        This is called from the Edit All tab
+        This is called from the Edit All tab, options are passed on to ImageProcessor
         """
         if not root_path or not target_folder:
             messagebox.showerror("Error", "Please provide both root path and target folder name")
@@ -85,7 +141,8 @@ class ImageProcessorApp:
         self.set_status("Processing...")
         
         # Create processor
-        self.processor = ImageProcessor(root_path, target_folder, self.update_log)
+        self.processor = ImageProcessor(root_path, target_folder, self.update_log,
+                                        stats_callback=self.update_stats, **options)
         
         # Start processing in a separate thread
         self.processing_thread = threading.Thread(target=self.run_processing)
@@ -2,12 +2,26 @@ import tkinter as tk
 from tkinter import ttk, filedialog, scrolledtext
 import os
 
+from metrics import format_eta
+from profiling import DEFAULT_PROFILE_DIR
+from dedupe import DEFAULT_DUPLICATE_FOLDER
+
+# Combobox text -> ImageProcessor dedupe option
+DEDUPE_CHOICES = {
+    "Keep": None,
+    "Leave out of the sequence": 'skip',
+    f"Move to {DEFAULT_DUPLICATE_FOLDER}": 'move',
+}
+
 class EditAllTab(ttk.Frame):
-    def __init__(self, parent, processor, app):
+    def __init__(self, parent, processor, app, max_log_lines=5000):
         super().__init__(parent, padding="10")
         self.processor = processor
         self.app = app
         
+        # The log widget only keeps the last lines, the full log is in the log file
+        self.max_log_lines = max_log_lines
+        
         self.create_widgets()
     
     def create_widgets(self):
@@ -26,6 +40,33 @@ class EditAllTab(ttk.Frame):
         self.target_folder_var = tk.StringVar(value="01. Foto's")  # Set default value
         ttk.Entry(input_frame, textvariable=self.target_folder_var, width=50).grid(column=1, row=1, sticky=(tk.W, tk.E), padx=5, pady=5)
         
+        # Number of worker processes (1 processes folders one at a time)
+        ttk.Label(input_frame, text="Workers:").grid(column=0, row=2, sticky=tk.W, padx=5, pady=5)
+        self.workers_var = tk.StringVar(value="1")
+        ttk.Spinbox(input_frame, from_=1, to=os.cpu_count() or 1, width=5, textvariable=self.workers_var).grid(column=1, row=2, sticky=tk.W, padx=5, pady=5)
+        
+        # Folder names to skip while searching, e.g. "$RECYCLE.BIN, .*"
+        ttk.Label(input_frame, text="Ignore Folders:").grid(column=0, row=3, sticky=tk.W, padx=5, pady=5)
+        self.ignore_patterns_var = tk.StringVar()
+        ttk.Entry(input_frame, textvariable=self.ignore_patterns_var, width=50).grid(column=1, row=3, sticky=(tk.W, tk.E), padx=5, pady=5)
+        
+        # Incremental mode
+        self.incremental_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(input_frame, text="Skip folders unchanged since the last run", variable=self.incremental_var).grid(column=1, row=4, sticky=tk.W, padx=5, pady=5)
+        
+        # Dry run, only write the plan
+        self.dry_run_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(input_frame, text="Dry run (write plan only, don't change files)", variable=self.dry_run_var).grid(column=1, row=5, sticky=tk.W, padx=5, pady=5)
+        
+        # Profiling, results go to the profile folder
+        self.profile_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(input_frame, text=f"Profile this run (results in {DEFAULT_PROFILE_DIR})", variable=self.profile_var).grid(column=1, row=6, sticky=tk.W, padx=5, pady=5)
+        
+        # What to do with identical copies of an image
+        ttk.Label(input_frame, text="Duplicate Images:").grid(column=0, row=7, sticky=tk.W, padx=5, pady=5)
+        self.dedupe_var = tk.StringVar(value=next(iter(DEDUPE_CHOICES)))
+        ttk.Combobox(input_frame, textvariable=self.dedupe_var, values=list(DEDUPE_CHOICES), state='readonly', width=30).grid(column=1, row=7, sticky=tk.W, padx=5, pady=5)
+        
         # Action buttons
         button_frame = ttk.Frame(self)
         button_frame.pack(fill=tk.X, padx=5, pady=5)
@@ -36,6 +77,16 @@ class EditAllTab(ttk.Frame):
         self.stop_button = ttk.Button(button_frame, text="Stop", command=self.stop_processing, state=tk.DISABLED)
         self.stop_button.pack(side=tk.LEFT, padx=5)
         
+        # Progress
+        progress_frame = ttk.Frame(self)
+        progress_frame.pack(fill=tk.X, padx=5, pady=5)
+        
+        self.progress_bar = ttk.Progressbar(progress_frame, mode='determinate')
+        self.progress_bar.pack(fill=tk.X)
+        
+        self.progress_var = tk.StringVar()
+        ttk.Label(progress_frame, textvariable=self.progress_var).pack(anchor=tk.W)
+        
         # Log area
         log_frame = ttk.LabelFrame(self, text="Logs", padding="10")
         log_frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
@@ -50,15 +101,48 @@ class EditAllTab(ttk.Frame):
             self.root_path_var.set(directory)
     
     def update_log(self, message):
+        self.append_log_lines([message])
+    
+    def append_log_lines(self, lines):
+        """Append a batch of log lines, dropping the oldest beyond max_log_lines"""
         self.log_text.config(state=tk.NORMAL)
-        self.log_text.insert(tk.END, message + "\n")
+        self.log_text.insert(tk.END, "\n".join(lines) + "\n")
+        
+        # The widget always ends with an empty line after the last newline
+        line_count = int(self.log_text.index('end-1c').split('.')[0]) - 1
+        if line_count > self.max_log_lines:
+            self.log_text.delete('1.0', f'{line_count - self.max_log_lines + 1}.0')
+        
         self.log_text.see(tk.END)
         self.log_text.config(state=tk.DISABLED)
     
+    def update_progress(self, stats):
+        """Show a RunStats snapshot in the progress bar and label"""
+        self.progress_bar.config(maximum=max(1, stats['folders_total']), value=stats['folders_done'])
+        self.progress_var.set(
+            f"Folders {stats['folders_done']}/{stats['folders_total']} - "
+            f"Images {stats['images_done']} ({stats['images_per_second']:.1f}/s) - "
+            f"ETA {format_eta(stats['eta'])}"
+        )
+    
     def start_processing(self):
         root_path = self.root_path_var.get()
         target_folder = self.target_folder_var.get()
-        self.app.start_processing(root_path, target_folder)
+        try:
+            workers = int(self.workers_var.get())
+        except ValueError:
+            workers = 1
+        ignore_patterns = [p.strip() for p in self.ignore_patterns_var.get().split(',') if p.strip()]
+        self.app.start_processing(
+            root_path,
+            target_folder,
+            workers=workers,
+            ignore_patterns=ignore_patterns,
+            incremental=self.incremental_var.get(),
+            dry_run=self.dry_run_var.get(),
+            profile_dir=DEFAULT_PROFILE_DIR if self.profile_var.get() else None,
+            dedupe=DEDUPE_CHOICES.get(self.dedupe_var.get())
+        )
     
     def stop_processing(self):
         self.app.stop_processing()
@@ -1,11 +1,17 @@
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 import os
+import threading
 from datetime import datetime
 from tkcalendar import DateEntry
-import PIL.Image
 import PIL.ImageTk
 
+from gui.preview import PreviewCache, load_exif_thumbnail, fit_image
+from gui.thumbnail_grid import ThumbnailGrid
+from gui.thumbnail_cache import ThumbnailCache
+from batch_edit import METADATA_FIELDS, parse_shift
+from image_formats import IMAGE_EXTENSIONS, format_for_name
+
 class EditPictureTab(ttk.Frame):
     def __init__(self, parent, processor, app):
         super().__init__(parent, padding="10")
@@ -15,10 +21,18 @@ class EditPictureTab(ttk.Frame):
         # For image preview
         self.current_image_path = None
         self.image_preview = None
+        self.thumbnail_cache = self.open_thumbnail_cache()
+        self.preview_cache = PreviewCache(disk_cache=self.thumbnail_cache)
+        self.decoding_path = None
+        self.shown_preview = None
         
         # Date pickers dict
         self.date_pickers = {}
         
+        # Thumbnails selected for a batch edit
+        self.selected_paths = []
+        self.batch_running = False
+        
         self.create_widgets()
     
     def create_widgets(self):
@@ -35,6 +49,23 @@ class EditPictureTab(ttk.Frame):
         ttk.Entry(file_frame, textvariable=self.image_path_var, width=40).grid(column=1, row=0, sticky=(tk.W, tk.E), padx=5, pady=5)
         ttk.Button(file_frame, text="Browse...", command=self.browse_image_path).grid(column=2, row=0, padx=5, pady=5)
         
+        # Thumbnails of every image in a folder
+        folder_frame = ttk.LabelFrame(left_panel, text="Browse Folder", padding="10")
+        folder_frame.pack(fill=tk.X, padx=5, pady=5)
+        
+        folder_row = ttk.Frame(folder_frame)
+        folder_row.pack(fill=tk.X)
+        self.folder_path_var = tk.StringVar()
+        ttk.Entry(folder_row, textvariable=self.folder_path_var, state="readonly").pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
+        ttk.Button(folder_row, text="Open Folder...", command=self.browse_folder).pack(side=tk.LEFT, padx=5)
+        
+        self.thumbnail_grid = ThumbnailGrid(
+            folder_frame, on_select=self.on_thumbnail_selected, on_selection_changed=self.on_selection_changed,
+            file_filter=self.is_valid_image_filename,
+            disk_cache=self.thumbnail_cache
+        )
+        self.thumbnail_grid.pack(fill=tk.X, pady=(5, 0))
+        
         # Image preview
         preview_frame = ttk.LabelFrame(left_panel, text="Preview", padding="10")
         preview_frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
@@ -104,6 +135,37 @@ class EditPictureTab(ttk.Frame):
             state=tk.DISABLED
         )
         self.apply_button.pack(side=tk.LEFT, padx=5, pady=5)
+        
+        self.create_batch_editor(right_panel)
+    
+    def create_batch_editor(self, parent):
+        """Create the section that edits all images selected in the thumbnail grid."""
+        frame = ttk.LabelFrame(parent, text="Batch Edit Selected Images", padding="10")
+        frame.pack(fill=tk.X, padx=5, pady=5)
+        
+        self.batch_count_var = tk.StringVar(value="No images selected (Ctrl/Shift-click thumbnails)")
+        ttk.Label(frame, textvariable=self.batch_count_var).grid(column=0, row=0, columnspan=4, sticky=tk.W, padx=5, pady=2)
+        
+        # One shift per field, e.g. "+1h 3m", empty leaves the field alone
+        self.shift_vars = {}
+        for row, field_name in enumerate(METADATA_FIELDS):
+            ttk.Label(frame, text=f"Shift {field_name}:").grid(column=(row % 2) * 2, row=1 + row // 2, sticky=tk.W, padx=5, pady=2)
+            self.shift_vars[field_name] = tk.StringVar()
+            ttk.Entry(frame, textvariable=self.shift_vars[field_name], width=10).grid(column=(row % 2) * 2 + 1, row=1 + row // 2, sticky=tk.W, padx=5, pady=2)
+        
+        button_frame = ttk.Frame(frame)
+        button_frame.grid(column=0, row=3, columnspan=4, sticky=tk.W)
+        self.shift_button = ttk.Button(button_frame, text="Shift Selected", command=self.apply_batch_shift, state=tk.DISABLED)
+        self.shift_button.pack(side=tk.LEFT, padx=5, pady=5)
+        self.set_selected_button = ttk.Button(
+            button_frame, text="Set Selected to Enabled Dates", command=self.apply_batch_values, state=tk.DISABLED
+        )
+        self.set_selected_button.pack(side=tk.LEFT, padx=5, pady=5)
+        
+        self.batch_progress = ttk.Progressbar(frame, mode='determinate')
+        self.batch_progress.grid(column=0, row=4, columnspan=4, sticky=(tk.W, tk.E), padx=5, pady=2)
+        self.batch_status_var = tk.StringVar()
+        ttk.Label(frame, textvariable=self.batch_status_var).grid(column=0, row=5, columnspan=4, sticky=tk.W, padx=5)
     
     def create_datetime_editor(self, parent, title, field_name):
         """Create a date/time editor section for a specific metadata field."""
@@ -244,12 +306,33 @@ class EditPictureTab(ttk.Frame):
     
     def browse_image_path(self):
         image_file = filedialog.askopenfilename(
-            filetypes=[("JPEG Images", "*.jpg;*.jpeg"), ("All Files", "*.*")]
+            filetypes=[("Images", ";".join(f"*{extension}" for extension in IMAGE_EXTENSIONS)), ("All Files", "*.*")]
         )
         if image_file:
             self.image_path_var.set(image_file)
             self.load_image_data(image_file)
     
+    def open_thumbnail_cache(self):
+        """Open the persistent thumbnail cache, previews still work without it."""
+        try:
+            return ThumbnailCache()
+        except Exception as e:
+            self.app.update_log(f"Thumbnail cache disabled: {str(e)}")
+            return None
+    
+    def browse_folder(self):
+        folder = filedialog.askdirectory()
+        if folder:
+            self.folder_path_var.set(folder)
+            try:
+                self.thumbnail_grid.set_folder(folder)
+            except OSError as e:
+                messagebox.showerror("Error", f"Error reading folder: {str(e)}")
+    
+    def on_thumbnail_selected(self, image_path):
+        self.image_path_var.set(image_path)
+        self.load_image_data(image_path)
+    
     def load_image_data(self, image_path):
         """Load image data and display in the Edit Picture tab."""
         try:
@@ -303,47 +386,81 @@ class EditPictureTab(ttk.Frame):
     
     def load_image_preview(self):
         """Load and display image preview."""
-        try:
-            if not self.current_image_path:
-                return
-                
-            # Clear previous image
-            self.preview_canvas.delete("all")
-            
-            # Open image and resize for preview
-            original_image = PIL.Image.open(self.current_image_path)
-            
-            # Calculate resize dimensions while maintaining aspect ratio
-            canvas_width = self.preview_canvas.winfo_width()
-            canvas_height = self.preview_canvas.winfo_height()
-            
-            # If canvas hasn't been realized yet, use default sizes
-            if canvas_width <= 1:
-                canvas_width = 300
-            if canvas_height <= 1:
-                canvas_height = 300
-            
-            # Calculate resize dimensions
-            img_width, img_height = original_image.size
-            ratio = min(canvas_width/img_width, canvas_height/img_height)
-            new_width = int(img_width * ratio)
-            new_height = int(img_height * ratio)
-            
-            # Resize image
-            resized_image = original_image.resize((new_width, new_height), PIL.Image.LANCZOS)
-            
-            # Convert to PhotoImage
-            self.image_preview = PIL.ImageTk.PhotoImage(resized_image)
-            
-            # Display on canvas
-            self.preview_canvas.create_image(
-                canvas_width//2, canvas_height//2,
-                image=self.image_preview,
-                anchor=tk.CENTER
-            )
-            
-        except Exception as e:
-            messagebox.showerror("Error", f"Error loading image preview: {str(e)}")
+        if not self.current_image_path:
+            return
+        
+        image = self.preview_cache.get(self.current_image_path)
+        if image is not None:
+            self.show_preview(image)
+            return
+        
+        # First paint from the embedded EXIF thumbnail while the preview decodes
+        thumbnail = load_exif_thumbnail(self.current_image_path)
+        if thumbnail is not None:
+            self.show_preview(thumbnail)
+        
+        self.start_preview_decode(self.current_image_path)
+    
+    def start_preview_decode(self, image_path):
+        """Decode the preview of an image on a background thread."""
+        if self.decoding_path == image_path:
+            return
+        self.decoding_path = image_path
+        
+        def decode():
+            image = error = None
+            try:
+                image = self.preview_cache.load(image_path)
+            except Exception as e:
+                error = e
+            self.after(0, lambda: self.on_preview_decoded(image_path, image, error))
+        
+        threading.Thread(target=decode, daemon=True).start()
+    
+    def on_preview_decoded(self, image_path, image, error):
+        # A decode of an image selected earlier may finish after the current one started
+        if self.decoding_path == image_path:
+            self.decoding_path = None
+        
+        # Another image was selected in the meantime
+        if image_path != self.current_image_path:
+            return
+        
+        if error is not None:
+            messagebox.showerror("Error", f"Error loading image preview: {str(error)}")
+            return
+        
+        self.show_preview(image)
+    
+    def show_preview(self, image):
+        """Scale an already decoded image to the canvas and display it."""
+        canvas_width = self.preview_canvas.winfo_width()
+        canvas_height = self.preview_canvas.winfo_height()
+        
+        # If canvas hasn't been realized yet, use default sizes
+        if canvas_width <= 1:
+            canvas_width = 300
+        if canvas_height <= 1:
+            canvas_height = 300
+        
+        # Nothing to do if the same image is already shown at this size
+        if self.shown_preview is not None and self.shown_preview[0] is image and \
+                self.shown_preview[1:] == (canvas_width, canvas_height):
+            return
+        self.shown_preview = (image, canvas_width, canvas_height)
+        
+        # Clear previous image
+        self.preview_canvas.delete("all")
+        
+        # Convert to PhotoImage
+        self.image_preview = PIL.ImageTk.PhotoImage(fit_image(image, canvas_width, canvas_height))
+        
+        # Display on canvas
+        self.preview_canvas.create_image(
+            canvas_width//2, canvas_height//2,
+            image=self.image_preview,
+            anchor=tk.CENTER
+        )
     
     def get_enabled_metadata_changes(self):
         """Get a dictionary of enabled metadata changes."""
@@ -393,7 +510,7 @@ class EditPictureTab(ttk.Frame):
                 
                 # Check if the filename has a valid extension
                 if not self.is_valid_image_filename(new_name):
-                    messagebox.showerror("Error", "Invalid filename. Please ensure it has a .jpg or .jpeg extension")
+                    messagebox.showerror("Error", f"Invalid filename. Please ensure it has one of these extensions: {', '.join(IMAGE_EXTENSIONS)}")
                     return
                 
                 # Set the new filename if it's different from current
@@ -437,6 +554,96 @@ class EditPictureTab(ttk.Frame):
         except Exception as e:
             messagebox.showerror("Error", f"Error applying changes: {str(e)}")
     
+    def on_selection_changed(self, paths):
+        self.selected_paths = paths
+        if paths:
+            self.batch_count_var.set(f"{len(paths)} images selected")
+        else:
+            self.batch_count_var.set("No images selected (Ctrl/Shift-click thumbnails)")
+        self.update_batch_buttons()
+    
+    def update_batch_buttons(self):
+        state = tk.NORMAL if self.selected_paths and not self.batch_running else tk.DISABLED
+        self.shift_button.config(state=state)
+        self.set_selected_button.config(state=state)
+    
+    def apply_batch_shift(self):
+        """Shift the dates of every selected image by the entered amounts."""
+        metadata_changes = {}
+        for field_name, var in self.shift_vars.items():
+            if var.get().strip():
+                try:
+                    metadata_changes[field_name] = parse_shift(var.get())
+                except ValueError as e:
+                    messagebox.showerror("Error", f"{field_name}: {str(e)}")
+                    return
+        
+        if not metadata_changes:
+            messagebox.showinfo("No Changes", "Enter a shift like +1h 3m for at least one field")
+            return
+        self.start_batch_edit(metadata_changes)
+    
+    def apply_batch_values(self):
+        """Set the enabled date fields of the editors above on every selected image."""
+        metadata_changes = self.get_enabled_metadata_changes()
+        if metadata_changes is None:
+            return
+        if not metadata_changes:
+            messagebox.showinfo("No Changes", "Enable at least one date field above")
+            return
+        self.start_batch_edit(metadata_changes)
+    
+    def start_batch_edit(self, metadata_changes):
+        """Run a batch edit on a background thread, progress is posted back to Tk."""
+        paths = list(self.selected_paths)
+        if not messagebox.askyesno("Batch Edit", f"Change {', '.join(metadata_changes)} on {len(paths)} images?"):
+            return
+        
+        self.batch_running = True
+        self.update_batch_buttons()
+        self.batch_progress.config(maximum=len(paths), value=0)
+        self.batch_status_var.set(f"Editing 0/{len(paths)}...")
+        
+        def progress(done, total, result):
+            self.after(0, lambda: self.on_batch_progress(done, total))
+        
+        def run():
+            try:
+                results = self.processor.edit_images(paths, metadata_changes, progress_callback=progress)
+                error = None
+            except Exception as e:
+                results, error = [], e
+            self.after(0, lambda: self.on_batch_finished(results, error))
+        
+        threading.Thread(target=run, daemon=True).start()
+    
+    def on_batch_progress(self, done, total):
+        self.batch_progress.config(value=done)
+        self.batch_status_var.set(f"Editing {done}/{total}...")
+    
+    def on_batch_finished(self, results, error):
+        self.batch_running = False
+        self.update_batch_buttons()
+        
+        if error is not None:
+            self.batch_status_var.set("Batch edit failed")
+            messagebox.showerror("Error", f"Error applying batch edit: {str(error)}")
+            return
+        
+        failed = [result for result in results if not result.success]
+        self.batch_status_var.set(f"{len(results) - len(failed)} edited, {len(failed)} failed")
+        self.app.set_status(f"Batch edited {len(results) - len(failed)} images")
+        
+        if failed:
+            details = "\n".join(f"{os.path.basename(result.path)}: {result.message}" for result in failed[:10])
+            if len(failed) > 10:
+                details += f"\n... and {len(failed) - 10} more"
+            messagebox.showwarning("Batch Edit", f"{len(failed)} images could not be edited:\n{details}")
+        
+        # Show the new values of the image in the editor
+        if self.current_image_path and self.current_image_path in [result.path for result in results]:
+            self.load_image_data(self.current_image_path)
+    
     def is_valid_image_filename(self, filename):
-        """Check if the filename has a valid image extension."""
-        return filename.lower().endswith(('.jpg', '.jpeg'))
\ No newline at end of file
+        """Check if the filename has the extension of a format whose dates can be written."""
+        return format_for_name(filename) is not None
\ No newline at end of file
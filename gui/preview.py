@@ -0,0 +1,107 @@
+# gui/preview.py
+import io
+import os
+import threading
+from collections import OrderedDict
+
+import PIL.Image
+
+import exif_header
+
+# Longest side of the previews, in memory and in the disk cache
+PREVIEW_SIZE = 2048
+
+
+def file_key(path):
+    """Cache key that changes whenever the file is replaced or rewritten."""
+    stat = os.stat(path)
+    return (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+
+
+def load_exif_thumbnail(path):
+    """Decode the embedded EXIF thumbnail of a JPEG, None if it has none."""
+    try:
+        thumbnail = exif_header.read_thumbnail(path)
+        if thumbnail is None:
+            return None
+        image = PIL.Image.open(io.BytesIO(thumbnail))
+        image.load()
+        return image
+    except (OSError, ValueError):
+        return None
+
+
+def decode_preview(path, max_dimension):
+    """
+    Decode an image at no more than max_dimension pixels on its longest side.
+
+    JPEGs are downscaled by the decoder itself (Image.draft), so a 40 MP
+    photo is never decoded at full resolution.
+    """
+    image = PIL.Image.open(path)
+    image.draft('RGB', (max_dimension, max_dimension))
+    image.load()
+    if max(image.size) > max_dimension:
+        image.thumbnail((max_dimension, max_dimension), PIL.Image.LANCZOS)
+    return image
+
+
+def fit_image(image, width, height):
+    """Resize an image to fit in width x height, keeping its aspect ratio."""
+    img_width, img_height = image.size
+    ratio = min(width / img_width, height / img_height)
+    new_size = (max(1, int(img_width * ratio)), max(1, int(img_height * ratio)))
+    return image.resize(new_size, PIL.Image.LANCZOS)
+
+
+class PreviewCache:
+    """
+    LRU cache of decoded previews keyed by path, mtime and size.
+
+    Previews are decoded once at max_dimension, resizing the window only
+    rescales the cached image. With a disk_cache (ThumbnailCache) a preview
+    made in an earlier session is used instead of decoding the original,
+    it's stored at the same max_dimension so both look the same.
+    Safe to use from several threads.
+    """
+
+    def __init__(self, max_entries=6, max_dimension=PREVIEW_SIZE, disk_cache=None):
+        self.max_entries = max_entries
+        self.max_dimension = max_dimension
+        self.disk_cache = disk_cache
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, path):
+        """Return the cached preview, or None if it isn't cached (or the file changed)."""
+        try:
+            key = file_key(path)
+        except OSError:
+            return None
+
+        with self.lock:
+            image = self.entries.get(key)
+            if image is not None:
+                self.entries.move_to_end(key)
+            return image
+
+    def load(self, path):
+        """Return the preview, decoding and caching it if needed."""
+        image = self.get(path)
+        if image is not None:
+            return image
+
+        key = file_key(path)
+        image = self.disk_cache.get(path, self.max_dimension) if self.disk_cache else None
+        if image is None:
+            image = decode_preview(path, self.max_dimension)
+            if self.disk_cache:
+                self.disk_cache.put(path, self.max_dimension, image)
+
+        with self.lock:
+            self.entries[key] = image
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+        return image
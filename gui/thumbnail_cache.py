@@ -0,0 +1,218 @@
+# gui/thumbnail_cache.py
+import os
+import time
+import hashlib
+import sqlite3
+import tempfile
+import threading
+
+import PIL.Image
+
+from gui.preview import file_key, PREVIEW_SIZE
+from metadata_cache import user_cache_dir
+
+# Thumbnails are only stored at these sizes (longest side in pixels)
+THUMBNAIL_SIZES = (128, 256, PREVIEW_SIZE)
+
+
+def default_cache_dir():
+    return os.path.join(user_cache_dir(), 'thumbnails')
+
+
+class ThumbnailCache:
+    """
+    Persistent cache of small thumbnails, shared between sessions.
+
+    Entries are keyed by the absolute path, mtime and size of the original,
+    so a rewritten photo never gets a stale thumbnail. The thumbnails are
+    files in the cache directory, an SQLite index records their size and
+    last use, and the least recently used ones are removed once the cache
+    grows past max_bytes. Files are written to a temp name and renamed into
+    place, and SQLite does the locking, so several threads and several app
+    instances can share one cache. Cache hits only update last_used in
+    memory, it is written with the next put or evict, or after
+    flush_interval seconds.
+    """
+
+    def __init__(self, directory=None, max_bytes=512 * 1024 * 1024, image_format='JPEG', quality=85,
+                 flush_interval=5.0):
+        self.directory = directory or default_cache_dir()
+        self.max_bytes = max_bytes
+        self.image_format = image_format
+        self.extension = '.webp' if image_format == 'WEBP' else '.jpg'
+        self.quality = quality
+        self.lock = threading.Lock()
+        self.unchecked_bytes = 0
+        self.flush_interval = flush_interval
+        self.pending_uses = {}  # (key, size) -> last_used not written yet
+        self.last_flush = time.monotonic()
+
+        os.makedirs(self.directory, exist_ok=True)
+        self.connection = sqlite3.connect(
+            os.path.join(self.directory, 'index.db'), timeout=30, check_same_thread=False
+        )
+        with self.lock:
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            # A lost update only costs a thumbnail decode, no need to sync every commit
+            self.connection.execute("PRAGMA synchronous=NORMAL")
+            self.connection.execute("""
+                CREATE TABLE IF NOT EXISTS thumbnails (
+                    key TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    file TEXT NOT NULL,
+                    bytes INTEGER NOT NULL,
+                    last_used REAL NOT NULL,
+                    PRIMARY KEY (key, size)
+                )
+            """)
+            self.connection.execute("CREATE INDEX IF NOT EXISTS thumbnails_last_used ON thumbnails (last_used)")
+            self.connection.commit()
+        self.evict()
+
+    def entry_key(self, path):
+        """Hash of the path, mtime and size of the original, raises OSError if it's gone."""
+        return hashlib.sha1(repr(file_key(path)).encode('utf-8', 'surrogateescape')).hexdigest()
+
+    def check_size(self, size):
+        if size not in THUMBNAIL_SIZES:
+            raise ValueError(f"Thumbnail size must be one of {THUMBNAIL_SIZES}, got {size}")
+
+    def get(self, path, size):
+        """Return the cached thumbnail of an image, None if it isn't cached."""
+        self.check_size(size)
+        try:
+            key = self.entry_key(path)
+        except OSError:
+            return None
+
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT file FROM thumbnails WHERE key = ? AND size = ?", (key, size)
+            ).fetchone()
+            if row is None:
+                return None
+            self.pending_uses[(key, size)] = time.time()
+            if time.monotonic() - self.last_flush >= self.flush_interval:
+                self.write_uses()
+                self.connection.commit()
+
+        try:
+            image = PIL.Image.open(os.path.join(self.directory, row[0]))
+            image.load()
+            return image
+        except (OSError, ValueError):
+            # Evicted by another instance or damaged, forget it
+            with self.lock:
+                self.pending_uses.pop((key, size), None)
+                self.connection.execute("DELETE FROM thumbnails WHERE key = ? AND size = ?", (key, size))
+                self.connection.commit()
+            return None
+
+    def put(self, path, size, image):
+        """Store a thumbnail of an image, image is downscaled to size if needed."""
+        self.check_size(size)
+        try:
+            key = self.entry_key(path)
+        except OSError:
+            return
+
+        thumbnail = image.convert('RGB')
+        if max(thumbnail.size) > size:
+            thumbnail.thumbnail((size, size), PIL.Image.LANCZOS)
+
+        # Spread the files over subfolders so none gets huge
+        relative_path = os.path.join(key[:2], f"{key}_{size}{self.extension}")
+        full_path = os.path.join(self.directory, relative_path)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(full_path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                thumbnail.save(f, self.image_format, quality=self.quality)
+            os.replace(temp_path, full_path)
+        except OSError:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            return
+
+        file_bytes = os.path.getsize(full_path)
+        with self.lock:
+            self.pending_uses.pop((key, size), None)
+            self.write_uses()
+            self.connection.execute(
+                "INSERT OR REPLACE INTO thumbnails VALUES (?, ?, ?, ?, ?)",
+                (key, size, relative_path, file_bytes, time.time())
+            )
+            self.connection.commit()
+            self.unchecked_bytes += file_bytes
+            check = self.unchecked_bytes >= self.max_bytes // 100
+
+        if check:
+            self.evict()
+
+    def load(self, path, size, decode):
+        """Return the cached thumbnail, or decode(path), cache and return it."""
+        image = self.get(path, size)
+        if image is not None:
+            return image
+
+        image = decode(path)
+        self.put(path, size, image)
+        return image
+
+    def write_uses(self):
+        """Write the pending last_used times, in the caller's transaction (lock held)."""
+        if self.pending_uses:
+            self.connection.executemany(
+                "UPDATE thumbnails SET last_used = ? WHERE key = ? AND size = ?",
+                [(last_used, key, size) for (key, size), last_used in self.pending_uses.items()]
+            )
+            self.pending_uses = {}
+        self.last_flush = time.monotonic()
+
+    def flush(self):
+        """Write the pending last_used times."""
+        with self.lock:
+            self.write_uses()
+            self.connection.commit()
+
+    def evict(self):
+        """Remove the least recently used thumbnails until the cache is back under 90% of max_bytes."""
+        with self.lock:
+            self.unchecked_bytes = 0
+            # The least recently used ones must be known before choosing them
+            self.write_uses()
+            self.connection.commit()
+            total = self.connection.execute("SELECT COALESCE(SUM(bytes), 0) FROM thumbnails").fetchone()[0]
+            if total <= self.max_bytes:
+                return
+
+            target = self.max_bytes * 9 // 10
+            removed = []
+            for key, size, relative_path, file_bytes in self.connection.execute(
+                "SELECT key, size, file, bytes FROM thumbnails ORDER BY last_used"
+            ):
+                if total <= target:
+                    break
+                removed.append((key, size, relative_path))
+                total -= file_bytes
+
+            self.connection.executemany(
+                "DELETE FROM thumbnails WHERE key = ? AND size = ?",
+                [(key, size) for key, size, _ in removed]
+            )
+            self.connection.commit()
+
+        for _, _, relative_path in removed:
+            try:
+                os.remove(os.path.join(self.directory, relative_path))
+            except OSError:
+                pass
+
+    def close(self):
+        with self.lock:
+            self.write_uses()
+            self.connection.commit()
+            self.connection.close()
@@ -0,0 +1,283 @@
+# gui/thumbnail_grid.py
+import tkinter as tk
+from tkinter import ttk
+import os
+import queue
+import concurrent.futures
+from collections import OrderedDict
+
+import PIL.Image
+import PIL.ImageTk
+
+from gui.preview import load_exif_thumbnail, decode_preview
+from gui.utils import is_image_file
+
+THUMBNAIL_SIZE = 128
+CELL_PADDING = 8
+LABEL_HEIGHT = 18
+
+# How often finished thumbnails are collected from the decode threads (ms)
+RESULT_POLL_INTERVAL = 50
+
+
+def load_thumbnail(path, size=THUMBNAIL_SIZE, disk_cache=None):
+    """Decode a small thumbnail, preferring the disk cache and then the embedded EXIF thumbnail."""
+    if disk_cache is not None:
+        return disk_cache.load(path, size, lambda path: load_thumbnail(path, size))
+
+    image = load_exif_thumbnail(path)
+    if image is None:
+        image = decode_preview(path, size * 2)
+    image = image.convert('RGB')
+    image.thumbnail((size, size), PIL.Image.LANCZOS)
+    return image
+
+
+class ThumbnailGrid(ttk.Frame):
+    """
+    Scrollable grid of thumbnails for the images in a folder.
+
+    Clicking an image calls on_select with its path. If on_selection_changed
+    is given, Ctrl/Shift-click select several images and it is called with
+    the selected paths.
+
+    Only the rows in view (plus one on either side) have canvas items, and
+    only a bounded number of decoded thumbnails is kept, so memory stays
+    flat no matter how many images the folder has. Thumbnails are decoded
+    on background threads and drawn as they become ready.
+    """
+
+    def __init__(self, parent, on_select=None, on_selection_changed=None, file_filter=is_image_file, thumbnail_size=THUMBNAIL_SIZE,
+                 max_cached=500, threads=4, height=180, disk_cache=None):
+        super().__init__(parent)
+        self.on_select = on_select
+        self.on_selection_changed = on_selection_changed
+        self.disk_cache = disk_cache
+        self.file_filter = file_filter
+        self.thumbnail_size = thumbnail_size
+        self.cell_width = thumbnail_size + CELL_PADDING * 2
+        self.cell_height = thumbnail_size + CELL_PADDING * 2 + LABEL_HEIGHT
+        self.max_cached = max_cached
+
+        self.paths = []
+        self.columns = 1
+        self.selected = set()
+        self.anchor_index = None
+        self.cells = {}                    # index -> (canvas item ids, PhotoImage or None)
+        self.thumbnails = OrderedDict()    # path -> decoded PIL thumbnail, LRU
+        self.pending = {}                  # index -> Future
+        self.results = queue.SimpleQueue()
+        self.generation = 0
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=threads)
+
+        self.canvas = tk.Canvas(self, bg="white", height=height, highlightthickness=0)
+        self.scrollbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self.on_scrollbar)
+        self.canvas.config(yscrollcommand=self.scrollbar.set)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+
+        self.canvas.bind('<Configure>', lambda event: self.layout())
+        self.canvas.bind('<Button-1>', self.on_click)
+        self.canvas.bind('<MouseWheel>', self.on_mousewheel)
+        self.canvas.bind('<Button-4>', lambda event: self.scroll(-1))
+        self.canvas.bind('<Button-5>', lambda event: self.scroll(1))
+        self.bind('<Destroy>', lambda event: self.executor.shutdown(wait=False, cancel_futures=True))
+
+        self.after(RESULT_POLL_INTERVAL, self.poll_results)
+
+    def set_folder(self, folder):
+        """Show the images of a folder."""
+        names = sorted(name for name in os.listdir(folder) if self.file_filter(name))
+        self.set_paths([os.path.join(folder, name) for name in names])
+
+    def set_paths(self, paths):
+        # Results of the previous folder are ignored from now on
+        self.generation += 1
+        for future in self.pending.values():
+            future.cancel()
+        self.pending = {}
+
+        self.canvas.delete("all")
+        self.cells = {}
+        self.paths = list(paths)
+        self.selected = set()
+        self.anchor_index = None
+        self.canvas.yview_moveto(0)
+        self.layout()
+        if self.on_selection_changed:
+            self.on_selection_changed([])
+
+    def layout(self):
+        """Recompute the columns for the current width and redraw the visible cells."""
+        columns = max(1, self.canvas.winfo_width() // self.cell_width)
+        if columns != self.columns:
+            self.columns = columns
+            self.clear_cells()
+
+        rows = (len(self.paths) + self.columns - 1) // self.columns
+        self.canvas.config(scrollregion=(0, 0, self.columns * self.cell_width, rows * self.cell_height))
+        self.refresh()
+
+    def clear_cells(self):
+        for index in list(self.cells):
+            self.remove_cell(index)
+
+    def visible_range(self):
+        """Indices of the cells that are (nearly) in view."""
+        top = self.canvas.canvasy(0)
+        bottom = self.canvas.canvasy(self.canvas.winfo_height())
+        first_row = max(0, int(top // self.cell_height) - 1)
+        last_row = int(bottom // self.cell_height) + 1
+        return range(first_row * self.columns, min(len(self.paths), (last_row + 1) * self.columns))
+
+    def refresh(self):
+        """Create the cells that came into view and drop the ones that left it."""
+        visible = self.visible_range()
+
+        for index in list(self.cells):
+            if index not in visible:
+                self.remove_cell(index)
+
+        # Don't decode thumbnails that were scrolled past
+        for index in list(self.pending):
+            if index not in visible and self.pending[index].cancel():
+                del self.pending[index]
+
+        for index in visible:
+            if index not in self.cells:
+                self.create_cell(index)
+
+    def cell_origin(self, index):
+        row, column = divmod(index, self.columns)
+        return column * self.cell_width, row * self.cell_height
+
+    def create_cell(self, index):
+        path = self.paths[index]
+        x, y = self.cell_origin(index)
+
+        items = [
+            self.canvas.create_rectangle(
+                x + 2, y + 2, x + self.cell_width - 2, y + self.cell_height - 2,
+                outline="blue" if index in self.selected else "",
+                width=2, tags=("frame",)
+            ),
+            self.canvas.create_text(
+                x + self.cell_width // 2, y + self.cell_height - CELL_PADDING - LABEL_HEIGHT // 2,
+                text=self.short_name(os.path.basename(path)), width=self.cell_width - 4
+            )
+        ]
+        self.cells[index] = (items, None)
+
+        thumbnail = self.thumbnails.get(path)
+        if thumbnail is not None:
+            self.thumbnails.move_to_end(path)
+            self.draw_thumbnail(index, thumbnail)
+        elif index not in self.pending:
+            self.request_thumbnail(index)
+
+    def remove_cell(self, index):
+        items, _ = self.cells.pop(index)
+        for item in items:
+            self.canvas.delete(item)
+
+    def short_name(self, name, max_length=18):
+        return name if len(name) <= max_length else name[:max_length - 3] + "..."
+
+    def draw_thumbnail(self, index, thumbnail):
+        items, _ = self.cells[index]
+        x, y = self.cell_origin(index)
+        photo = PIL.ImageTk.PhotoImage(thumbnail)
+        items.append(self.canvas.create_image(
+            x + self.cell_width // 2, y + CELL_PADDING + self.thumbnail_size // 2,
+            image=photo, anchor=tk.CENTER
+        ))
+        # Keep a reference, Tk doesn't
+        self.cells[index] = (items, photo)
+
+    def request_thumbnail(self, index):
+        path = self.paths[index]
+        generation = self.generation
+        future = self.executor.submit(load_thumbnail, path, self.thumbnail_size, self.disk_cache)
+        future.add_done_callback(lambda f: self.results.put((generation, index, path, f)))
+        self.pending[index] = future
+
+    def poll_results(self):
+        """Draw the thumbnails finished by the decode threads since the last poll."""
+        try:
+            while True:
+                generation, index, path, future = self.results.get_nowait()
+                if generation != self.generation or future.cancelled():
+                    continue
+                if self.pending.get(index) is future:
+                    del self.pending[index]
+                if future.exception() is not None:
+                    continue
+
+                self.thumbnails[path] = future.result()
+                while len(self.thumbnails) > self.max_cached:
+                    self.thumbnails.popitem(last=False)
+
+                if index in self.cells and self.cells[index][1] is None:
+                    self.draw_thumbnail(index, self.thumbnails[path])
+        except queue.Empty:
+            pass
+
+        self.after(RESULT_POLL_INTERVAL, self.poll_results)
+
+    def on_scrollbar(self, *args):
+        self.canvas.yview(*args)
+        self.refresh()
+
+    def scroll(self, units):
+        self.canvas.yview_scroll(units, "units")
+        self.refresh()
+
+    def on_mousewheel(self, event):
+        self.scroll(-1 if event.delta > 0 else 1)
+
+    def index_at(self, event):
+        x = self.canvas.canvasx(event.x)
+        y = self.canvas.canvasy(event.y)
+        column = int(x // self.cell_width)
+        index = int(y // self.cell_height) * self.columns + column
+        if column >= self.columns or index >= len(self.paths):
+            return None
+        return index
+
+    def on_click(self, event):
+        """Plain click opens an image, Ctrl-click toggles it and Shift-click selects a range."""
+        index = self.index_at(event)
+        if index is None:
+            return
+
+        if event.state & 0x0004 and self.on_selection_changed:
+            self.toggle(index)
+        elif event.state & 0x0001 and self.anchor_index is not None and self.on_selection_changed:
+            low, high = sorted((self.anchor_index, index))
+            self.set_selection(range(low, high + 1))
+        else:
+            self.select(index)
+            if self.on_select:
+                self.on_select(self.paths[index])
+
+        if self.on_selection_changed:
+            self.on_selection_changed(self.selected_paths())
+
+    def select(self, index):
+        """Select a single cell."""
+        self.anchor_index = index
+        self.set_selection([index])
+
+    def toggle(self, index):
+        self.anchor_index = index
+        self.set_selection(self.selected ^ {index})
+
+    def set_selection(self, indices):
+        changed = self.selected.symmetric_difference(indices)
+        self.selected = set(indices)
+        for cell in changed:
+            if cell in self.cells:
+                self.canvas.itemconfig(self.cells[cell][0][0], outline="blue" if cell in self.selected else "")
+
+    def selected_paths(self):
+        return [self.paths[index] for index in sorted(self.selected)]
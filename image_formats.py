@@ -0,0 +1,514 @@
+"""
+Image formats whose dates can be read and written without decoding pixels.
+
+FORMATS is the registry, looked up by file signature (or by extension when
+only the name is known, like while scanning a folder). Every format has:
+
+    find_date_tags(image_path, header)    DateTags with file offsets, {} if the
+                                          file has no dates, None if it can't be parsed
+    patch_dates(f, header, date_values)   writes 'YYYY:MM:DD HH:MM:SS' strings into
+                                          the open file, returns the number of bytes
+                                          written or None if they don't fit
+    rewrite_dates(image_path, date_values) rewrites the file around new dates
+    estimate_dates(image_path, header, date_values)
+                                          bytes patch_dates or rewrite_dates would
+                                          write, without changing the file
+
+header is the start of the file (exif_header.read_header). Dates are
+patched in place whenever the tags already exist with the right size,
+TIFF appends new IFDs otherwise. JPEG gets its EXIF segment rebuilt by
+piexif and PNG gets new eXIf/tEXt chunks, written to a temp copy of the
+file that replaces it once complete. Use write_dates rather than calling
+these directly.
+"""
+import os
+import zlib
+import struct
+from collections import namedtuple
+
+import exif_header
+from file_copy import copy_range
+from exif_header import FileView, find_date_tags, date_tag_writes, IFD0_DATE_TAGS, EXIF_DATE_TAGS, EXIF_IFD_POINTER, ASCII_TYPE
+
+ImageFormat = namedtuple('ImageFormat', ['name', 'signatures', 'extensions', 'standard_extension',
+                                         'find_date_tags', 'patch_dates', 'rewrite_dates', 'estimate_dates'])
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+TIFF_SIGNATURES = (b'II*\x00', b'MM\x00*')
+PNG_CREATION_TIME = b'Creation Time'
+
+LONG_TYPE = 4
+
+
+def set_piexif_dates(exif_dict, date_values):
+    """Put date_values into a piexif dict."""
+    import piexif
+
+    if 'DateTimeOriginal' in date_values:
+        exif_dict['Exif'][piexif.ExifIFD.DateTimeOriginal] = date_values['DateTimeOriginal']
+    if 'DateTimeDigitized' in date_values:
+        exif_dict['Exif'][piexif.ExifIFD.DateTimeDigitized] = date_values['DateTimeDigitized']
+    if 'DateTime' in date_values:
+        exif_dict['0th'][piexif.ImageIFD.DateTime] = date_values['DateTime']
+
+
+def patch_file(f, writes):
+    """Apply (offset, bytes) writes to an open file, returns the number of bytes written."""
+    for offset, raw in writes:
+        f.seek(offset)
+        f.write(raw)
+    return sum(len(raw) for _, raw in writes)
+
+
+def rewrite_file(image_path, edits):
+    """
+    Replace byte ranges of a file by writing a temp copy next to it and moving
+    it over the original, so the file is never half written. The unchanged
+    bytes are copied by the kernel where possible (file_copy.copy_range).
+
+    Args:
+        edits: Sorted, non-overlapping (start, end, bytes) tuples, start == end inserts
+
+    Returns:
+        Size of the new file
+    """
+    # Imported on first use, in-place patches don't need them
+    import shutil
+    import tempfile
+
+    folder, name = os.path.split(os.path.abspath(image_path))
+    fd, temp_path = tempfile.mkstemp(dir=folder, prefix=f".{name}.", suffix='.tmp')
+    try:
+        with open(image_path, 'rb') as source, os.fdopen(fd, 'wb') as destination:
+            position = 0
+            for start, end, data in edits:
+                copy_range(source, destination, position, start)
+                destination.write(data)
+                position = end
+            copy_range(source, destination, position, os.fstat(source.fileno()).st_size)
+            written = destination.tell()
+            destination.flush()
+            os.fsync(destination.fileno())
+        shutil.copymode(image_path, temp_path)
+        os.replace(temp_path, image_path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+    return written
+
+
+# JPEG
+
+def find_jpeg_date_tags(image_path, header):
+    return find_date_tags(header)
+
+
+def patch_jpeg_dates(f, header, date_values):
+    writes = date_tag_writes(find_date_tags(header), date_values)
+    if writes is None:
+        return None
+    return patch_file(f, writes)
+
+
+def estimate_jpeg_dates(image_path, header, date_values):
+    writes = date_tag_writes(find_date_tags(header), date_values)
+    if writes is None:
+        return os.path.getsize(image_path)
+    return sum(len(raw) for _, raw in writes)
+
+
+def jpeg_segments(f):
+    """
+    Yield (marker, offset, length) of the segments of an open JPEG up to the
+    start of the scan, offset being where the marker starts and length
+    covering the marker too. The last one is the SOS marker, with length 0.
+    """
+    f.seek(0)
+    if f.read(2) != b'\xff\xd8':
+        raise ValueError("Not a JPEG file")
+
+    offset = 2
+    while True:
+        f.seek(offset)
+        marker = f.read(2)
+        if len(marker) < 2 or marker[0] != 0xFF:
+            raise ValueError("Invalid JPEG marker")
+        # Fill bytes
+        if marker[1] == 0xFF:
+            offset += 1
+            continue
+        if marker[1] in (0xDA, 0xD9):
+            yield marker[1], offset, 0
+            return
+        length = f.read(2)
+        if len(length) < 2:
+            raise ValueError("JPEG file ends before the scan")
+        length = 2 + struct.unpack('>H', length)[0]
+        yield marker[1], offset, length
+        offset += length
+
+
+def rewrite_jpeg_dates(image_path, date_values):
+    """
+    Rebuild the EXIF segment and rewrite the file around it. Only the
+    segment is held in memory, the rest of the file is copied by rewrite_file.
+    """
+    with open(image_path, 'rb') as f:
+        exif_segment = app0_end = None
+        for marker, offset, length in jpeg_segments(f):
+            if marker == 0xE0 and offset == 2:
+                app0_end = offset + length
+            elif marker == 0xE1 and exif_segment is None:
+                f.seek(offset + 4)
+                if f.read(6) == b'Exif\x00\x00':
+                    f.seek(offset + 4)
+                    exif_segment = (offset, length, f.read(length - 4))
+
+    # Only needed when the dates don't fit the existing tags
+    import piexif
+
+    if exif_segment is not None:
+        exif_dict = piexif.load(exif_segment[2])
+    else:
+        exif_dict = {'0th': {}, 'Exif': {}, 'GPS': {}, 'Interop': {}, '1st': {}, 'thumbnail': None}
+    set_piexif_dates(exif_dict, date_values)
+
+    exif_bytes = piexif.dump(exif_dict)
+    if len(exif_bytes) + 2 > 0xFFFF:
+        raise ValueError("EXIF data is too large for a JPEG segment")
+    segment = b'\xff\xe1' + struct.pack('>H', len(exif_bytes) + 2) + exif_bytes
+
+    # Replace the EXIF segment where it is, a new one goes after SOI and the JFIF APP0
+    if exif_segment is not None:
+        edit = (exif_segment[0], exif_segment[0] + exif_segment[1], segment)
+    else:
+        position = app0_end or 2
+        edit = (position, position, segment)
+    return rewrite_file(image_path, [edit])
+
+
+# PNG
+
+def png_chunks(f):
+    """Yield (type, offset, length) of the chunks of an open PNG, offset being where the chunk starts."""
+    size = os.fstat(f.fileno()).st_size
+    offset = len(PNG_SIGNATURE)
+    while offset + 12 <= size:
+        f.seek(offset)
+        length, chunk_type = struct.unpack('>I4s', f.read(8))
+        yield chunk_type, offset, length
+        if chunk_type == b'IEND':
+            return
+        offset += 12 + length
+
+
+def png_chunk(chunk_type, data):
+    return struct.pack('>I', len(data)) + chunk_type + data + struct.pack('>I', zlib.crc32(chunk_type + data))
+
+
+def png_creation_time(value):
+    """'YYYY:MM:DD HH:MM:SS' as the ISO 8601 text of a Creation Time chunk (always the same length)."""
+    return value.replace(':', '-', 2).replace(' ', 'T').encode('ascii')
+
+
+def find_png_chunks(f):
+    """Locate the end of IHDR, the eXIf chunk and the Creation Time tEXt chunk as (offset, length)."""
+    if f.read(len(PNG_SIGNATURE)) != PNG_SIGNATURE:
+        raise ValueError("Not a PNG file")
+
+    ihdr_end = exif_chunk = text_chunk = None
+    for chunk_type, offset, length in png_chunks(f):
+        if chunk_type == b'IHDR':
+            ihdr_end = offset + 12 + length
+        elif chunk_type == b'eXIf' and exif_chunk is None:
+            exif_chunk = (offset, length)
+        elif chunk_type == b'tEXt' and text_chunk is None:
+            f.seek(offset + 8)
+            if f.read(len(PNG_CREATION_TIME) + 1) == PNG_CREATION_TIME + b'\x00':
+                text_chunk = (offset, length)
+
+    if ihdr_end is None:
+        raise ValueError("PNG file without IHDR chunk")
+    return ihdr_end, exif_chunk, text_chunk
+
+
+def read_chunk_data(f, chunk):
+    offset, length = chunk
+    f.seek(offset + 8)
+    return f.read(length)
+
+
+def find_png_date_tags(image_path, header):
+    try:
+        with open(image_path, 'rb') as f:
+            _, exif_chunk, _ = find_png_chunks(f)
+            if exif_chunk is None:
+                return {}
+            tags = find_date_tags(read_chunk_data(f, exif_chunk), 0)
+    except (struct.error, ValueError):
+        return None
+    if tags is None:
+        return None
+
+    # Offsets in the file rather than in the chunk
+    data_offset = exif_chunk[0] + 8
+    return {field: tag._replace(offset=tag.offset + data_offset) for field, tag in tags.items()}
+
+
+def png_text_data(date_values):
+    """Data of the Creation Time tEXt chunk for date_values, None if DateTimeOriginal isn't set."""
+    if 'DateTimeOriginal' not in date_values:
+        return None
+    return PNG_CREATION_TIME + b'\x00' + png_creation_time(date_values['DateTimeOriginal'])
+
+
+def png_patch_writes(f, date_values):
+    """
+    The (offset, bytes) writes that put date_values into the existing
+    chunks, only their data and CRC change. None if the dates don't fit.
+    """
+    f.seek(0)
+    _, exif_chunk, text_chunk = find_png_chunks(f)
+    text_data = png_text_data(date_values)
+    if exif_chunk is None or (text_data is not None and (text_chunk is None or text_chunk[1] != len(text_data))):
+        return None
+
+    exif_data = bytearray(read_chunk_data(f, exif_chunk))
+    writes = date_tag_writes(find_date_tags(exif_data, 0), date_values)
+    if writes is None:
+        return None
+    for offset, raw in writes:
+        exif_data[offset:offset + len(raw)] = raw
+
+    chunk_writes = [(exif_chunk[0], png_chunk(b'eXIf', bytes(exif_data)))]
+    if text_data is not None:
+        chunk_writes.append((text_chunk[0], png_chunk(b'tEXt', text_data)))
+    return chunk_writes
+
+
+def patch_png_dates(f, header, date_values):
+    """Patch the existing chunks when the dates fit."""
+    writes = png_patch_writes(f, date_values)
+    if writes is None:
+        return None
+    return patch_file(f, writes)
+
+
+def estimate_png_dates(image_path, header, date_values):
+    with open(image_path, 'rb') as f:
+        writes = png_patch_writes(f, date_values)
+        if writes is None:
+            return os.fstat(f.fileno()).st_size
+    return sum(len(raw) for _, raw in writes)
+
+
+def rewrite_png_dates(image_path, date_values):
+    with open(image_path, 'rb') as f:
+        ihdr_end, exif_chunk, text_chunk = find_png_chunks(f)
+        exif_data = read_chunk_data(f, exif_chunk) if exif_chunk else None
+
+    import piexif
+
+    if exif_data:
+        exif_dict = piexif.load(exif_data)
+    else:
+        exif_dict = {'0th': {}, 'Exif': {}, 'GPS': {}, 'Interop': {}, '1st': {}, 'thumbnail': None}
+    set_piexif_dates(exif_dict, date_values)
+    # piexif.dump starts with the 'Exif\0\0' of the JPEG APP1 segment, eXIf holds only the TIFF structure
+    new_chunks = [(exif_chunk, png_chunk(b'eXIf', piexif.dump(exif_dict)[6:]))]
+    text_data = png_text_data(date_values)
+    if text_data is not None:
+        new_chunks.append((text_chunk, png_chunk(b'tEXt', text_data)))
+
+    # Replace the chunks where they are, new ones go right after IHDR (before any IDAT)
+    edits = []
+    for chunk, data in new_chunks:
+        if chunk is None:
+            edits.append((ihdr_end, ihdr_end, data))
+        else:
+            edits.append((chunk[0], chunk[0] + 12 + chunk[1], data))
+    edits.sort(key=lambda edit: edit[:2])
+    return rewrite_file(image_path, edits)
+
+
+# TIFF
+
+def find_tiff_date_tags(image_path, header):
+    with open(image_path, 'rb') as f:
+        return find_date_tags(FileView(f), 0)
+
+
+def read_ifd(view, offset, endian):
+    """Return ({tag: 12 byte entry}, next IFD offset) of the IFD at offset."""
+    entry_count = struct.unpack(endian + 'H', view[offset:offset + 2])[0]
+    data = view[offset + 2:offset + 2 + entry_count * 12 + 4]
+    if len(data) != entry_count * 12 + 4:
+        raise ValueError("IFD outside of the file")
+    entries = {}
+    for i in range(entry_count):
+        entry = data[i * 12:i * 12 + 12]
+        entries[struct.unpack(endian + 'H', entry[:2])[0]] = entry
+    return entries, struct.unpack(endian + 'I', data[-4:])[0]
+
+
+def build_date_ifds(view, endian, ifd0_offset, date_values):
+    """
+    Build copies of IFD0 (and the EXIF IFD) with the dates, to go at the end of the file.
+
+    Returns:
+        (bytes to append, offset of the new IFD0)
+    """
+    end = len(view)
+    appended = bytearray(end % 2)  # IFDs and values start on a word boundary
+
+    def append(data):
+        offset = end + len(appended)
+        appended.extend(data)
+        if len(appended) % 2:
+            appended.append(0)
+        return offset
+
+    def date_entry(tag, value):
+        raw = value.encode('ascii') + b'\x00'
+        return struct.pack(endian + 'HHII', tag, ASCII_TYPE, len(raw), append(raw))
+
+    def ifd_bytes(entries, next_offset):
+        # Entries must be sorted by tag
+        return (struct.pack(endian + 'H', len(entries)) + b''.join(entries[tag] for tag in sorted(entries))
+                + struct.pack(endian + 'I', next_offset))
+
+    ifd0, ifd0_next = read_ifd(view, ifd0_offset, endian)
+
+    exif_values = {tag: date_values[field] for tag, field in EXIF_DATE_TAGS.items() if field in date_values}
+    if exif_values:
+        if EXIF_IFD_POINTER in ifd0:
+            exif_offset = struct.unpack(endian + 'I', ifd0[EXIF_IFD_POINTER][8:12])[0]
+            exif_ifd, exif_next = read_ifd(view, exif_offset, endian)
+        else:
+            exif_ifd, exif_next = {}, 0
+        for tag, value in exif_values.items():
+            exif_ifd[tag] = date_entry(tag, value)
+        ifd0[EXIF_IFD_POINTER] = struct.pack(endian + 'HHII', EXIF_IFD_POINTER, LONG_TYPE, 1,
+                                             append(ifd_bytes(exif_ifd, exif_next)))
+
+    for tag, field in IFD0_DATE_TAGS.items():
+        if field in date_values:
+            ifd0[tag] = date_entry(tag, date_values[field])
+    new_ifd0_offset = append(ifd_bytes(ifd0, ifd0_next))
+    return bytes(appended), new_ifd0_offset
+
+
+def append_date_ifds(f, view, endian, ifd0_offset, date_values):
+    """
+    Write the dates with copies of IFD0 (and the EXIF IFD) at the end of the
+    file, then point the header at the new IFD0. Everything else keeps its
+    offset, the old IFDs are left unused.
+
+    Returns:
+        Number of bytes written
+    """
+    appended, new_ifd0_offset = build_date_ifds(view, endian, ifd0_offset, date_values)
+
+    # The new IFDs are complete before the header points at them
+    f.seek(len(view))
+    f.write(appended)
+    f.flush()
+    os.fsync(f.fileno())
+    f.seek(4)
+    f.write(struct.pack(endian + 'I', new_ifd0_offset))
+    return len(appended) + 4
+
+
+def patch_tiff_dates(f, header, date_values):
+    """Patch the tags in place if they fit, append new IFDs otherwise."""
+    view = FileView(f)
+    endian = '<' if header[:2] == b'II' else '>'
+
+    tags = find_date_tags(view, 0)
+    if tags is None:
+        raise ValueError("Can't parse the date tags of the TIFF file")
+    writes = date_tag_writes(tags, date_values)
+    if writes is not None:
+        return patch_file(f, writes)
+    return append_date_ifds(f, view, endian, struct.unpack(endian + 'I', header[4:8])[0], date_values)
+
+
+def estimate_tiff_dates(image_path, header, date_values):
+    with open(image_path, 'rb') as f:
+        view = FileView(f)
+        tags = find_date_tags(view, 0)
+        if tags is None:
+            raise ValueError("Can't parse the date tags of the TIFF file")
+        writes = date_tag_writes(tags, date_values)
+        if writes is not None:
+            return sum(len(raw) for _, raw in writes)
+        endian = '<' if header[:2] == b'II' else '>'
+        appended, _ = build_date_ifds(view, endian, struct.unpack(endian + 'I', header[4:8])[0], date_values)
+    return len(appended) + 4
+
+
+def rewrite_tiff_dates(image_path, date_values):
+    raise ValueError("TIFF dates are always patched in place")
+
+
+# Registry of the supported formats, looked up by file signature
+FORMATS = (
+    ImageFormat('jpeg', (b'\xff\xd8',), ('.jpg', '.jpeg'), '.JPG',
+                find_jpeg_date_tags, patch_jpeg_dates, rewrite_jpeg_dates, estimate_jpeg_dates),
+    ImageFormat('png', (PNG_SIGNATURE,), ('.png',), '.PNG',
+                find_png_date_tags, patch_png_dates, rewrite_png_dates, estimate_png_dates),
+    ImageFormat('tiff', TIFF_SIGNATURES, ('.tif', '.tiff'), '.TIF',
+                find_tiff_date_tags, patch_tiff_dates, rewrite_tiff_dates, estimate_tiff_dates),
+)
+
+IMAGE_EXTENSIONS = tuple(extension for image_format in FORMATS for extension in image_format.extensions)
+
+
+def format_for_signature(data):
+    """The format of a file starting with data, None if it isn't supported."""
+    for image_format in FORMATS:
+        if data.startswith(image_format.signatures):
+            return image_format
+    return None
+
+
+def write_dates(image_path, date_values):
+    """
+    Write EXIF date strings to an image with the writer of its format.
+
+    The file is opened once to tell its format and patch it, only dates
+    that don't fit are written by rewriting the file.
+
+    Returns:
+        Number of bytes written
+    """
+    with open(image_path, 'r+b') as f:
+        header = f.read(exif_header.MAX_HEADER_BYTES)
+        image_format = format_for_signature(header)
+        if image_format is None:
+            raise ValueError(f"Unsupported image format: {os.path.basename(image_path)}")
+        written = image_format.patch_dates(f, header, date_values)
+    if written is None:
+        written = image_format.rewrite_dates(image_path, date_values)
+    return written
+
+
+def estimate_write(image_path, date_values):
+    """Bytes write_dates would write for date_values, the file isn't changed."""
+    header = exif_header.read_header(image_path)
+    image_format = format_for_signature(header)
+    if image_format is None:
+        raise ValueError(f"Unsupported image format: {os.path.basename(image_path)}")
+    return image_format.estimate_dates(image_path, header, date_values)
+
+
+def format_for_name(filename):
+    """The format a file name's extension stands for, None if it isn't supported."""
+    lower_name = filename.lower()
+    for image_format in FORMATS:
+        if lower_name.endswith(image_format.extensions):
+            return image_format
+    return None
@@ -1,47 +1,78 @@
 import os
-import re
+import sys
+import json
 import time
+import struct
 import random
 import datetime
 import logging
+import sqlite3
 import threading
-import piexif
-import exifread
 from datetime import datetime, timedelta
-import PIL.Image
+
+from folder_walker import FolderWalker
+from folder_scan import scan_folder
+import exif_header
+from image_formats import format_for_signature, format_for_name, write_dates, estimate_write
+from rename_planner import plan_renames, RenamePlan
+from manifest import FolderManifest, fingerprint_folder, DEFAULT_MANIFEST_PATH
+from execution_plan import FolderPlan, MetadataWrite, PlanWriter, read_plans, DEFAULT_PLAN_PATH
+from journal import Journal, read_journals, release_journals, DEFAULT_JOURNAL_DIR
+from processor_logging import configure_logging, LOGGER_NAME, DEFAULT_LOG_PATH
+from metrics import RunStats
+from batch_edit import BatchEditResult, resolve_changes, has_shifts
+from dedupe import find_duplicates, move_duplicate, DEFAULT_DUPLICATE_FOLDER
+from metadata_cache import MetadataCache, CACHED_FIELDS, DEFAULT_METADATA_CACHE_PATH
+from profiling import Profiler, profile_dir_from_env, DEFAULT_PROFILE_DIR, PROFILE_ENV_VAR
 
 class ImageProcessor:
-    def __init__(self, root_path, target_folder_name, log_callback=None):
+    def __init__(self, root_path, target_folder_name, log_callback=None, workers=1, log_to_file=True,
+                 ignore_patterns=None, walker_threads=8, incremental=False, manifest_path=DEFAULT_MANIFEST_PATH,
+                 dry_run=False, plan_path=DEFAULT_PLAN_PATH, journal_dir=DEFAULT_JOURNAL_DIR,
+                 log_path=DEFAULT_LOG_PATH, log_format='text', stats_callback=None, io_threads=1, profile_dir=None,
+                 dedupe=None, duplicate_folder=DEFAULT_DUPLICATE_FOLDER,
+                 metadata_cache_path=DEFAULT_METADATA_CACHE_PATH):
         self.root_path = root_path
         self.target_folder_name = target_folder_name
         self.log_callback = log_callback
+        self.workers = max(1, int(workers or 1))
+        self.ignore_patterns = list(ignore_patterns or [])
+        self.walker_threads = walker_threads
+        self.io_threads = max(1, int(io_threads or 1))
+        # None keeps duplicate images, 'skip' leaves them out of the sequence, 'move' also moves them away
+        self.dedupe = dedupe
+        self.duplicate_folder = duplicate_folder
+        self.incremental = incremental
+        self.manifest_path = manifest_path
+        self.manifest = None
+        # None keeps the metadata cache in memory only
+        self.metadata_cache_path = metadata_cache_path
+        self.metadata_cache = None
+        self.metadata_cache_lock = threading.Lock()
+        self.dry_run = dry_run
+        self.plan_path = plan_path
+        self.journal_dir = journal_dir
+        self.journal = None
+        self.log_to_file = log_to_file
+        self.log_path = log_path
+        self.log_format = log_format
         self.setup_logging()
         self.stop_requested = False
+        self.executor = None
+        self.folder_results = {}
+        # Failed operations per folder (absolute path), such folders aren't recorded in the manifest
+        self.folder_errors = {}
+        self.folder_errors_lock = threading.Lock()
+        self.stats = RunStats(stats_callback)
+        self.profiler = Profiler(profile_dir or profile_dir_from_env())
 
     def setup_logging(self):
-        self.logger = logging.getLogger('ImageProcessor')
-        self.logger.setLevel(logging.INFO)
-        formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
-        
-        # File handler
-        file_handler = logging.FileHandler('image_processor.log')
-        file_handler.setFormatter(formatter)
-        self.logger.addHandler(file_handler)
-        
-        # Custom handler for GUI logs
-        if self.log_callback:
-            class GUIHandler(logging.Handler):
-                def __init__(self, callback):
-                    super().__init__()
-                    self.callback = callback
-                
-                def emit(self, record):
-                    log_entry = self.format(record)
-                    self.callback(log_entry)
-            
-            gui_handler = GUIHandler(self.log_callback)
-            gui_handler.setFormatter(formatter)
-            self.logger.addHandler(gui_handler)
+        # Worker processes collect their records for the parent instead
+        if self.log_to_file:
+            self.logger = configure_logging(self.log_callback, self.log_path, self.log_format)
+        else:
+            self.logger = logging.getLogger(LOGGER_NAME)
+            self.logger.setLevel(logging.INFO)
 
     def log(self, message, level=logging.INFO):
         if level == logging.INFO:
@@ -55,62 +86,111 @@ class ImageProcessor:
 
     def find_target_folders(self):
         """Find all folders with the target name."""
-        target_folders = []
         self.log(f"Starting search for folders named '{self.target_folder_name}' in {self.root_path}")
         
-        for root, dirs, _ in os.walk(self.root_path):
-            if self.stop_requested:
-                break
-                
-            for dir_name in dirs:
-                if dir_name == self.target_folder_name:
-                    full_path = os.path.join(root, dir_name)
-                    target_folders.append(full_path)
-                    self.log(f"Found target folder: {full_path}")
+        walker = FolderWalker(
+            self.target_folder_name,
+            ignore_patterns=self.ignore_patterns,
+            threads=self.walker_threads,
+            stop_check=lambda: self.stop_requested,
+            on_error=lambda e: self.log(f"Could not scan directory: {str(e)}", logging.WARNING)
+        )
+        with self.stats.stage('discovery'):
+            target_folders = walker.walk(self.root_path)
+        
+        for full_path in target_folders:
+            self.log(f"Found target folder: {full_path}")
         
         self.log(f"Found {len(target_folders)} target folders")
         return target_folders
     
-    def extract_code_from_filename(self, filename):
-        """Extract the numeric code from IMG_XXXX.JPG format."""
-        match = re.match(r'IMG_(\d+)\.JPG', filename, re.IGNORECASE)
-        if match:
-            return int(match.group(1))
-        return None
+    def get_image_files(self, folder_path):
+        """Get all image files from a folder, identifying IMG_XXXX.JPG (.PNG, .TIF) and other images."""
+        scan = self.scan_folder(folder_path)
+        return scan.standard_images, scan.other_images
+    
+    def scan_folder(self, folder_path):
+        """
+        Scan a folder in one os.scandir pass.
+        
+        Returns a FolderScan with the IMG_XXXX.JPG (.PNG, .TIF) files sorted by
+        code, the other images sorted by name and the size/mtime of each of them.
+        """
+        with self.profiler.section('scan_folder'), self.stats.stage('listing'):
+            return scan_folder(folder_path, stop_check=lambda: self.stop_requested)
     
-    def is_jpg_file(self, filename):
-        """Check if the file is a JPG image."""
-        return filename.lower().endswith(('.jpg', '.jpeg'))
+    def open_metadata_cache(self):
+        """Return the metadata cache, opened on first use."""
+        with self.metadata_cache_lock:
+            if self.metadata_cache is None:
+                try:
+                    self.metadata_cache = MetadataCache(self.metadata_cache_path)
+                except (OSError, sqlite3.Error) as e:
+                    self.log(f"Can't open metadata cache {self.metadata_cache_path}, keeping it in memory: {str(e)}",
+                             logging.WARNING)
+                    self.metadata_cache = MetadataCache(None)
+            return self.metadata_cache
     
-    def get_image_files(self, folder_path):
-        """Get all JPG files from a folder, identifying IMG_XXXX.JPG and other JPGs."""
-        standard_images = []  # IMG_XXXX.JPG format
-        other_images = []     # Other JPG files
+    def close_metadata_cache(self):
+        with self.metadata_cache_lock:
+            if self.metadata_cache is not None:
+                cache = self.metadata_cache
+                if cache.hits or cache.misses:
+                    self.log(f"Metadata cache: {cache.hits} hits, {cache.misses} misses")
+                cache.close()
+                self.metadata_cache = None
+    
+    def read_exif_dates(self, image_path):
+        """
+        Read the raw EXIF date strings of an image.
         
-        for filename in os.listdir(folder_path):
-            if self.stop_requested:
-                break
-                
-            if re.match(r'IMG_\d+\.JPG', filename, re.IGNORECASE):
-                code = self.extract_code_from_filename(filename)
-                if code is not None:
-                    standard_images.append((code, filename))
-            elif self.is_jpg_file(filename):
-                other_images.append(filename)
+        Files parsed before (by any run or the GUI) and not changed since are
+        answered from the metadata cache. Returns a dict with
+        DateTimeOriginal, DateTimeDigitized and DateTime (None if absent).
+        """
+        cache = self.open_metadata_cache()
+        stat = os.stat(image_path)
+        dates = cache.get(image_path, stat)
+        if dates is None:
+            dates = self.parse_exif_dates(image_path)
+            cache.put(image_path, dates, stat)
+        return dates
+    
+    def parse_exif_dates(self, image_path):
+        """
+        Parse the raw EXIF date strings of an image.
         
-        # Sort standard images by the numeric code
-        standard_images.sort(key=lambda x: x[0])
-        return standard_images, other_images
+        Uses the header-only reader of the file's format and falls back to
+        exifread for files it doesn't understand. Returns a dict with
+        DateTimeOriginal, DateTimeDigitized and DateTime (None if absent).
+        """
+        with self.profiler.section('exif_read'), self.stats.stage('exif_read') as io:
+            data = exif_header.read_header(image_path)
+            io['bytes_read'] = len(data)
+            image_format = format_for_signature(data)
+            dates = None
+            if image_format is not None:
+                dates = exif_header.dates_from_tags(image_format.find_date_tags(image_path, data))
+            if dates is not None:
+                return dates._asdict()
+            
+            # Only files the header reader doesn't understand get here
+            import exifread
+            
+            with open(image_path, 'rb') as f:
+                tags = exifread.process_file(f, details=False)
+                io['bytes_read'] += f.tell()
+        
+        return {
+            'DateTimeOriginal': str(tags['EXIF DateTimeOriginal']) if 'EXIF DateTimeOriginal' in tags else None,
+            'DateTimeDigitized': str(tags['EXIF DateTimeDigitized']) if 'EXIF DateTimeDigitized' in tags else None,
+            'DateTime': str(tags['Image DateTime']) if 'Image DateTime' in tags else None
+        }
     
     def get_exif_creation_date(self, image_path):
         """Extract the creation date from EXIF data."""
         try:
-            with open(image_path, 'rb') as f:
-                tags = exifread.process_file(f)
-                if 'EXIF DateTimeOriginal' in tags:
-                    date_str = str(tags['EXIF DateTimeOriginal'])
-                    return datetime.strptime(date_str, '%Y:%m:%d %H:%M:%S')
-            return None
+            return exif_header.parse_exif_datetime(self.read_exif_dates(image_path)['DateTimeOriginal'])
         except Exception as e:
             self.log(f"Error reading EXIF date from {image_path}: {str(e)}", logging.ERROR)
             return None
@@ -126,14 +206,7 @@ class ImageProcessor:
         
         try:
             # Get EXIF dates
-            with open(image_path, 'rb') as f:
-                tags = exifread.process_file(f)
-                if 'EXIF DateTimeOriginal' in tags:
-                    date_info['DateTimeOriginal'] = str(tags['EXIF DateTimeOriginal'])
-                if 'EXIF DateTimeDigitized' in tags:
-                    date_info['DateTimeDigitized'] = str(tags['EXIF DateTimeDigitized'])
-                if 'Image DateTime' in tags:
-                    date_info['DateTime'] = str(tags['Image DateTime'])
+            date_info.update(self.read_exif_dates(image_path))
             
             # Get file modification time
             mod_time = os.path.getmtime(image_path)
@@ -146,34 +219,51 @@ class ImageProcessor:
     
     def parse_datetime_str(self, datetime_str):
         """Parse datetime string in format 'YYYY:MM:DD HH:MM:SS'."""
-        try:
-            return datetime.strptime(datetime_str, '%Y:%m:%d %H:%M:%S')
-        except:
-            return None
+        return exif_header.parse_exif_datetime(datetime_str)
+    
+    def write_exif_dates(self, image_path, date_values):
+        """
+        Write EXIF date strings to an image, with the writer of its format.
+        
+        The existing tag values are patched in place when all of them exist,
+        otherwise the EXIF block is rebuilt without decoding the pixels.
+        
+        Args:
+            image_path: Path to the image file
+            date_values: Dictionary mapping DateTimeOriginal, DateTimeDigitized
+                         and/or DateTime to 'YYYY:MM:DD HH:MM:SS' strings
+        
+        Returns:
+            Number of bytes written
+        """
+        return write_dates(image_path, date_values)
     
     def set_image_metadata(self, image_path, new_date):
         """Set all date metadata for the image."""
+        with self.profiler.section('set_image_metadata'):
+            return self.write_image_dates(image_path, new_date)
+    
+    def write_image_dates(self, image_path, new_date):
+        """Write new_date to the three EXIF dates and the file times."""
         try:
             # Format the date string for EXIF
             date_str = new_date.strftime("%Y:%m:%d %H:%M:%S")
             
-            # Set EXIF dates with piexif
+            # Set EXIF dates
             try:
-                exif_dict = piexif.load(image_path)
-                
-                # Set DateTimeOriginal, CreateDate, ModifyDate
-                exif_dict['Exif'][piexif.ExifIFD.DateTimeOriginal] = date_str
-                exif_dict['Exif'][piexif.ExifIFD.DateTimeDigitized] = date_str
-                exif_dict['0th'][piexif.ImageIFD.DateTime] = date_str
-                
-                # Save the EXIF data back to the file
-                exif_bytes = piexif.dump(exif_dict)
-                piexif.insert(exif_bytes, image_path)
-                
-                # Set file modification and creation times
-                timestamp = time.mktime(new_date.timetuple())
-                os.utime(image_path, (timestamp, timestamp))
+                with self.stats.stage('exif_write') as io:
+                    # Set DateTimeOriginal, CreateDate, ModifyDate
+                    io['bytes_written'] = self.write_exif_dates(image_path, {
+                        'DateTimeOriginal': date_str,
+                        'DateTimeDigitized': date_str,
+                        'DateTime': date_str
+                    })
+                    
+                    # Set file modification and creation times
+                    timestamp = time.mktime(new_date.timetuple())
+                    os.utime(image_path, (timestamp, timestamp))
                 
+                self.open_metadata_cache().put(image_path, dict.fromkeys(CACHED_FIELDS, date_str))
                 return True
             except Exception as e:
                 self.log(f"Error setting EXIF metadata: {str(e)}", logging.ERROR)
@@ -193,28 +283,19 @@ class ImageProcessor:
                              'DateTime', 'FileModificationTime' and datetime values
         """
         try:
-            # Set EXIF dates with piexif if any are specified
-            if any(k in metadata_changes for k in ['DateTimeOriginal', 'DateTimeDigitized', 'DateTime']):
+            # The dates that aren't changed, to keep the cache entry complete
+            cache = self.open_metadata_cache()
+            cached_dates = cache.get(image_path)
+            
+            # Set individual EXIF fields if specified
+            date_values = {}
+            for field in ['DateTimeOriginal', 'DateTimeDigitized', 'DateTime']:
+                if field in metadata_changes and metadata_changes[field]:
+                    date_values[field] = metadata_changes[field].strftime("%Y:%m:%d %H:%M:%S")
+            
+            if date_values:
                 try:
-                    exif_dict = piexif.load(image_path)
-                    
-                    # Set individual EXIF fields if specified
-                    if 'DateTimeOriginal' in metadata_changes and metadata_changes['DateTimeOriginal']:
-                        date_str = metadata_changes['DateTimeOriginal'].strftime("%Y:%m:%d %H:%M:%S")
-                        exif_dict['Exif'][piexif.ExifIFD.DateTimeOriginal] = date_str
-                    
-                    if 'DateTimeDigitized' in metadata_changes and metadata_changes['DateTimeDigitized']:
-                        date_str = metadata_changes['DateTimeDigitized'].strftime("%Y:%m:%d %H:%M:%S")
-                        exif_dict['Exif'][piexif.ExifIFD.DateTimeDigitized] = date_str
-                    
-                    if 'DateTime' in metadata_changes and metadata_changes['DateTime']:
-                        date_str = metadata_changes['DateTime'].strftime("%Y:%m:%d %H:%M:%S")
-                        exif_dict['0th'][piexif.ImageIFD.DateTime] = date_str
-                    
-                    # Save the EXIF data back to the file
-                    exif_bytes = piexif.dump(exif_dict)
-                    piexif.insert(exif_bytes, image_path)
-                    
+                    self.write_exif_dates(image_path, date_values)
                 except Exception as e:
                     self.log(f"Error setting EXIF metadata: {str(e)}", logging.ERROR)
                     return False, f"Error setting EXIF metadata: {str(e)}"
@@ -224,6 +305,9 @@ class ImageProcessor:
                 timestamp = time.mktime(metadata_changes['FileModificationTime'].timetuple())
                 os.utime(image_path, (timestamp, timestamp))
             
+            if cached_dates is not None or len(date_values) == len(CACHED_FIELDS):
+                cache.put(image_path, {**(cached_dates or {}), **date_values})
+            
             return True, "Successfully updated image metadata"
                 
         except Exception as e:
@@ -231,18 +315,47 @@ class ImageProcessor:
             return False, f"Error: {str(e)}"
     
     def process_folder(self, folder_path):
-        """Process a single target folder."""
+        """Process a single target folder. Returns the number of images processed."""
         self.log(f"Processing folder: {folder_path}")
         
-        # Get all image files, separating standard IMG_XXXX.JPG and other JPGs
-        standard_images, other_images = self.get_image_files(folder_path)
+        with self.profiler.section('process_folder'):
+            folder_plan = self.plan_folder(folder_path)
+            if folder_plan is None:
+                return 0
+            
+            return self.execute_folder_plan(folder_plan)
+    
+    def plan_folder(self, folder_path):
+        """
+        Work out the renames and metadata writes for a folder without touching it.
+        
+        Returns:
+            FolderPlan, or None if the folder has no image files
+        """
+        # Get all image files, separating standard IMG_XXXX.JPG and other images
+        scan = self.scan_folder(folder_path)
+        standard_images, other_images = scan.standard_images, scan.other_images
+        
+        duplicates = []
+        if self.dedupe:
+            duplicates = self.find_folder_duplicates(folder_path, scan)
+            duplicate_names = {duplicate.name for duplicate in duplicates}
+            standard_images = [image for image in standard_images if image[1] not in duplicate_names]
+            other_images = [name for name in other_images if name not in duplicate_names]
         
         total_images = len(standard_images) + len(other_images)
         if total_images == 0:
-            self.log(f"No JPG files found in {folder_path}")
-            return
+            self.log(f"No image files found in {folder_path}")
+            return None
         
-        self.log(f"Found {len(standard_images)} IMG_XXXX.JPG files and {len(other_images)} other JPG files")
+        self.log(f"Found {len(standard_images)} IMG_XXXX files and {len(other_images)} other image files")
+        
+        for code, names in scan.duplicate_codes().items():
+            self.log(f"Code {code} is used by several files: {', '.join(names)}", logging.WARNING)
+        gaps = scan.gaps()
+        if gaps:
+            self.log(f"{len(gaps)} gaps in the IMG_XXXX codes, "
+                     f"e.g. {', '.join(f'{first}-{last}' if first != last else str(first) for first, last in gaps[:5])}")
         
         # Determine the starting code for renaming
         if standard_images:
@@ -258,7 +371,7 @@ class ImageProcessor:
             self.log(f"No IMG_XXXX.JPG files found, using random starting code: {lowest_code}")
             base_date = None
             
-            # Try to get a base date from the first other JPG
+            # Try to get a base date from the first other image
             if other_images:
                 first_other_file = os.path.join(folder_path, other_images[0])
                 base_date = self.get_exif_creation_date(first_other_file)
@@ -269,113 +382,665 @@ class ImageProcessor:
         
         self.log(f"Base date for metadata: {base_date}")
         
-        # First, rename all files to temporary names to avoid conflicts
-        temp_mappings = {}
+        # Calculate all the dates first, making sure they are strictly ascending
+        date_increments = []
+        current_date = base_date
+        
+        for i in range(total_images):
+            seconds_to_add = random.randint(30, 60)
+            date_increments.append(current_date)
+            current_date = current_date + timedelta(seconds=seconds_to_add)
+        
+        # Skipped duplicates stay where they are, their names can't be targets
+        occupied = set()
+        if self.dedupe == 'skip':
+            occupied = {duplicate.name.lower() for duplicate in duplicates}
+        
+        # Standard images keep their order, other images follow them, each keeps its format
+        original_filenames = [filename for _, filename in standard_images] + other_images
+        targets = []
+        code = lowest_code
+        for filename in original_filenames:
+            target = f"IMG_{code:04d}{format_for_name(filename).standard_extension}"
+            while target.lower() in occupied:
+                self.log(f"Skipping {target}, it is a duplicate that stays in the folder")
+                code += 1
+                target = f"IMG_{code:04d}{format_for_name(filename).standard_extension}"
+            targets.append((filename, target))
+            code += 1
+        
+        # Only rename files that don't have their final name yet
+        rename_plan = plan_renames(targets)
+        self.log(f"Rename plan: {rename_plan.rename_count} renames, {len(rename_plan.unchanged)} files already named correctly")
+        
+        writes = [
+            MetadataWrite(new_filename, original_filename, date_increments[i])
+            for i, (original_filename, new_filename) in enumerate(targets)
+        ]
+        # Plans are stored and executed later, possibly from another working directory
+        return FolderPlan(os.path.abspath(folder_path), rename_plan, writes, duplicates=duplicates,
+                          duplicate_folder=self.duplicate_folder if self.dedupe == 'move' else None)
+    
+    def find_folder_duplicates(self, folder_path, scan):
+        """Find the images of a folder that are copies of an image earlier in the sequence."""
+        report = find_duplicates(folder_path, scan.names, scan.stat_of)
+        for duplicate in report.duplicates:
+            self.log(f"Duplicate image: {duplicate.name} is a copy of {duplicate.original}")
+        self.log(f"Duplicate check: {len(report)} duplicates, hashed {report.files_hashed} files "
+                 f"({report.bytes_hashed / 1024 / 1024:.1f} MB)")
+        return report.duplicates
+    
+    def move_duplicates(self, folder_plan):
+        """
+        Move the duplicates of a plan into its duplicate folder, if it has one.
+        
+        Returns False if a duplicate couldn't be moved. The plan may rename a
+        file onto its name, so the folder must then be left alone.
+        """
+        if not folder_plan.duplicate_folder:
+            return True
+        moved_all = True
+        for duplicate in folder_plan.duplicates:
+            # Already moved, e.g. when recovering
+            if not os.path.exists(os.path.join(folder_plan.folder, duplicate.name)):
+                continue
+            try:
+                destination = move_duplicate(folder_plan.folder, duplicate.name, folder_plan.duplicate_folder)
+                self.log(f"Moved duplicate {duplicate.name} to {destination}")
+            except OSError as e:
+                self.log(f"Error moving duplicate {duplicate.name}: {str(e)}", logging.ERROR)
+                self.folder_error(folder_plan.folder)
+                moved_all = False
+        return moved_all
+    
+    def estimate_plan_cost(self, folder_plan):
+        """
+        Estimate how many bytes executing a plan writes to disk.
+        
+        Each file is asked what its format's writer would do: dates patched
+        in place cost a few bytes, TIFF files that need new IFDs the size of
+        those, and rewritten files their whole size. Files the writers can't
+        handle are counted at their whole size too.
+        """
+        estimated_bytes = 0
+        for write in folder_plan.writes:
+            image_path = os.path.join(folder_plan.folder, write.original_name)
+            date_str = write.date.strftime('%Y:%m:%d %H:%M:%S')
+            try:
+                estimated_bytes += estimate_write(image_path, dict.fromkeys(CACHED_FIELDS, date_str))
+            except (ValueError, struct.error):
+                try:
+                    estimated_bytes += os.path.getsize(image_path)
+                except OSError:
+                    pass
+            except OSError:
+                continue
+        
+        folder_plan.estimated_bytes = estimated_bytes
+        return estimated_bytes
+    
+    def execute_folder_plan(self, folder_plan):
+        """Apply a FolderPlan. Returns the number of images processed."""
+        if self.io_threads > 1:
+            return self.execute_folder_plan_pipelined(folder_plan)
+        
+        folder_path = folder_plan.folder
         
-        # Handle standard images first
-        for code, filename in standard_images:
+        # The journal must only list names that are free once the duplicates are gone,
+        # or recovery would take a duplicate for a finished rename
+        if not self.move_duplicates(folder_plan):
+            self.log(f"Skipping {folder_path}, not all duplicates could be moved", logging.ERROR)
+            return 0
+        if self.journal is not None:
+            self.journal.begin(folder_plan)
+        
+        placed = set(folder_plan.rename_plan.unchanged)
+        for sequence in folder_plan.rename_plan.sequences:
             if self.stop_requested:
                 break
-                
-            original_path = os.path.join(folder_path, filename)
-            temp_filename = f"TEMP_STD_{code}.JPG"
-            temp_path = os.path.join(folder_path, temp_filename)
-            
-            try:
-                os.rename(original_path, temp_path)
-                temp_mappings[filename] = temp_filename
-                self.log(f"Renamed {filename} to {temp_filename}")
-            except Exception as e:
-                self.log(f"Error renaming {filename} to temporary name: {str(e)}", logging.ERROR)
+            placed.update(self.run_rename_sequence(folder_path, sequence))
         
-        # Now handle other JPG files
-        for i, filename in enumerate(other_images):
+        # Now update the metadata in sequence order
+        processed_count = 0
+        for write in folder_plan.writes:
             if self.stop_requested:
                 break
-                
-            original_path = os.path.join(folder_path, filename)
-            temp_filename = f"TEMP_OTHER_{i}.JPG"
-            temp_path = os.path.join(folder_path, temp_filename)
+            if write.name not in placed:
+                continue
             
+            processed_count += 1
+            self.write_planned_metadata(folder_path, write)
+        
+        # Stopping only happens between rename sequences, so the folder is consistent here
+        if self.journal is not None:
+            self.journal.commit(folder_path)
+        
+        return processed_count
+    
+    def execute_folder_plan_pipelined(self, folder_plan):
+        """
+        Apply a FolderPlan with renames and metadata writes overlapping on io_threads threads.
+        
+        Rename sequences touch disjoint sets of names, so they can run side by
+        side, each one strictly in order. A file's metadata is written as soon
+        as it has its final name, while other files are still being renamed.
+        At most io_threads * 2 tasks are queued, later sequences are only
+        started when the writes ready so far have been handed out. The names
+        and dates are the ones of the plan, only the order of the work
+        changes. Returns the number of images processed.
+        """
+        import queue
+        import collections
+        import concurrent.futures
+        
+        folder_path = folder_plan.folder
+        
+        # The journal must only list names that are free once the duplicates are gone,
+        # or recovery would take a duplicate for a finished rename
+        if not self.move_duplicates(folder_plan):
+            self.log(f"Skipping {folder_path}, not all duplicates could be moved", logging.ERROR)
+            return 0
+        if self.journal is not None:
+            self.journal.begin(folder_plan)
+        
+        writes_by_name = {write.name: write for write in folder_plan.writes}
+        ready_writes = collections.deque(
+            write for write in folder_plan.writes if write.name in folder_plan.rename_plan.unchanged
+        )
+        sequences = iter(folder_plan.rename_plan.sequences)
+        sequences_left = True
+        events = queue.SimpleQueue()
+        max_in_flight = self.io_threads * 2
+        in_flight = 0
+        processed_count = 0
+        
+        def rename_task(sequence):
+            try:
+                self.run_rename_sequence(folder_path, sequence, on_placed=lambda name: events.put(('placed', name)))
+            finally:
+                events.put(('done', None))
+        
+        def write_task(write):
             try:
-                os.rename(original_path, temp_path)
-                temp_mappings[filename] = temp_filename
-                self.log(f"Renamed {filename} to {temp_filename}")
+                self.write_planned_metadata(folder_path, write)
+            finally:
+                events.put(('done', None))
+        
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.io_threads) as executor:
+            while True:
+                # Writes go first so the ready queue doesn't grow while renames run ahead
+                while in_flight < max_in_flight and not self.stop_requested:
+                    if ready_writes:
+                        processed_count += 1
+                        executor.submit(write_task, ready_writes.popleft())
+                    elif sequences_left:
+                        sequence = next(sequences, None)
+                        if sequence is None:
+                            sequences_left = False
+                            continue
+                        executor.submit(rename_task, sequence)
+                    else:
+                        break
+                    in_flight += 1
+                
+                if in_flight == 0:
+                    break
+                
+                kind, name = events.get()
+                if kind == 'done':
+                    in_flight -= 1
+                elif name in writes_by_name:
+                    ready_writes.append(writes_by_name[name])
+        
+        # Every started sequence ran to its end, so the folder is consistent here
+        if self.journal is not None:
+            self.journal.commit(folder_path)
+        
+        return processed_count
+    
+    def run_rename_sequence(self, folder_path, sequence, on_placed=None):
+        """Run the steps of one rename sequence in order. Returns the names that were placed."""
+        placed = []
+        # The first step of a cycle moves a file to a temp name, see recover_folder
+        is_cycle = len(sequence) > 1 and sequence[0].destination == sequence[-1].source
+        for step in sequence:
+            try:
+                source_path = os.path.join(folder_path, step.source)
+                destination_path = os.path.join(folder_path, step.destination)
+                # The plan only renames onto free names, never replace a file it doesn't know
+                # (the same file on a case-insensitive filesystem is fine)
+                if os.path.lexists(destination_path) and not os.path.samefile(source_path, destination_path):
+                    raise FileExistsError(f"{step.destination} already exists")
+                with self.stats.stage('rename'):
+                    os.rename(source_path, destination_path)
+                placed.append(step.destination)
+                if self.journal is not None:
+                    self.journal.renamed(folder_path, step, sync=is_cycle and step is sequence[0])
+                self.log(f"Renamed {step.source} to {step.destination}")
+                if on_placed:
+                    on_placed(step.destination)
             except Exception as e:
-                self.log(f"Error renaming {filename} to temporary name: {str(e)}", logging.ERROR)
+                # The next step would overwrite a file that was not moved away
+                self.log(f"Error renaming {step.source} to {step.destination}: {str(e)}", logging.ERROR)
+                self.folder_error(folder_path)
+                break
+        return placed
+    
+    def write_planned_metadata(self, folder_path, write):
+        """Write the planned date of one renamed image."""
+        new_filename, original_filename, new_date = write
+        new_path = os.path.join(folder_path, new_filename)
         
-        # Calculate all the dates first, making sure they are strictly ascending
-        date_increments = []
-        current_date = base_date
+        try:
+            self.stats.image_done()
+            if self.set_image_metadata(new_path, new_date):
+                if self.journal is not None:
+                    self.journal.metadata_written(folder_path, new_filename)
+                self.log(f"Updated metadata for {new_filename} (originally {original_filename}) to {new_date}")
+            else:
+                self.log(f"Failed to update metadata for {new_filename}", logging.WARNING)
+                self.folder_error(folder_path)
+        except Exception as e:
+            self.log(f"Error processing {new_filename}: {str(e)}", logging.ERROR)
+            self.folder_error(folder_path)
+    
+    def folder_error(self, folder_path):
+        """Count a failed operation in a folder."""
+        folder_path = os.path.abspath(folder_path)
+        with self.folder_errors_lock:
+            self.folder_errors[folder_path] = self.folder_errors.get(folder_path, 0) + 1
+    
+    def open_journal(self):
+        if self.journal_dir and self.journal is None:
+            self.journal = Journal(self.journal_dir)
+    
+    def close_journal(self):
+        if self.journal is not None:
+            self.journal.close()
+            self.journal = None
+    
+    def recover_journal(self):
+        """
+        Finish or undo the folders a crashed run left half-processed.
         
-        for i in range(total_images):
-            seconds_to_add = random.randint(30, 60)
-            date_increments.append(current_date)
-            current_date = current_date + timedelta(seconds=seconds_to_add)
+        Journals of runs that are still going are left alone. A journal is
+        only deleted once all of its folders were recovered, folders that
+        can't be reached (e.g. an offline share) are tried again next run.
+        """
+        if not self.journal_dir:
+            return
+        
+        journals, interrupted_folders = read_journals(self.journal_dir)
+        keep_paths = set()
+        try:
+            for interrupted in interrupted_folders:
+                folder = interrupted.folder_plan.folder
+                if not os.path.isdir(folder):
+                    self.log(f"Can't reach interrupted folder {folder}, keeping its journal", logging.WARNING)
+                    keep_paths.update(interrupted.journal_paths)
+                    continue
+                try:
+                    self.recover_folder(interrupted)
+                except Exception as e:
+                    self.log(f"Error recovering {folder}: {str(e)}", logging.ERROR)
+                    keep_paths.update(interrupted.journal_paths)
+        finally:
+            self.close_journal()
+            release_journals(journals, keep_paths)
+    
+    def recover_folder(self, interrupted):
+        """
+        Roll an interrupted folder forward.
+        
+        Rename steps run strictly in order and each one moves a file onto a
+        free name. The steps found in the journal are done, and so is each
+        following step whose target name exists. Names alone can't tell a
+        finished cycle from one that never started, but the first step of a
+        cycle is synced to the journal before the next one runs, so a
+        started cycle is always found there.
+        Sequences that can't be finished because a file went missing are
+        rolled back to the original names instead. Metadata writes that
+        aren't in the journal are repeated.
+        """
+        folder_plan = interrupted.folder_plan
+        folder_path = folder_plan.folder
+        self.log(f"Recovering interrupted folder: {folder_path}", logging.WARNING)
+        
+        remaining_sequences = []
+        pending_names = set()
+        rolled_back_names = set()
+        
+        journaled = set(interrupted.renamed)
+        for sequence in folder_plan.rename_plan.sequences:
+            done = 0
+            while done < len(sequence) and tuple(sequence[done]) in journaled:
+                done += 1
+            # Records of the last batch may have been lost in the crash
+            while done < len(sequence) and os.path.exists(os.path.join(folder_path, sequence[done].destination)):
+                done += 1
+            remaining = sequence[done:]
+            
+            # Every remaining step needs its source, either on disk or made by an earlier step
+            produced = set()
+            feasible = True
+            for step in remaining:
+                if step.source not in produced and not os.path.exists(os.path.join(folder_path, step.source)):
+                    feasible = False
+                    break
+                produced.add(step.destination)
+            
+            if feasible:
+                if remaining:
+                    remaining_sequences.append(remaining)
+                    pending_names.update(step.destination for step in remaining)
+                continue
+            
+            self.log(f"Cannot finish renaming {sequence[0].source}, rolling back", logging.WARNING)
+            for step in reversed(sequence[:done]):
+                source_path = os.path.join(folder_path, step.source)
+                destination_path = os.path.join(folder_path, step.destination)
+                if os.path.exists(destination_path) and not os.path.exists(source_path):
+                    os.rename(destination_path, source_path)
+                    self.log(f"Renamed {step.destination} back to {step.source}")
+            rolled_back_names.update(step.destination for step in sequence)
         
-        # Now rename all files to the final sequential names
-        all_temp_files = []
+        targets = folder_plan.rename_plan.targets
+        placed = [name for _, name in targets if name not in pending_names and name not in rolled_back_names]
+        writes = [
+            write for write in folder_plan.writes
+            if write.name not in interrupted.metadata_written and write.name not in rolled_back_names
+        ]
         
-        # First add standard images
-        for code, original_filename in standard_images:
-            temp_filename = temp_mappings.get(original_filename)
-            if temp_filename:
-                all_temp_files.append((temp_filename, original_filename))
+        resumed_plan = FolderPlan(folder_path, RenamePlan(targets, placed, remaining_sequences), writes,
+                                  duplicates=folder_plan.duplicates, duplicate_folder=folder_plan.duplicate_folder)
+        self.open_journal()
+        return self.execute_folder_plan(resumed_plan)
+    
+    def process_folders_parallel(self, target_folders):
+        """Process target folders on a pool of worker processes."""
+        import multiprocessing
+        import concurrent.futures
+        
+        self.log(f"Processing {len(target_folders)} folders with {self.workers} worker processes")
         
-        # Then add other JPG files
-        for original_filename in other_images:
-            temp_filename = temp_mappings.get(original_filename)
-            if temp_filename:
-                all_temp_files.append((temp_filename, original_filename))
+        # Spawn rather than fork, the GUI runs us from a thread next to Tk
+        context = multiprocessing.get_context('spawn')
+        self.executor = concurrent.futures.ProcessPoolExecutor(max_workers=self.workers, mp_context=context)
         
-        # Now rename everything to the new sequence
-        for i, (temp_filename, original_filename) in enumerate(all_temp_files):
+        try:
+            futures = {
+                self.executor.submit(process_folder_worker, self.root_path, self.target_folder_name, folder,
+                                     self.journal_dir and os.path.abspath(self.journal_dir), self.io_threads,
+                                     self.profiler.profile_dir and os.path.abspath(self.profiler.profile_dir),
+                                     self.dedupe, self.duplicate_folder,
+                                     self.metadata_cache_path and os.path.abspath(self.metadata_cache_path)): folder
+                for folder in target_folders
+            }
+            
+            for future in concurrent.futures.as_completed(futures):
+                folder = futures[future]
+                if future.cancelled():
+                    continue
+                
+                try:
+                    processed_count, records, stats_snapshot, folder_errors, profile = future.result()
+                except Exception as e:
+                    self.log(f"Error processing folder {folder}: {str(e)}", logging.ERROR)
+                    continue
+                
+                # Replay the worker's log in one block so folders don't interleave
+                for record in records:
+                    self.logger.handle(record)
+                
+                self.folder_results[folder] = processed_count
+                self.stats.merge(stats_snapshot)
+                self.profiler.merge(profile)
+                for folder_path, errors in folder_errors.items():
+                    self.folder_errors[folder_path] = self.folder_errors.get(folder_path, 0) + errors
+                self.stats.folder_done()
+                self.record_folder(folder, processed_count)
+                self.log(f"Finished folder {folder}: {processed_count} images")
+        finally:
+            self.executor.shutdown(wait=True, cancel_futures=True)
+            self.executor = None
+    
+    def filter_unchanged_folders(self, target_folders):
+        """Drop the folders whose contents haven't changed since they were last processed."""
+        changed_folders = []
+        for folder in target_folders:
             if self.stop_requested:
                 break
+            try:
+                if self.manifest.is_unchanged(folder, fingerprint_folder(folder)):
+                    self.log(f"Skipping unchanged folder: {folder}")
+                    continue
+            except OSError as e:
+                self.log(f"Could not fingerprint {folder}: {str(e)}", logging.WARNING)
+            changed_folders.append(folder)
+        
+        self.log(f"{len(target_folders) - len(changed_folders)} folders unchanged since the last run")
+        return changed_folders
+    
+    def record_folder(self, folder_path, processed_count):
+        """Remember the state of a folder after processing it, for incremental runs."""
+        if self.manifest is None:
+            return
+        # Failed files must be tried again by the next run
+        errors = self.folder_errors.get(os.path.abspath(folder_path), 0)
+        if errors:
+            self.log(f"Not recording {folder_path} as processed, {errors} operations failed", logging.WARNING)
+            return
+        try:
+            self.manifest.record(folder_path, fingerprint_folder(folder_path), processed_count)
+        except OSError as e:
+            self.log(f"Could not fingerprint {folder_path}: {str(e)}", logging.WARNING)
+    
+    def record_file_stats(self, folder_plan):
+        """Store the size and mtime of the files of a plan, so run_plan can tell if they changed."""
+        for name in folder_plan.original_names:
+            try:
+                stat = os.stat(os.path.join(folder_plan.folder, name))
+            except OSError:
+                continue
+            folder_plan.file_stats[name] = (stat.st_size, stat.st_mtime_ns)
+    
+    def stale_plan_reason(self, folder_plan):
+        """
+        Check that a plan made by an earlier dry run still fits its folder.
+        
+        Returns:
+            Why the plan can't be executed any more, None if it can
+        """
+        folder = folder_plan.folder
+        try:
+            current_names = set(os.listdir(folder))
+        except OSError as e:
+            return str(e)
+        
+        missing = [name for name in folder_plan.original_names if name not in current_names]
+        if missing:
+            return f"{len(missing)} files changed since the plan was made"
+        
+        # Target and temp names must be free or held by a file the plan moves away
+        key = os.path.normcase
+        plan_names = {key(name) for name in folder_plan.original_names}
+        if folder_plan.duplicate_folder:
+            plan_names.update(key(duplicate.name) for duplicate in folder_plan.duplicates)
+        current_keys = {key(name) for name in current_names}
+        new_names = [target for _, target in folder_plan.rename_plan.targets] + folder_plan.rename_plan.temp_names
+        taken = [name for name in new_names if key(name) in current_keys and key(name) not in plan_names]
+        if taken:
+            return f"{', '.join(taken[:5])}{' ...' if len(taken) > 5 else ''} added since the plan was made"
+        
+        changed = 0
+        for name, stat in folder_plan.file_stats.items():
+            try:
+                current = os.stat(os.path.join(folder, name))
+            except OSError:
+                changed += 1
+                continue
+            if (current.st_size, current.st_mtime_ns) != tuple(stat):
+                changed += 1
+        if changed:
+            return f"{changed} files changed since the plan was made"
+        return None
+    
+    def write_plans(self, target_folders):
+        """Plan every folder and write the plans to plan_path, without touching any file."""
+        writer = PlanWriter(self.plan_path)
+        rename_count = 0
+        estimated_bytes = 0
+        
+        try:
+            for folder in target_folders:
+                if self.stop_requested:
+                    break
                 
-            temp_path = os.path.join(folder_path, temp_filename)
-            new_code = lowest_code + i
-            new_filename = f"IMG_{new_code:04d}.JPG"
-            new_path = os.path.join(folder_path, new_filename)
-            
-            # Get the pre-calculated date for this image
-            new_date = date_increments[i]
+                self.log(f"Planning folder: {folder}")
+                folder_plan = self.plan_folder(folder)
+                if folder_plan is None:
+                    continue
+                
+                self.record_file_stats(folder_plan)
+                self.estimate_plan_cost(folder_plan)
+                writer.write(folder_plan)
+                self.stats.folder_done()
+                
+                self.folder_results[folder] = len(folder_plan.writes)
+                rename_count += folder_plan.rename_plan.rename_count
+                estimated_bytes += folder_plan.estimated_bytes
+        finally:
+            writer.close()
+        
+        self.log(f"Dry run: wrote plans for {len(self.folder_results)} folders to {self.plan_path} "
+                 f"({rename_count} renames, about {estimated_bytes / 1024 / 1024:.1f} MB to write)")
+    
+    def run_plan(self, plan_path=None):
+        """Execute the plans written by an earlier dry run."""
+        plan_path = plan_path or self.plan_path
+        start_time = time.time()
+        self.log(f"Executing plan from {plan_path}")
+        
+        self.recover_journal()
+        self.open_journal()
+        if self.incremental:
+            self.manifest = FolderManifest(self.manifest_path)
+        
+        try:
+            folder_plans = list(read_plans(plan_path))
+            self.stats.start_processing(len(folder_plans))
             
-            try:
-                # Rename the file
-                os.rename(temp_path, new_path)
-                self.log(f"Renamed {temp_filename} (originally {original_filename}) to {new_filename}")
+            for folder_plan in folder_plans:
+                if self.stop_requested:
+                    self.log("Operation stopped by user")
+                    break
                 
-                # Update metadata
-                if self.set_image_metadata(new_path, new_date):
-                    self.log(f"Updated metadata for {new_filename} to {new_date}")
-                else:
-                    self.log(f"Failed to update metadata for {new_filename}", logging.WARNING)
-            except Exception as e:
-                self.log(f"Error processing {temp_filename}: {str(e)}", logging.ERROR)
+                folder = folder_plan.folder
+                
+                # The plan is only valid for the files it was made for
+                reason = self.stale_plan_reason(folder_plan)
+                if reason:
+                    self.log(f"Skipping {folder}: {reason}", logging.WARNING)
+                    continue
+                
+                self.log(f"Processing folder: {folder}")
+                processed_count = self.execute_folder_plan(folder_plan)
+                self.folder_results[folder] = processed_count
+                self.stats.folder_done()
+                if not self.stop_requested:
+                    self.record_folder(folder, processed_count)
+        finally:
+            self.close_journal()
+            self.close_metadata_cache()
+            if self.manifest is not None:
+                self.manifest.close()
+                self.manifest = None
+        
+        self.log_stats()
+        elapsed_time = time.time() - start_time
+        self.log(f"Processing completed in {elapsed_time:.2f} seconds")
+        return len(self.folder_results)
     
     def run(self):
+        """Run the full processing operation, profiled if profiling is enabled."""
+        self.profiler.start()
+        try:
+            with self.profiler.section('run'):
+                return self.run_operation()
+        finally:
+            profile_prefix = self.profiler.stop('run')
+            if profile_prefix:
+                self.log(f"Profile written to {profile_prefix}.*")
+    
+    def run_operation(self):
         """Run the full processing operation."""
         start_time = time.time()
         self.log(f"Starting processing operation from root path: {self.root_path}")
         
+        # Clean up after a run that crashed halfway through a folder
+        if not self.dry_run:
+            self.recover_journal()
+        
         # Find all target folders
         target_folders = self.find_target_folders()
         
-        # Process each folder
-        for folder in target_folders:
-            if self.stop_requested:
-                self.log("Operation stopped by user")
-                break
-            self.process_folder(folder)
+        if self.incremental:
+            self.manifest = FolderManifest(self.manifest_path)
+        
+        try:
+            folders_to_process = target_folders
+            if self.manifest is not None:
+                folders_to_process = self.filter_unchanged_folders(target_folders)
+            
+            self.stats.start_processing(len(folders_to_process))
+            
+            # Process each folder
+            if self.dry_run:
+                self.write_plans(folders_to_process)
+            elif self.workers > 1 and len(folders_to_process) > 1 and not self.stop_requested:
+                self.process_folders_parallel(folders_to_process)
+            else:
+                self.open_journal()
+                for folder in folders_to_process:
+                    if self.stop_requested:
+                        break
+                    processed_count = self.process_folder(folder)
+                    self.folder_results[folder] = processed_count
+                    self.stats.folder_done()
+                    
+                    # A stopped folder is only partly processed
+                    if not self.stop_requested:
+                        self.record_folder(folder, processed_count)
+        finally:
+            self.close_journal()
+            self.close_metadata_cache()
+            if self.manifest is not None:
+                self.manifest.close()
+                self.manifest = None
+        
+        if self.stop_requested:
+            self.log("Operation stopped by user")
         
+        self.log_stats()
         elapsed_time = time.time() - start_time
         self.log(f"Processing completed in {elapsed_time:.2f} seconds")
         return len(target_folders)
 
+    def log_stats(self):
+        """Log the per-stage timers and counters of this run."""
+        for line in self.stats.summary_lines():
+            self.log(line)
+        self.log(f"{self.stats.images_done} images at {self.stats.images_per_second():.1f} images/sec")
+    
     def stop(self):
         """Request the processing to stop."""
         self.stop_requested = True
+        
+        # Drop folders that have not been picked up by a worker yet
+        executor = self.executor
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+        
         self.log("Stop requested, finishing current operation...")
 
     def edit_image(self, image_path, new_name=None, metadata_changes=None):
@@ -426,4 +1091,200 @@ class ImageProcessor:
                 
         except Exception as e:
             self.log(f"Error editing {image_path}: {str(e)}", logging.ERROR)
-            return False, f"Error: {str(e)}"
\ No newline at end of file
+            return False, f"Error: {str(e)}"
+
+    def edit_images(self, image_paths, metadata_changes, workers=4, progress_callback=None):
+        """
+        Set or shift date metadata on many images at once.
+
+        Args:
+            image_paths: Images to edit
+            metadata_changes: Field -> datetime to set it, or timedelta to shift the
+                              image's current value (e.g. parse_shift('+1h 3m'))
+            workers: Number of threads writing in parallel
+            progress_callback: Called from a worker thread with (done, total, result)
+                               after every image
+
+        Returns:
+            List of BatchEditResult in the order of image_paths
+        """
+        import concurrent.futures
+
+        image_paths = list(image_paths)
+        results = [None] * len(image_paths)
+        done = 0
+
+        self.log(f"Batch editing {len(image_paths)} images")
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            futures = {
+                executor.submit(self.edit_image_metadata, path, metadata_changes): index
+                for index, path in enumerate(image_paths)
+            }
+            for future in concurrent.futures.as_completed(futures):
+                index = futures[future]
+                results[index] = future.result()
+                done += 1
+                if progress_callback:
+                    progress_callback(done, len(image_paths), results[index])
+
+        self.open_metadata_cache().flush()
+        failed = sum(1 for result in results if not result.success)
+        self.log(f"Batch edit finished: {len(image_paths) - failed} succeeded, {failed} failed")
+        return results
+
+    def edit_image_metadata(self, image_path, metadata_changes):
+        """Apply one image's share of a batch edit, returns a BatchEditResult."""
+        if self.stop_requested:
+            return BatchEditResult(image_path, False, "Cancelled")
+        if not os.path.isfile(image_path):
+            return BatchEditResult(image_path, False, f"File not found: {image_path}")
+
+        try:
+            current_dates = {}
+            if has_shifts(metadata_changes):
+                for field, value in self.get_all_exif_dates(image_path).items():
+                    current_dates[field] = self.parse_datetime_str(value) if value else None
+            changes = resolve_changes(metadata_changes, current_dates)
+        except ValueError as e:
+            return BatchEditResult(image_path, False, str(e))
+
+        success, message = self.set_specific_metadata(image_path, changes)
+        return BatchEditResult(image_path, success, message)
+
+
+class _RecordCollector(logging.Handler):
+    """Keep log records in memory so a worker can send them back to the parent."""
+    def __init__(self):
+        super().__init__()
+        self.records = []
+    
+    def emit(self, record):
+        # Render the message now, args may not survive pickling
+        record.msg = record.getMessage()
+        record.args = None
+        record.exc_info = None
+        self.records.append(record)
+
+
+def process_folder_worker(root_path, target_folder_name, folder_path, journal_dir=None, io_threads=1, profile_dir=None,
+                          dedupe=None, duplicate_folder=DEFAULT_DUPLICATE_FOLDER,
+                          metadata_cache_path=DEFAULT_METADATA_CACHE_PATH):
+    """
+    Process one folder in a worker process and return
+    (processed_count, log_records, stats_snapshot, folder_errors, profile).
+    
+    The profile (None unless profiling) goes into the files of the run
+    instead of a set of files per folder.
+    """
+    logger = logging.getLogger(LOGGER_NAME)
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+    collector = _RecordCollector()
+    logger.addHandler(collector)
+    
+    try:
+        processor = ImageProcessor(root_path, target_folder_name, log_to_file=False, journal_dir=journal_dir,
+                                   io_threads=io_threads, profile_dir=profile_dir, dedupe=dedupe,
+                                   duplicate_folder=duplicate_folder, metadata_cache_path=metadata_cache_path)
+        processor.open_journal()
+        processor.profiler.start()
+        try:
+            processed_count = processor.process_folder(folder_path)
+        finally:
+            profile = processor.profiler.collect()
+            processor.close_journal()
+            processor.close_metadata_cache()
+    finally:
+        logger.removeHandler(collector)
+    
+    return processed_count, collector.records, processor.stats.snapshot(), processor.folder_errors, profile
+
+
+def main(argv=None):
+    """Headless batch entry point: python -m image_processor ROOT [options]"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(
+        prog='python -m image_processor',
+        description="Rename and re-date the JPG, PNG and TIFF files in every target folder below ROOT."
+    )
+    parser.add_argument('root', help="Root path to search for target folders")
+    parser.add_argument('--target', default="01. Foto's", help="Name of the target folders (default: %(default)s)")
+    parser.add_argument('--workers', type=int, default=1, help="Worker processes for folders (default: %(default)s)")
+    parser.add_argument('--walker-threads', type=int, default=8, help="Threads for the folder search (default: %(default)s)")
+    parser.add_argument('--io-threads', type=int, default=1,
+                        help="Threads overlapping renames and metadata writes within a folder (default: %(default)s)")
+    parser.add_argument('--ignore', action='append', default=[], metavar='PATTERN',
+                        help="Skip directories matching this pattern, can be repeated")
+    parser.add_argument('--incremental', action='store_true', help="Skip folders unchanged since the last run")
+    parser.add_argument('--manifest', default=DEFAULT_MANIFEST_PATH, help="Manifest for --incremental (default: %(default)s)")
+    parser.add_argument('--dry-run', action='store_true', help="Only write the plan, don't change any file")
+    parser.add_argument('--plan', default=DEFAULT_PLAN_PATH, help="Plan file for --dry-run (default: %(default)s)")
+    parser.add_argument('--execute-plan', metavar='PLAN', help="Execute a plan written by --dry-run instead of searching ROOT")
+    parser.add_argument('--dedupe', choices=['skip', 'move'],
+                        help="Leave duplicate images out of the sequence, 'move' also moves them to --duplicate-folder")
+    parser.add_argument('--duplicate-folder', default=DEFAULT_DUPLICATE_FOLDER,
+                        help="Subfolder of each target folder for --dedupe move (default: %(default)s)")
+    parser.add_argument('--metadata-cache', default=DEFAULT_METADATA_CACHE_PATH,
+                        help="Cache of the EXIF dates read so far (default: %(default)s)")
+    parser.add_argument('--no-metadata-cache', action='store_true', help="Keep the metadata cache in memory only")
+    parser.add_argument('--journal-dir', default=DEFAULT_JOURNAL_DIR, help="Crash recovery journal (default: %(default)s)")
+    parser.add_argument('--log-file', default=DEFAULT_LOG_PATH, help="Log file (default: %(default)s)")
+    parser.add_argument('--log-format', choices=['text', 'json'], default='text', help="Log file format (default: %(default)s)")
+    parser.add_argument('--report', metavar='PATH', help="Write a JSON report of the run to PATH")
+    parser.add_argument('--quiet', action='store_true', help="Don't print the log to the console")
+    parser.add_argument('--profile', nargs='?', const=DEFAULT_PROFILE_DIR, metavar='DIR',
+                        help=f"Write cProfile/tracemalloc results to DIR (default: {DEFAULT_PROFILE_DIR}), "
+                             f"also enabled by {PROFILE_ENV_VAR}")
+    args = parser.parse_args(argv)
+    
+    if not os.path.isdir(args.root):
+        parser.error(f"The root path '{args.root}' is not a valid directory")
+    
+    processor = ImageProcessor(
+        args.root,
+        args.target,
+        None if args.quiet else print,
+        workers=args.workers,
+        ignore_patterns=args.ignore,
+        walker_threads=args.walker_threads,
+        io_threads=args.io_threads,
+        incremental=args.incremental,
+        manifest_path=args.manifest,
+        dry_run=args.dry_run,
+        plan_path=args.plan,
+        journal_dir=args.journal_dir,
+        log_path=args.log_file,
+        log_format=args.log_format,
+        profile_dir=args.profile,
+        dedupe=args.dedupe,
+        duplicate_folder=args.duplicate_folder,
+        metadata_cache_path=None if args.no_metadata_cache else args.metadata_cache
+    )
+    
+    try:
+        if args.execute_plan:
+            folders_found = processor.run_plan(args.execute_plan)
+        else:
+            folders_found = processor.run()
+    except KeyboardInterrupt:
+        processor.stop()
+        return 130
+    
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump({
+                'root': args.root,
+                'target': args.target,
+                'dry_run': args.dry_run,
+                'folders_found': folders_found,
+                'folders': processor.folder_results,
+                'stopped': processor.stop_requested,
+                'stats': processor.stats.snapshot()
+            }, f, indent=2, ensure_ascii=False)
+    
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,210 @@
+import os
+import json
+import time
+import threading
+
+from execution_plan import FolderPlan
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+DEFAULT_JOURNAL_DIR = 'image_processor_journal'
+
+
+class Journal:
+    """
+    Append-only write-ahead journal of folder plans and completed operations.
+
+    The plan of a folder is synced to disk before its first rename. Records
+    of completed operations are group-committed, one fsync per batch_size
+    records or sync_interval seconds. Losing the last batch in a crash is
+    fine: completed renames can be told from the filesystem and metadata
+    writes are simply repeated during recovery. The exception is the first
+    step of a rename cycle, which is synced right away (renamed(sync=True)),
+    because a finished cycle leaves the same names as one that never started.
+
+    Every process writes its own file in journal_dir, named after its
+    creation time so the files sort chronologically. The file is locked
+    while it is open, so other processes leave it alone, and removed on
+    close when every folder it started was committed. Records can be added
+    from several threads.
+    """
+
+    def __init__(self, journal_dir=DEFAULT_JOURNAL_DIR, batch_size=256, sync_interval=1.0):
+        os.makedirs(journal_dir, exist_ok=True)
+        while True:
+            self.path = os.path.join(journal_dir, f"{time.time_ns():020d}-{os.getpid()}.jsonl")
+            self.file = open(self.path, 'a', encoding='utf-8')
+            lock_file(self.file)
+            # A recovering process may have locked and removed the new, empty file before us
+            if os.path.exists(self.path) and os.path.samestat(os.fstat(self.file.fileno()), os.stat(self.path)):
+                break
+            self.file.close()
+        self.batch_size = batch_size
+        self.sync_interval = sync_interval
+        self.pending = 0
+        self.last_sync = time.monotonic()
+        self.open_folders = set()
+        self.lock = threading.RLock()
+
+    def append(self, record, sync=False):
+        line = json.dumps(record, ensure_ascii=False) + '\n'
+        with self.lock:
+            self.file.write(line)
+            self.pending += 1
+            if sync or self.pending >= self.batch_size or time.monotonic() - self.last_sync >= self.sync_interval:
+                self.sync()
+
+    def sync(self):
+        """Flush the pending records to disk with a single fsync."""
+        with self.lock:
+            if self.pending:
+                self.file.flush()
+                os.fsync(self.file.fileno())
+                self.pending = 0
+            self.last_sync = time.monotonic()
+
+    def begin(self, folder_plan):
+        """Record a folder plan, durably, before any of it is executed."""
+        self.open_folders.add(folder_plan.folder)
+        self.append({'op': 'begin', 'folder': folder_plan.folder, 'plan': folder_plan.to_dict()}, sync=True)
+
+    def renamed(self, folder, step, sync=False):
+        self.append({'op': 'rename', 'folder': folder, 'source': step.source, 'destination': step.destination},
+                    sync=sync)
+
+    def metadata_written(self, folder, name):
+        self.append({'op': 'metadata', 'folder': folder, 'name': name})
+
+    def commit(self, folder):
+        self.open_folders.discard(folder)
+        self.append({'op': 'commit', 'folder': folder})
+
+    def close(self):
+        self.sync()
+        if self.open_folders:
+            unlock_file(self.file)
+            self.file.close()
+        else:
+            remove_locked_file(self.file)
+
+
+def lock_file(f, wait=True):
+    """
+    Lock an open file against other processes. Returns False if wait is
+    False and another process holds the lock.
+    """
+    try:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | (0 if wait else fcntl.LOCK_NB))
+        else:
+            # Byte 0 stands for the whole file, locking past the end is allowed
+            os.lseek(f.fileno(), 0, os.SEEK_SET)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK if wait else msvcrt.LK_NBLCK, 1)
+    except OSError:
+        if wait:
+            raise
+        return False
+    return True
+
+
+def unlock_file(f):
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+    else:
+        os.lseek(f.fileno(), 0, os.SEEK_SET)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def remove_locked_file(f):
+    """Delete a file this process has locked and close it."""
+    if fcntl is not None:
+        # Removed while still locked, so no other process can pick it up in between
+        os.remove(f.name)
+        f.close()
+    else:
+        # Windows can't remove open files
+        unlock_file(f)
+        f.close()
+        os.remove(f.name)
+
+
+class InterruptedFolder:
+    """A folder that was begun but not committed in a journal."""
+
+    def __init__(self, folder_plan):
+        self.folder_plan = folder_plan
+        self.renamed = []
+        self.metadata_written = set()
+        # The journal files with records of this folder
+        self.journal_paths = set()
+
+
+def read_journals(journal_dir=DEFAULT_JOURNAL_DIR):
+    """
+    Read the journal files left behind by earlier runs.
+
+    Journals locked by a running process are skipped. The others are
+    returned open and locked, so no other process recovers the same
+    folders, until they are passed to release_journals.
+
+    Returns:
+        (journals, interrupted): the open journal files and a list of
+        InterruptedFolder for the folders that were never committed
+    """
+    if not os.path.isdir(journal_dir):
+        return [], []
+
+    journals = []
+    for name in sorted(os.listdir(journal_dir)):
+        if not name.endswith('.jsonl'):
+            continue
+        try:
+            f = open(os.path.join(journal_dir, name), encoding='utf-8')
+        except OSError:
+            continue  # Removed by its process in the meantime
+        if lock_file(f, wait=False):
+            journals.append(f)
+        else:
+            f.close()
+
+    folders = {}
+    for f in journals:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # A torn write at the end of the file
+                break
+
+            folder = record['folder']
+            if record['op'] == 'begin':
+                folders[folder] = InterruptedFolder(FolderPlan.from_dict(record['plan']))
+            elif folder not in folders:
+                continue
+            elif record['op'] == 'rename':
+                folders[folder].renamed.append((record['source'], record['destination']))
+            elif record['op'] == 'metadata':
+                folders[folder].metadata_written.add(record['name'])
+            elif record['op'] == 'commit':
+                del folders[folder]
+                continue
+            folders[folder].journal_paths.add(f.name)
+
+    return journals, list(folders.values())
+
+
+def release_journals(journals, keep_paths=()):
+    """Delete the journals returned by read_journals, except keep_paths, and unlock them."""
+    for f in journals:
+        try:
+            if f.name in keep_paths:
+                unlock_file(f)
+                f.close()
+            else:
+                remove_locked_file(f)
+        except OSError:
+            f.close()
@@ -0,0 +1,88 @@
+import os
+import time
+import hashlib
+import sqlite3
+from collections import namedtuple
+
+from folder_scan import standard_code
+
+DEFAULT_MANIFEST_PATH = 'image_processor_manifest.db'
+
+FolderFingerprint = namedtuple('FolderFingerprint', ['digest', 'dir_mtime_ns', 'entry_count', 'first_name', 'last_name'])
+
+
+def fingerprint_folder(folder_path):
+    """
+    Fingerprint the direct contents of a folder.
+
+    The digest covers the name, size and modification time of every entry,
+    so renames, added or removed files and rewritten files all change it.
+    """
+    entries = []
+    with os.scandir(folder_path) as it:
+        for entry in it:
+            stat = entry.stat(follow_symlinks=False)
+            entries.append((entry.name, stat.st_size, stat.st_mtime_ns))
+    entries.sort()
+
+    digest = hashlib.sha1()
+    for name, size, mtime_ns in entries:
+        digest.update(f"{name}\0{size}\0{mtime_ns}\n".encode('utf-8', 'surrogateescape'))
+
+    standard_names = [name for name, _, _ in entries if standard_code(name) is not None]
+    return FolderFingerprint(
+        digest.hexdigest(),
+        os.stat(folder_path).st_mtime_ns,
+        len(entries),
+        standard_names[0] if standard_names else None,
+        standard_names[-1] if standard_names else None
+    )
+
+
+class FolderManifest:
+    """
+    SQLite store of the folders processed by earlier runs.
+
+    A folder whose fingerprint matches the one recorded after its last run
+    has not been touched since and can be skipped.
+    """
+
+    def __init__(self, path=DEFAULT_MANIFEST_PATH):
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS folders (
+                folder TEXT PRIMARY KEY,
+                digest TEXT NOT NULL,
+                dir_mtime_ns INTEGER NOT NULL,
+                entry_count INTEGER NOT NULL,
+                first_name TEXT,
+                last_name TEXT,
+                image_count INTEGER NOT NULL,
+                processed_at REAL NOT NULL
+            )
+        """)
+        self.connection.commit()
+
+    def is_unchanged(self, folder_path, fingerprint):
+        """Check if a folder still has the fingerprint recorded by the last run."""
+        row = self.connection.execute(
+            "SELECT digest, dir_mtime_ns, entry_count FROM folders WHERE folder = ?",
+            (folder_path,)
+        ).fetchone()
+        return row is not None and tuple(row) == tuple(fingerprint[:3])
+
+    def record(self, folder_path, fingerprint, image_count):
+        """Store the fingerprint of a folder right after processing it."""
+        self.connection.execute(
+            "INSERT OR REPLACE INTO folders VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (folder_path, *fingerprint, image_count, time.time())
+        )
+        self.connection.commit()
+
+    def forget(self, folder_path):
+        self.connection.execute("DELETE FROM folders WHERE folder = ?", (folder_path,))
+        self.connection.commit()
+
+    def close(self):
+        self.connection.close()
@@ -0,0 +1,156 @@
+import os
+import sys
+import time
+import sqlite3
+import threading
+from collections import OrderedDict
+
+# The date fields that are cached, in column order
+CACHED_FIELDS = ('DateTimeOriginal', 'DateTimeDigitized', 'DateTime')
+
+
+def user_cache_dir():
+    """Per-user cache directory, on the local disk rather than next to the photos."""
+    if sys.platform == 'win32':
+        base = os.environ.get('LOCALAPPDATA') or os.path.expanduser(os.path.join('~', 'AppData', 'Local'))
+    elif sys.platform == 'darwin':
+        base = os.path.expanduser(os.path.join('~', 'Library', 'Caches'))
+    else:
+        base = os.environ.get('XDG_CACHE_HOME') or os.path.expanduser(os.path.join('~', '.cache'))
+    return os.path.join(base, 'image_processor')
+
+
+DEFAULT_METADATA_CACHE_PATH = os.path.join(user_cache_dir(), 'metadata.db')
+
+
+class MetadataCache:
+    """
+    EXIF dates of files, remembered between calls and sessions.
+
+    Entries are keyed by (device, inode) and only valid while the size and
+    mtime_ns of the file are unchanged, so a rename keeps the entry and
+    any rewrite invalidates it. The most recently used entries are kept in
+    memory, all of them in an SQLite file (WAL mode, so the GUI, the batch
+    processor and its worker processes can share it). With path=None the
+    cache only lives in memory.
+
+    Attributes:
+        hits: Lookups answered from the cache
+        misses: Lookups the caller had to parse the file for
+    """
+
+    def __init__(self, path=None, max_entries=20000, commit_interval=1.0):
+        self.path = path
+        self.max_entries = max_entries
+        self.commit_interval = commit_interval
+        self.entries = OrderedDict()  # (dev, ino) -> (size, mtime_ns, dates tuple)
+        self.lock = threading.Lock()
+        self.pending = []
+        self.last_commit = time.monotonic()
+        self.hits = 0
+        self.misses = 0
+
+        self.connection = None
+        if path:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self.connection = sqlite3.connect(path, timeout=30, check_same_thread=False)
+            with self.lock:
+                self.connection.execute("PRAGMA journal_mode=WAL")
+                # A lost entry is only parsed again, no need to sync every commit
+                self.connection.execute("PRAGMA synchronous=NORMAL")
+                self.connection.execute("""
+                    CREATE TABLE IF NOT EXISTS exif_dates (
+                        dev INTEGER NOT NULL,
+                        ino INTEGER NOT NULL,
+                        size INTEGER NOT NULL,
+                        mtime_ns INTEGER NOT NULL,
+                        date_time_original TEXT,
+                        date_time_digitized TEXT,
+                        date_time TEXT,
+                        PRIMARY KEY (dev, ino)
+                    )
+                """)
+                self.connection.commit()
+
+    def get(self, path, stat=None):
+        """
+        Return the cached dates of a file as a dict of CACHED_FIELDS, None if
+        they aren't cached (or the file changed since).
+        """
+        try:
+            stat = stat or os.stat(path)
+        except OSError:
+            return None
+        key = (stat.st_dev, stat.st_ino)
+        version = (stat.st_size, stat.st_mtime_ns)
+
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[:2] == version:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return dict(zip(CACHED_FIELDS, entry[2]))
+
+            if self.connection is not None:
+                row = self.connection.execute(
+                    "SELECT size, mtime_ns, date_time_original, date_time_digitized, date_time "
+                    "FROM exif_dates WHERE dev = ? AND ino = ?", key
+                ).fetchone()
+                if row is not None and tuple(row[:2]) == version:
+                    self.remember(key, version, tuple(row[2:]))
+                    self.hits += 1
+                    return dict(zip(CACHED_FIELDS, row[2:]))
+
+            self.misses += 1
+            return None
+
+    def put(self, path, dates, stat=None):
+        """Store the dates (a dict with CACHED_FIELDS) of a file as it is now."""
+        try:
+            stat = stat or os.stat(path)
+        except OSError:
+            return
+        key = (stat.st_dev, stat.st_ino)
+        version = (stat.st_size, stat.st_mtime_ns)
+        values = tuple(dates.get(field) for field in CACHED_FIELDS)
+
+        with self.lock:
+            self.remember(key, version, values)
+            if self.connection is None:
+                return
+            # Rows are written in batches, so worker processes sharing the
+            # file only hold its write lock for a moment
+            self.pending.append(key + version + values)
+            if time.monotonic() - self.last_commit >= self.commit_interval:
+                self.commit()
+
+    def remember(self, key, version, values):
+        self.entries[key] = version + (values,)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def commit(self):
+        if self.pending:
+            try:
+                with self.connection:
+                    self.connection.executemany("INSERT OR REPLACE INTO exif_dates VALUES (?, ?, ?, ?, ?, ?, ?)", self.pending)
+            except sqlite3.Error:
+                pass  # e.g. locked for too long, the files are only parsed again next time
+            self.pending = []
+        self.last_commit = time.monotonic()
+
+    def flush(self):
+        """Write the pending entries to the SQLite file."""
+        with self.lock:
+            if self.connection is not None:
+                self.commit()
+
+    def close(self):
+        with self.lock:
+            if self.connection is not None:
+                self.commit()
+                self.connection.close()
+                self.connection = None
@@ -0,0 +1,156 @@
+import time
+import threading
+from contextlib import contextmanager
+
+STAGES = ('discovery', 'listing', 'exif_read', 'rename', 'exif_write')
+
+
+class StageStats:
+    """Counters for one processing stage."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self.errors = 0
+
+    def as_dict(self):
+        return {
+            'count': self.count,
+            'seconds': self.seconds,
+            'bytes_read': self.bytes_read,
+            'bytes_written': self.bytes_written,
+            'errors': self.errors
+        }
+
+
+class RunStats:
+    """
+    Per-stage timers and counters plus folder/image progress for one run.
+
+    The optional callback receives snapshot() at most every
+    callback_interval seconds and whenever a folder is finished. It is
+    called from the processing thread.
+    """
+
+    def __init__(self, callback=None, callback_interval=0.25):
+        self.callback = callback
+        self.callback_interval = callback_interval
+        self.lock = threading.Lock()
+        self.stages = {name: StageStats() for name in STAGES}
+        self.start_time = time.monotonic()
+        self.processing_start_time = None
+        self.folders_total = 0
+        self.folders_done = 0
+        self.images_done = 0
+        self.last_callback = 0.0
+
+    def add(self, stage, seconds=0.0, count=1, bytes_read=0, bytes_written=0, errors=0):
+        with self.lock:
+            stats = self.stages[stage]
+            stats.count += count
+            stats.seconds += seconds
+            stats.bytes_read += bytes_read
+            stats.bytes_written += bytes_written
+            stats.errors += errors
+
+    @contextmanager
+    def stage(self, stage):
+        """
+        Time a block of work. Yields a dict where the block can put
+        bytes_read/bytes_written, an exception counts as an error.
+        """
+        io = {'bytes_read': 0, 'bytes_written': 0}
+        start = time.perf_counter()
+        try:
+            yield io
+        except Exception:
+            self.add(stage, time.perf_counter() - start, errors=1, **io)
+            raise
+        self.add(stage, time.perf_counter() - start, **io)
+
+    def error(self, stage):
+        self.add(stage, count=0, errors=1)
+
+    def start_processing(self, folders_total):
+        with self.lock:
+            self.folders_total = folders_total
+            self.processing_start_time = time.monotonic()
+        self.notify(force=True)
+
+    def image_done(self, count=1):
+        with self.lock:
+            self.images_done += count
+        self.notify()
+
+    def folder_done(self):
+        with self.lock:
+            self.folders_done += 1
+        self.notify(force=True)
+
+    def merge(self, snapshot):
+        """Add the stage counters and images of a snapshot taken in another process."""
+        with self.lock:
+            for name, values in snapshot['stages'].items():
+                stats = self.stages[name]
+                stats.count += values['count']
+                stats.seconds += values['seconds']
+                stats.bytes_read += values['bytes_read']
+                stats.bytes_written += values['bytes_written']
+                stats.errors += values['errors']
+            self.images_done += snapshot['images_done']
+
+    def eta(self):
+        """Estimated seconds left from the folder rate so far, None if unknown."""
+        if not self.processing_start_time or not self.folders_done:
+            return None
+        elapsed = time.monotonic() - self.processing_start_time
+        return elapsed / self.folders_done * max(0, self.folders_total - self.folders_done)
+
+    def images_per_second(self):
+        if not self.processing_start_time:
+            return 0.0
+        elapsed = time.monotonic() - self.processing_start_time
+        return self.images_done / elapsed if elapsed > 0 else 0.0
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                'elapsed': time.monotonic() - self.start_time,
+                'folders_total': self.folders_total,
+                'folders_done': self.folders_done,
+                'images_done': self.images_done,
+                'images_per_second': self.images_per_second(),
+                'eta': self.eta(),
+                'stages': {name: stats.as_dict() for name, stats in self.stages.items()}
+            }
+
+    def notify(self, force=False):
+        if self.callback is None:
+            return
+        now = time.monotonic()
+        if force or now - self.last_callback >= self.callback_interval:
+            self.last_callback = now
+            self.callback(self.snapshot())
+
+    def summary_lines(self):
+        """Human readable per-stage summary for the log."""
+        lines = []
+        for name, stats in self.stages.items():
+            if not stats.count and not stats.errors:
+                continue
+            rate = stats.count / stats.seconds if stats.seconds > 0 else 0.0
+            lines.append(
+                f"{name}: {stats.count} ops in {stats.seconds:.2f}s ({rate:.1f}/s), "
+                f"{stats.bytes_read / 1024 / 1024:.1f} MB read, "
+                f"{stats.bytes_written / 1024 / 1024:.1f} MB written, {stats.errors} errors"
+            )
+        return lines
+
+
+def format_eta(seconds):
+    if seconds is None:
+        return "--:--:--"
+    seconds = int(seconds)
+    return f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
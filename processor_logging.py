@@ -0,0 +1,137 @@
+"""
+Logging for ImageProcessor.
+
+The 'ImageProcessor' logger gets a single queue handler, configured once per
+process. A QueueListener thread formats the records and writes them to a
+rotating log file and to the GUI callback, so the processing threads only
+pay for putting records on a queue. Asking for another log file or format
+later switches the file handler over.
+"""
+import os
+import json
+import queue
+import atexit
+import logging
+import logging.handlers
+
+LOGGER_NAME = 'ImageProcessor'
+DEFAULT_LOG_PATH = 'image_processor.log'
+TEXT_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+_listener = None
+_callback_handler = None
+_file_handler = None
+_file_settings = None
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """Format records as one JSON object per line."""
+
+    def format(self, record):
+        return json.dumps({
+            'time': record.created,
+            'level': record.levelname,
+            'thread': record.threadName,
+            'message': record.getMessage()
+        }, ensure_ascii=False)
+
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """Queue records as they are, formatting happens on the listener thread."""
+
+    def prepare(self, record):
+        return record
+
+
+class CallbackHandler(logging.Handler):
+    """Pass formatted records to a callback, e.g. the GUI log. The callback can be swapped."""
+
+    def __init__(self):
+        super().__init__()
+        self.callback = None
+
+    def emit(self, record):
+        callback = self.callback
+        if callback is not None:
+            callback(self.format(record))
+
+
+def _make_file_handler(log_path, log_format, max_bytes, backup_count):
+    file_handler = logging.handlers.RotatingFileHandler(
+        log_path, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8'
+    )
+    if log_format == 'json':
+        file_handler.setFormatter(JsonLinesFormatter())
+    else:
+        file_handler.setFormatter(logging.Formatter(TEXT_FORMAT))
+    return file_handler
+
+
+def configure_logging(log_callback=None, log_path=DEFAULT_LOG_PATH, log_format='text',
+                      max_bytes=10 * 1024 * 1024, backup_count=5):
+    """
+    Set up the ImageProcessor logger, only the first call adds handlers.
+
+    Later calls replace the GUI callback (if one is given), so creating more
+    processors doesn't duplicate log lines. If they ask for another log file
+    or format, the records queued so far are written to the old file and
+    the later ones go to the new one.
+
+    Args:
+        log_callback: Function called with every formatted log line
+        log_path: Log file, rotated at max_bytes with backup_count old files
+        log_format: 'text' or 'json' (JSON Lines) for the log file
+    """
+    global _listener, _callback_handler, _file_handler, _file_settings
+
+    logger = logging.getLogger(LOGGER_NAME)
+    logger.setLevel(logging.INFO)
+    settings = (os.path.abspath(log_path), log_format, max_bytes, backup_count)
+
+    if _listener is None:
+        _file_handler = _make_file_handler(log_path, log_format, max_bytes, backup_count)
+        _file_settings = settings
+
+        _callback_handler = CallbackHandler()
+        _callback_handler.setFormatter(logging.Formatter(TEXT_FORMAT))
+
+        log_queue = queue.SimpleQueue()
+        logger.addHandler(_DeferredQueueHandler(log_queue))
+        _listener = logging.handlers.QueueListener(log_queue, _file_handler, _callback_handler)
+        _listener.start()
+        atexit.register(shutdown_logging)
+    elif settings != _file_settings:
+        # Stopping drains the queue into the old file first
+        _listener.stop()
+        _file_handler.close()
+        _file_handler = _make_file_handler(log_path, log_format, max_bytes, backup_count)
+        _file_settings = settings
+        _listener.handlers = (_file_handler, _callback_handler)
+        _listener.start()
+
+    if log_callback is not None:
+        _callback_handler.callback = log_callback
+
+    return logger
+
+
+def shutdown_logging():
+    """Flush the queued records and close the log file."""
+    global _listener, _callback_handler, _file_handler, _file_settings
+
+    if _listener is None:
+        return
+
+    _listener.stop()
+    for handler in _listener.handlers:
+        handler.close()
+
+    logger = logging.getLogger(LOGGER_NAME)
+    for handler in list(logger.handlers):
+        if isinstance(handler, _DeferredQueueHandler):
+            logger.removeHandler(handler)
+
+    _listener = None
+    _callback_handler = None
+    _file_handler = None
+    _file_settings = None
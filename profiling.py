@@ -0,0 +1,232 @@
+"""
+Opt-in profiling of processing runs.
+
+Set IMAGE_PROCESSOR_PROFILE to a folder (or to 1 for the default folder),
+pass --profile on the command line or tick the box in the GUI. A profiled
+run writes one set of files, the profiles of its worker processes merged in:
+
+    <prefix>.pstats          cProfile data, for pstats or snakeviz
+    <prefix>.collapsed       collapsed stacks, for flamegraph.pl or speedscope
+    <prefix>.sections.json   calls, time and allocated memory per wrapped section
+    <prefix>.tracemalloc.txt the lines that allocated the most memory
+
+When profiling is off, a section is a shared no-op context manager.
+"""
+import os
+import json
+import time
+import itertools
+import threading
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+
+PROFILE_ENV_VAR = 'IMAGE_PROCESSOR_PROFILE'
+DEFAULT_PROFILE_DIR = 'image_processor_profile'
+
+_NO_SECTION = nullcontext()
+
+# Numbers the profiles of a process, the GUI can profile several runs
+_profile_numbers = itertools.count(1)
+
+
+def profile_dir_from_env():
+    """Profile folder requested through the environment, None if profiling is off."""
+    value = os.environ.get(PROFILE_ENV_VAR, '').strip()
+    if not value or value.lower() in ('0', 'false', 'no', 'off'):
+        return None
+    if value.lower() in ('1', 'true', 'yes', 'on'):
+        return DEFAULT_PROFILE_DIR
+    return value
+
+
+class Profiler:
+    """
+    cProfile and tracemalloc around a run, plus per-section counters.
+
+    cProfile only sees the thread that called start(). Worker processes
+    profile themselves and send the result back from collect(), merge()
+    adds it to the files written by stop().
+    """
+
+    def __init__(self, profile_dir=None, traceback_frames=1):
+        self.profile_dir = profile_dir
+        self.enabled = bool(profile_dir)
+        self.traceback_frames = traceback_frames
+        self.profile = None
+        self.sections = {}
+        self.lock = threading.Lock()
+        self.started_tracemalloc = False
+        self.merged = []
+
+    def section(self, name):
+        """Context manager that counts a call of a section, a no-op when profiling is off."""
+        if not self.enabled or self.profile is None:
+            return _NO_SECTION
+        return self._section(name)
+
+    @contextmanager
+    def _section(self, name):
+        start = time.perf_counter()
+        allocated = tracemalloc.get_traced_memory()[0]
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            allocated = max(0, tracemalloc.get_traced_memory()[0] - allocated)
+            with self.lock:
+                stats = self.sections.setdefault(name, {'calls': 0, 'seconds': 0.0, 'allocated_bytes': 0})
+                stats['calls'] += 1
+                stats['seconds'] += seconds
+                stats['allocated_bytes'] += allocated
+
+    def start(self):
+        if not self.enabled or self.profile is not None:
+            return
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.traceback_frames)
+            self.started_tracemalloc = True
+        # Imported here so runs without profiling don't pay for it
+        import cProfile
+
+        self.sections = {}
+        self.profile = cProfile.Profile()
+        self.profile.enable()
+
+    def collect(self):
+        """
+        Stop profiling and return the picklable results, for merge() in
+        another process. None if profiling was off.
+        """
+        if self.profile is None:
+            return None
+
+        self.profile.disable()
+        self.profile.create_stats()
+
+        snapshot = tracemalloc.take_snapshot()
+        peak = tracemalloc.get_traced_memory()[1]
+        if self.started_tracemalloc:
+            tracemalloc.stop()
+            self.started_tracemalloc = False
+
+        lines = [(stat.traceback[0].filename, stat.traceback[0].lineno, stat.size, stat.count)
+                 for stat in snapshot.statistics('lineno')]
+        collected = {'stats': self.profile.stats, 'sections': self.sections, 'peak_traced_bytes': peak,
+                     'lines': lines}
+        self.profile = None
+        return collected
+
+    def merge(self, collected):
+        """Add the results of collect() from a worker to the files written by stop()."""
+        if collected is not None:
+            with self.lock:
+                self.merged.append(collected)
+
+    def stop(self, label='run'):
+        """Stop profiling and write the files. Returns the file prefix, None if profiling was off."""
+        own = self.collect()
+        with self.lock:
+            profiles = ([own] if own else []) + self.merged
+            self.merged = []
+        if not profiles:
+            return None
+
+        import pstats
+
+        stats = pstats.Stats(_CollectedStats(profiles[0]['stats']))
+        for collected in profiles[1:]:
+            stats.add(_CollectedStats(collected['stats']))
+
+        sections = {}
+        lines = {}
+        for collected in profiles:
+            for name, section in collected['sections'].items():
+                total = sections.setdefault(name, {'calls': 0, 'seconds': 0.0, 'allocated_bytes': 0})
+                for key in total:
+                    total[key] += section[key]
+            for filename, lineno, size, count in collected['lines']:
+                line = lines.setdefault((filename, lineno), [0, 0])
+                line[0] += size
+                line[1] += count
+        # Workers ran side by side, the highest peak is the one that counts
+        peak = max(collected['peak_traced_bytes'] for collected in profiles)
+
+        os.makedirs(self.profile_dir, exist_ok=True)
+        prefix = os.path.join(self.profile_dir, f"{label}-{datetime.now():%Y%m%d-%H%M%S}-{os.getpid()}-{next(_profile_numbers)}")
+
+        stats.dump_stats(prefix + '.pstats')
+        write_collapsed_stacks(stats, prefix + '.collapsed')
+
+        with open(prefix + '.sections.json', 'w', encoding='utf-8') as f:
+            json.dump({'profiles': len(profiles), 'peak_traced_bytes': peak, 'sections': sections}, f, indent=2)
+
+        with open(prefix + '.tracemalloc.txt', 'w', encoding='utf-8') as f:
+            f.write(f"Peak traced memory: {peak / 1024 / 1024:.1f} MB (largest of {len(profiles)} profiles)\n")
+            top = sorted(lines.items(), key=lambda item: item[1][0], reverse=True)[:50]
+            for (filename, lineno), (size, count) in top:
+                f.write(f"{filename}:{lineno}: size={size / 1024:.1f} KiB, count={count}\n")
+
+        return prefix
+
+
+class _CollectedStats:
+    """Raw cProfile stats in the shape pstats.Stats loads from a Profile."""
+
+    def __init__(self, stats):
+        self.stats = stats
+
+    def create_stats(self):
+        pass
+
+
+def _frame_name(function):
+    filename, line, name = function
+    if filename == '~':
+        return name
+    return f"{name} ({os.path.basename(filename)}:{line})"
+
+
+def write_collapsed_stacks(stats, path, max_depth=64, min_seconds=1e-6):
+    """
+    Write pstats data as collapsed stacks ('a;b;c <microseconds>' lines).
+
+    cProfile only records caller -> callee edges, so the stacks are rebuilt
+    by walking the call graph down from the functions nobody called, and a
+    function called from several places gets its time split per caller.
+    That's close enough to spot the hot paths in a flame graph. Paths
+    below min_seconds are dropped, which also keeps the walk short.
+    """
+    entries = stats.stats  # function -> (cc, nc, tt, ct, callers)
+    callees = {}
+    for function, (_, _, _, _, callers) in entries.items():
+        for caller, caller_stats in callers.items():
+            callees.setdefault(caller, []).append((function, caller_stats))
+
+    lines = {}
+
+    def walk(function, stack, self_time, total_time):
+        stack = stack + [_frame_name(function)]
+        # Time spent in this function itself, on this path
+        if self_time > 0:
+            key = ';'.join(stack)
+            lines[key] = lines.get(key, 0) + self_time
+
+        if len(stack) >= max_depth or total_time < min_seconds:
+            return
+        function_total = entries[function][3]
+        share = total_time / function_total if function_total else 0.0
+        for callee, (_, _, callee_tt, callee_ct) in callees.get(function, []):
+            if _frame_name(callee) in stack:
+                continue  # recursion
+            walk(callee, stack, callee_tt * share, callee_ct * share)
+
+    for function, (_, _, tt, ct, callers) in entries.items():
+        if not callers:
+            walk(function, [], tt, ct)
+
+    with open(path, 'w', encoding='utf-8') as f:
+        for key, seconds in sorted(lines.items()):
+            microseconds = int(seconds * 1e6)
+            if microseconds > 0:
+                f.write(f"{key} {microseconds}\n")
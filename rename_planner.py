@@ -0,0 +1,117 @@
+import os
+from collections import namedtuple
+
+RenameStep = namedtuple('RenameStep', ['source', 'destination'])
+
+
+class RenamePlan:
+    """
+    The renames needed to give every file in a folder its target name.
+
+    Files that already have their target name are left alone. The other
+    renames form chains (the last target name is free) and cycles (every
+    target name is taken by another file of the cycle). Chains are executed
+    from the free end, cycles need a single temporary name each.
+
+    Attributes:
+        targets: List of (current_name, target_name) in sequence order
+        unchanged: Names that already are their target name
+        sequences: Lists of RenameStep, each must be executed in order and
+                   stopping halfway through one leaves a file misnamed
+    """
+
+    def __init__(self, targets, unchanged, sequences):
+        self.targets = targets
+        self.unchanged = unchanged
+        self.sequences = sequences
+
+    @property
+    def steps(self):
+        """All rename steps in execution order."""
+        return [step for sequence in self.sequences for step in sequence]
+
+    @property
+    def rename_count(self):
+        return sum(len(sequence) for sequence in self.sequences)
+
+    @property
+    def temp_names(self):
+        """Temporary names used to break cycles."""
+        final_names = {target for _, target in self.targets}
+        return [step.destination for step in self.steps if step.destination not in final_names]
+
+    def is_noop(self):
+        return not self.sequences
+
+    def __repr__(self):
+        return (f"RenamePlan({len(self.targets)} files, {len(self.unchanged)} unchanged, "
+                f"{self.rename_count} renames in {len(self.sequences)} sequences)")
+
+
+def plan_renames(targets, temp_pattern="TEMP_CYCLE_{}.JPG"):
+    """
+    Compute the minimal set of renames for a folder.
+
+    Args:
+        targets: List of (current_name, target_name); current names and
+                 target names must each be unique
+        temp_pattern: Format string for temporary names used to break cycles
+
+    Returns:
+        RenamePlan
+    """
+    # Compare names the way the filesystem does (case-insensitive on Windows)
+    key = os.path.normcase
+
+    unchanged = [current for current, target in targets if current == target]
+    moves = {key(current): RenameStep(current, target) for current, target in targets if current != target}
+
+    # Target name -> the move that needs it
+    needed_by = {key(step.destination): source_key for source_key, step in moves.items()}
+
+    def occupant(step):
+        """The move whose current file sits on this step's target name, if any."""
+        destination_key = key(step.destination)
+        if destination_key in moves and destination_key != key(step.source):
+            return destination_key
+        return None
+
+    sequences = []
+    visited = set()
+
+    # Chains: start at the moves whose target name is free and walk back
+    for source_key, step in moves.items():
+        if occupant(step) is not None:
+            continue
+        sequence = []
+        current = source_key
+        while current is not None and current not in visited:
+            visited.add(current)
+            sequence.append(moves[current])
+            current = needed_by.get(current)
+        sequences.append(sequence)
+
+    # Whatever is left consists of cycles
+    used_names = {key(name) for pair in targets for name in pair}
+    temp_index = 0
+    for source_key, step in moves.items():
+        if source_key in visited:
+            continue
+
+        temp_name = temp_pattern.format(temp_index)
+        while key(temp_name) in used_names:
+            temp_index += 1
+            temp_name = temp_pattern.format(temp_index)
+        used_names.add(key(temp_name))
+
+        visited.add(source_key)
+        sequence = [RenameStep(step.source, temp_name)]
+        current = needed_by.get(source_key)
+        while current != source_key:
+            visited.add(current)
+            sequence.append(moves[current])
+            current = needed_by.get(current)
+        sequence.append(RenameStep(temp_name, step.destination))
+        sequences.append(sequence)
+
+    return RenamePlan(targets, unchanged, sequences)
@@ -0,0 +1,37 @@
+import os
+import sys
+
+import pytest
+
+# The modules live at the top of the repository
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+DATE = '2020:01:02 03:04:05'
+
+
+def exif_bytes(date=DATE):
+    """EXIF block with the three date tags set to date."""
+    import piexif
+
+    raw = date.encode('ascii')
+    return piexif.dump({
+        '0th': {piexif.ImageIFD.DateTime: raw},
+        'Exif': {piexif.ExifIFD.DateTimeOriginal: raw, piexif.ExifIFD.DateTimeDigitized: raw},
+    })
+
+
+@pytest.fixture
+def make_image(tmp_path):
+    """Create a small image, with the three EXIF dates unless with_exif is False."""
+    import PIL.Image
+
+    def make(name, image_format='JPEG', with_exif=True, color='red', folder=tmp_path):
+        path = os.path.join(str(folder), name)
+        image = PIL.Image.new('RGB', (64, 48), color)
+        if with_exif:
+            image.save(path, image_format, exif=exif_bytes())
+        else:
+            image.save(path, image_format)
+        return path
+
+    return make
@@ -0,0 +1,53 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+import exif_header
+from batch_edit import parse_shift, resolve_changes
+from image_processor import ImageProcessor
+from conftest import DATE
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('+1h 3m', timedelta(hours=1, minutes=3)),
+    ('-2d', timedelta(days=-2)),
+    ('30s', timedelta(seconds=30)),
+    (' -1D 2H ', -timedelta(days=1, hours=2)),
+])
+def test_parse_shift(text, expected):
+    assert parse_shift(text) == expected
+
+
+@pytest.mark.parametrize('text', ['', '+', '1 hour', '1h x', '2020-01-01'])
+def test_parse_shift_rejects(text):
+    with pytest.raises(ValueError):
+        parse_shift(text)
+
+
+def test_resolve_changes_sets_and_shifts():
+    current = {'DateTimeOriginal': datetime(2020, 1, 2, 3, 4, 5)}
+    new_date = datetime(2021, 6, 7, 8, 9, 10)
+
+    resolved = resolve_changes(
+        {'DateTimeOriginal': timedelta(hours=1), 'DateTime': new_date, 'DateTimeDigitized': None}, current
+    )
+
+    assert resolved == {'DateTimeOriginal': datetime(2020, 1, 2, 4, 4, 5), 'DateTime': new_date}
+
+
+def test_resolve_changes_cannot_shift_a_missing_field():
+    with pytest.raises(ValueError):
+        resolve_changes({'DateTime': timedelta(hours=1)}, {'DateTime': None})
+
+
+def test_edit_images_shifts_each_image(tmp_path, make_image):
+    paths = [make_image('a.jpg'), make_image('b.jpg', with_exif=False)]
+    processor = ImageProcessor(str(tmp_path), '', log_to_file=False, journal_dir=None,
+                               metadata_cache_path=None)
+
+    results = processor.edit_images(paths, {'DateTimeOriginal': parse_shift('-1d')})
+
+    assert [result.success for result in results] == [True, False]
+    dates = exif_header.dates_from_tags(exif_header.find_date_tags(exif_header.read_header(paths[0])))
+    assert dates.DateTimeOriginal == '2020:01:01 03:04:05'
+    assert dates.DateTime == DATE
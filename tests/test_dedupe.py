@@ -0,0 +1,101 @@
+import os
+
+import pytest
+
+from dedupe import find_duplicates, move_duplicate
+from image_processor import ImageProcessor
+from journal import Journal
+
+
+@pytest.fixture
+def folder(tmp_path, make_image):
+    folder = tmp_path / 'photos'
+    folder.mkdir()
+    make_image('IMG_0001.JPG', color='red', folder=folder)
+    make_image('IMG_0002.JPG', color='red', folder=folder)
+    make_image('IMG_0003.JPG', color='blue', folder=folder)
+    return str(folder)
+
+
+def make_processor(tmp_path, dedupe):
+    return ImageProcessor(str(tmp_path), 'photos', log_to_file=False, journal_dir=str(tmp_path / 'journal'),
+                          metadata_cache_path=None, dedupe=dedupe)
+
+
+def contents(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def test_find_duplicates_keeps_the_first_name(tmp_path):
+    for name, data in [('a', b'x' * 1000), ('b', b'y' * 1000), ('c', b'x' * 1000), ('d', b'x' * 999)]:
+        (tmp_path / name).write_bytes(data)
+    # Same size and edges, different middle
+    (tmp_path / 'e').write_bytes(b'x' * 400 + b'z' + b'x' * 599)
+
+    report = find_duplicates(str(tmp_path), ['c', 'b', 'a', 'd', 'e'], edge_bytes=100)
+
+    assert report.groups == [['c', 'a']]
+    assert [tuple(duplicate) for duplicate in report.duplicates] == [('a', 'c')]
+
+
+def test_move_duplicate_never_overwrites(tmp_path):
+    (tmp_path / 'IMG_0001.JPG').write_bytes(b'new')
+    (tmp_path / '_duplicates').mkdir()
+    (tmp_path / '_duplicates' / 'IMG_0001.JPG').write_bytes(b'old')
+
+    destination = move_duplicate(str(tmp_path), 'IMG_0001.JPG')
+
+    assert destination == os.path.join(str(tmp_path), '_duplicates', 'IMG_0001_1.JPG')
+    assert contents(tmp_path / '_duplicates' / 'IMG_0001.JPG') == b'old'
+
+
+def test_skipped_duplicate_is_never_overwritten(tmp_path, folder):
+    processor = make_processor(tmp_path, 'skip')
+
+    folder_plan = processor.plan_folder(folder)
+    processor.execute_folder_plan(folder_plan)
+
+    assert sorted(os.listdir(folder)) == ['IMG_0001.JPG', 'IMG_0002.JPG', 'IMG_0003.JPG']
+    assert 'IMG_0002.JPG' not in [target for _, target in folder_plan.rename_plan.targets]
+
+
+def test_moved_duplicate_frees_its_name(tmp_path, folder):
+    blue = contents(os.path.join(folder, 'IMG_0003.JPG'))
+    processor = make_processor(tmp_path, 'move')
+
+    processor.execute_folder_plan(processor.plan_folder(folder))
+
+    assert sorted(os.listdir(folder)) == ['IMG_0001.JPG', 'IMG_0002.JPG', '_duplicates']
+    assert os.listdir(os.path.join(folder, '_duplicates')) == ['IMG_0002.JPG']
+    assert contents(os.path.join(folder, 'IMG_0002.JPG'))[-64:] == blue[-64:]
+
+
+def test_crash_after_journaling_a_moving_plan_recovers(tmp_path, folder):
+    blue = contents(os.path.join(folder, 'IMG_0003.JPG'))
+    processor = make_processor(tmp_path, 'move')
+    folder_plan = processor.plan_folder(folder)
+
+    # A run that died right after writing the journal, before any rename
+    processor.move_duplicates(folder_plan)
+    journal = Journal(processor.journal_dir)
+    journal.begin(folder_plan)
+    journal.sync()
+    journal.file.close()
+
+    processor.recover_journal()
+
+    assert sorted(os.listdir(folder)) == ['IMG_0001.JPG', 'IMG_0002.JPG', '_duplicates']
+    assert contents(os.path.join(folder, 'IMG_0002.JPG'))[-64:] == blue[-64:]
+
+
+def test_failed_move_leaves_the_folder_alone(tmp_path, folder):
+    # A file where the duplicate folder should be makes the move fail
+    open(os.path.join(folder, '_duplicates'), 'w').close()
+    processor = make_processor(tmp_path, 'move')
+
+    assert processor.execute_folder_plan(processor.plan_folder(folder)) == 0
+
+    assert sorted(os.listdir(folder)) == ['IMG_0001.JPG', 'IMG_0002.JPG', 'IMG_0003.JPG', '_duplicates']
+    assert processor.folder_errors
+    assert not os.path.exists(processor.journal_dir) or os.listdir(processor.journal_dir) == []
@@ -0,0 +1,76 @@
+import os
+
+import pytest
+
+from execution_plan import PlanWriter, read_plans
+from image_processor import ImageProcessor
+
+
+@pytest.fixture
+def folder(tmp_path, make_image):
+    folder = tmp_path / 'photos'
+    folder.mkdir()
+    make_image('IMG_0002.JPG', folder=folder)
+    make_image('IMG_0001.JPG', color='green', folder=folder)
+    make_image('a.jpg', color='blue', folder=folder)
+    make_image('IMG_0003.JPG', color='white', folder=folder)
+    os.rename(str(folder / 'IMG_0003.JPG'), str(folder / 'c.jpg'))
+    return folder
+
+
+def make_processor(tmp_path, **options):
+    return ImageProcessor(str(tmp_path), 'photos', log_to_file=False, journal_dir=str(tmp_path / 'journal'),
+                          metadata_cache_path=None, plan_path=str(tmp_path / 'plan.jsonl'), **options)
+
+
+def test_plan_survives_the_round_trip(tmp_path, folder):
+    processor = make_processor(tmp_path)
+    folder_plan = processor.plan_folder(str(folder))
+    processor.record_file_stats(folder_plan)
+    processor.estimate_plan_cost(folder_plan)
+
+    writer = PlanWriter(str(tmp_path / 'plan.jsonl'))
+    writer.write(folder_plan)
+    writer.close()
+    [loaded] = read_plans(str(tmp_path / 'plan.jsonl'))
+
+    assert loaded.to_dict() == folder_plan.to_dict()
+    assert loaded.rename_plan.steps == folder_plan.rename_plan.steps
+    assert loaded.writes == folder_plan.writes
+
+
+def test_dry_run_changes_nothing_and_the_plan_executes_later(tmp_path, folder, monkeypatch):
+    before = sorted(os.listdir(folder))
+    monkeypatch.chdir(tmp_path)
+    make_processor(tmp_path, dry_run=True).run()
+    assert sorted(os.listdir(folder)) == before
+
+    [folder_plan] = read_plans(str(tmp_path / 'plan.jsonl'))
+    assert os.path.isabs(folder_plan.folder)
+
+    # Executed from somewhere else
+    monkeypatch.chdir(folder)
+    make_processor(tmp_path).run_plan()
+    assert sorted(os.listdir(folder)) == sorted(target for _, target in folder_plan.rename_plan.targets)
+
+
+@pytest.mark.parametrize('change', ['target taken', 'file rewritten', 'file missing'])
+def test_stale_plan_is_skipped(tmp_path, folder, make_image, change):
+    make_processor(tmp_path, dry_run=True).run()
+    [folder_plan] = read_plans(str(tmp_path / 'plan.jsonl'))
+    new_name = next(target for current, target in folder_plan.rename_plan.targets if current != target)
+
+    if change == 'target taken':
+        make_image(new_name, color='black', folder=folder)
+    elif change == 'file rewritten':
+        with open(folder / 'a.jpg', 'ab') as f:
+            f.write(b'\0')
+    else:
+        os.remove(str(folder / 'a.jpg'))
+    before = sorted(os.listdir(folder))
+
+    processor = make_processor(tmp_path)
+    processor.run_plan()
+
+    assert processor.folder_results == {}
+    assert sorted(os.listdir(folder)) == before
@@ -0,0 +1,41 @@
+import os
+
+import pytest
+
+from folder_scan import scan_folder
+
+
+@pytest.fixture
+def folder(tmp_path):
+    for name in ['IMG_0010.JPG', 'IMG_0002.jpg', 'img_0002.JPG', 'IMG_0005.png', 'IMG_0001.TIFF',
+                 'IMG_0003.JPGX', 'holiday.jpeg', 'notes.txt', 'IMG_%s.JPG' % ('9' * 19)]:
+        (tmp_path / name).write_bytes(name.encode())
+    (tmp_path / 'IMG_0004.JPG').mkdir()
+    return str(tmp_path)
+
+
+@pytest.mark.parametrize('with_stat', [False, True])
+def test_scan_classifies_names(folder, with_stat):
+    scan = scan_folder(folder, with_stat=with_stat)
+
+    assert scan.standard_images == [(2, 'IMG_0002.jpg'), (2, 'img_0002.JPG'), (5, 'IMG_0005.png'),
+                                    (10, 'IMG_0010.JPG')]
+    # Other extensions of a format and codes too long for the arrays aren't standard names
+    assert scan.other_images == ['IMG_0001.TIFF', 'IMG_%s.JPG' % ('9' * 19), 'holiday.jpeg']
+    assert scan.duplicate_codes() == {2: ['IMG_0002.jpg', 'img_0002.JPG']}
+    assert scan.gaps() == [(3, 4), (6, 9)]
+
+
+@pytest.mark.parametrize('with_stat', [False, True])
+def test_stat_of_matches_os_stat(folder, with_stat):
+    scan = scan_folder(folder, with_stat=with_stat)
+
+    for name in scan.names:
+        stat = os.stat(os.path.join(folder, name))
+        assert scan.stat_of(name) == (stat.st_size, stat.st_mtime_ns)
+
+
+def test_stop_check_ends_the_scan(folder):
+    scan = scan_folder(folder, stop_check=lambda: True)
+
+    assert scan.names == [] and scan.gaps() == []
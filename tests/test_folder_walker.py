@@ -0,0 +1,61 @@
+import os
+
+import pytest
+
+from folder_walker import FolderWalker
+
+TARGET = "01. Foto's"
+
+
+def os_walk_targets(root):
+    """The folders the original os.walk search found, in its order."""
+    found = []
+    for path, dirs, _ in os.walk(root):
+        found.extend(os.path.join(path, name) for name in dirs if name == TARGET)
+    return found
+
+
+@pytest.fixture
+def tree(tmp_path):
+    for path in [
+        f'2019/a/{TARGET}',
+        f'2019/b/{TARGET}/{TARGET}',
+        f'2019/b/c/d/{TARGET}',
+        f'2020/{TARGET}',
+        '2020/empty',
+        f'.cache/{TARGET}',
+        f'{TARGET}/nested',
+    ]:
+        (tmp_path / path).mkdir(parents=True)
+    (tmp_path / '2020' / 'photo.jpg').write_bytes(b'')
+    return str(tmp_path)
+
+
+@pytest.mark.parametrize('threads', [1, 4])
+def test_same_result_as_os_walk(tree, threads):
+    walker = FolderWalker(TARGET, threads=threads, prune_matches=False)
+
+    assert walker.walk(tree) == os_walk_targets(tree)
+
+
+@pytest.mark.parametrize('threads', [1, 4])
+def test_matches_are_not_descended_into(tree, threads):
+    walker = FolderWalker(TARGET, threads=threads)
+
+    expected = [path for path in os_walk_targets(tree) if os.path.dirname(path).count(TARGET) == 0]
+    assert walker.walk(tree) == expected
+    assert os.path.join(tree, '2019', 'b', TARGET, TARGET) not in expected
+
+
+def test_ignored_directories_are_skipped(tree):
+    walker = FolderWalker(TARGET, ignore_patterns=['.*', '2019'], threads=4)
+
+    assert walker.walk(tree) == [os.path.join(tree, TARGET), os.path.join(tree, '2020', TARGET)]
+
+
+@pytest.mark.skipif(not hasattr(os, 'symlink'), reason="needs symlinks")
+def test_symlinked_directories_are_not_followed(tree):
+    os.symlink(os.path.join(tree, '2019'), os.path.join(tree, 'link'))
+    os.symlink(os.path.join(tree, '2020', TARGET), os.path.join(tree, '2020', 'empty', TARGET))
+
+    assert FolderWalker(TARGET, prune_matches=False).walk(tree) == os_walk_targets(tree)
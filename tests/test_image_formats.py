@@ -0,0 +1,80 @@
+import os
+
+import PIL.Image
+import pytest
+
+import exif_header
+from image_formats import write_dates, estimate_write, format_for_signature
+
+NEW_DATES = {
+    'DateTimeOriginal': '2021:06:07 08:09:10',
+    'DateTimeDigitized': '2021:06:07 08:09:10',
+    'DateTime': '2021:06:07 08:09:10',
+}
+
+
+def read_dates(path):
+    data = exif_header.read_header(path)
+    return exif_header.dates_from_tags(format_for_signature(data).find_date_tags(path, data))._asdict()
+
+
+def pixels(path):
+    with PIL.Image.open(path) as image:
+        return image.convert('RGB').tobytes()
+
+
+@pytest.mark.parametrize('name, image_format, with_exif, patched', [
+    ('patch.jpg', 'JPEG', True, True),
+    ('rewrite.jpg', 'JPEG', False, False),
+    # Pillow writes eXIf but no Creation Time chunk, that needs a rewrite
+    ('rewrite.png', 'PNG', True, False),
+    ('no_exif.png', 'PNG', False, False),
+    ('patch.tif', 'TIFF', True, True),
+    ('append.tif', 'TIFF', False, True),
+])
+def test_write_dates_round_trip(make_image, name, image_format, with_exif, patched):
+    path = make_image(name, image_format, with_exif=with_exif)
+    size = os.path.getsize(path)
+    before = pixels(path)
+
+    estimated = estimate_write(path, NEW_DATES)
+    written = write_dates(path, NEW_DATES)
+
+    assert read_dates(path) == NEW_DATES
+    assert pixels(path) == before
+    if patched:
+        assert written < size
+        assert estimated == written
+    else:
+        assert estimated == size
+
+
+def test_png_is_patched_once_it_has_the_chunks(make_image):
+    path = make_image('image.png', 'PNG')
+    write_dates(path, NEW_DATES)
+    size = os.path.getsize(path)
+
+    later = dict.fromkeys(NEW_DATES, '2022:01:01 00:00:00')
+    assert estimate_write(path, later) == write_dates(path, later)
+    assert os.path.getsize(path) == size
+    assert read_dates(path) == later
+    with open(path, 'rb') as f:
+        assert b'Creation Time\x002022-01-01T00:00:00' in f.read()
+
+
+def test_jpeg_rewrite_keeps_the_file_mode_and_leaves_no_temp_file(make_image, tmp_path):
+    path = make_image('image.jpg', with_exif=False)
+    os.chmod(path, 0o640)
+
+    write_dates(path, NEW_DATES)
+
+    assert os.stat(path).st_mode & 0o777 == 0o640
+    assert os.listdir(tmp_path) == ['image.jpg']
+
+
+def test_unsupported_file_is_rejected(tmp_path):
+    path = tmp_path / 'image.jpg'
+    path.write_bytes(b'not an image')
+
+    with pytest.raises(ValueError):
+        write_dates(str(path), NEW_DATES)
@@ -0,0 +1,63 @@
+import os
+
+import pytest
+
+from manifest import FolderManifest, fingerprint_folder
+from image_processor import ImageProcessor
+
+
+@pytest.fixture
+def archive(tmp_path, make_image):
+    folder = tmp_path / 'album' / 'photos'
+    folder.mkdir(parents=True)
+    make_image('IMG_0001.JPG', folder=folder)
+    make_image('b.jpg', color='blue', folder=folder)
+    return tmp_path
+
+
+def run(archive, **options):
+    processor = ImageProcessor(str(archive / 'album'), 'photos', log_to_file=False, incremental=True,
+                               manifest_path=str(archive / 'manifest.db'), journal_dir=None,
+                               metadata_cache_path=None, **options)
+    processor.run()
+    return processor
+
+
+def test_fingerprint_changes_with_the_folder(archive, make_image):
+    folder = str(archive / 'album' / 'photos')
+    manifest = FolderManifest(str(archive / 'manifest.db'))
+    manifest.record(folder, fingerprint_folder(folder), 2)
+
+    assert manifest.is_unchanged(folder, fingerprint_folder(folder))
+    make_image('c.jpg', folder=folder)
+    assert not manifest.is_unchanged(folder, fingerprint_folder(folder))
+    manifest.close()
+
+
+def test_fingerprint_names_the_first_and_last_standard_images(tmp_path):
+    for name in ['IMG_0007.PNG', 'IMG_0002.tif', 'IMG_0001.TIFF', 'IMG_0009.JPGX', 'a.jpg', 'IMG_0003.jpg']:
+        (tmp_path / name).write_bytes(b'x')
+
+    fingerprint = fingerprint_folder(str(tmp_path))
+
+    assert (fingerprint.first_name, fingerprint.last_name) == ('IMG_0002.tif', 'IMG_0007.PNG')
+    assert fingerprint.entry_count == 6
+
+
+def test_unchanged_folder_is_skipped_next_run(archive):
+    first = run(archive)
+    assert list(first.folder_results.values()) == [2]
+
+    second = run(archive)
+    assert second.folder_results == {}
+
+
+def test_folder_with_errors_is_processed_again(archive):
+    folder = archive / 'album' / 'photos'
+    (folder / 'broken.jpg').write_bytes(b'not a jpeg')
+
+    first = run(archive)
+    assert first.folder_errors
+
+    second = run(archive)
+    assert len(second.folder_results) == 1
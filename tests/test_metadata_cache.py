@@ -0,0 +1,62 @@
+import os
+
+from metadata_cache import MetadataCache
+from image_processor import ImageProcessor
+from batch_edit import parse_shift
+
+DATES = {'DateTimeOriginal': '2020:01:02 03:04:05', 'DateTimeDigitized': None, 'DateTime': '2020:01:02 03:04:05'}
+
+
+def test_rewrite_invalidates_rename_keeps(tmp_path):
+    path = tmp_path / 'a.jpg'
+    path.write_bytes(b'x' * 100)
+    cache = MetadataCache(None)
+    cache.put(str(path), DATES)
+
+    os.rename(path, tmp_path / 'b.jpg')
+    assert cache.get(str(tmp_path / 'b.jpg')) == DATES
+
+    stat = os.stat(tmp_path / 'b.jpg')
+    os.utime(tmp_path / 'b.jpg', ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+    assert cache.get(str(tmp_path / 'b.jpg')) is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_entries_persist_across_instances(tmp_path):
+    path = tmp_path / 'a.jpg'
+    path.write_bytes(b'x' * 100)
+    cache = MetadataCache(str(tmp_path / 'cache' / 'metadata.db'))
+    cache.put(str(path), DATES)
+    cache.close()
+
+    cache = MetadataCache(str(tmp_path / 'cache' / 'metadata.db'))
+    assert cache.get(str(path)) == DATES
+    path.write_bytes(b'y' * 101)
+    assert cache.get(str(path)) is None
+    cache.close()
+
+
+def test_evicted_entries_come_from_the_file(tmp_path):
+    paths = []
+    for i in range(3):
+        paths.append(tmp_path / f'{i}.jpg')
+        paths[-1].write_bytes(b'x' * i)
+    cache = MetadataCache(str(tmp_path / 'metadata.db'), max_entries=1, commit_interval=0)
+    for path in paths:
+        cache.put(str(path), DATES)
+
+    assert len(cache.entries) == 1
+    assert cache.get(str(paths[0])) == DATES
+    cache.close()
+
+
+def test_edited_image_is_read_again(tmp_path, make_image):
+    path = make_image('a.jpg')
+    processor = ImageProcessor(str(tmp_path), '', log_to_file=False, journal_dir=None,
+                               metadata_cache_path=str(tmp_path / 'metadata.db'))
+    assert processor.get_all_exif_dates(path)['DateTimeOriginal'] == '2020:01:02 03:04:05'
+
+    processor.edit_images([path], {'DateTimeOriginal': parse_shift('+1h')})
+
+    assert processor.get_all_exif_dates(path)['DateTimeOriginal'] == '2020:01:02 04:04:05'
+    processor.close_metadata_cache()
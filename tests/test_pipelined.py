@@ -0,0 +1,47 @@
+import os
+import random
+import shutil
+
+import pytest
+
+import exif_header
+from image_processor import ImageProcessor
+
+
+def make_folder(folder, make_image):
+    os.mkdir(folder)
+    names = ['IMG_0002.JPG', 'IMG_0004.JPG', 'IMG_0005.JPG', 'IMG_0009.PNG', 'IMG_0010.JPG']
+    names += [f'photo_{i}.jpg' for i in range(12)]
+    for i, name in enumerate(names):
+        make_image(name, image_format='PNG' if name.endswith('.PNG') else 'JPEG',
+                   with_exif=i % 4 != 1, color=(i * 20, 0, 0), folder=folder)
+
+
+def folder_state(folder):
+    state = {}
+    for name in os.listdir(folder):
+        path = os.path.join(folder, name)
+        with open(path, 'rb') as f:
+            pixels = f.read()[-64:]
+        data = exif_header.read_header(path)
+        state[name] = (pixels, exif_header.dates_from_tags(exif_header.find_date_tags(data)))
+    return state
+
+
+@pytest.mark.parametrize('io_threads', [2, 8])
+def test_pipelined_matches_serial(tmp_path, make_image, io_threads):
+    # Copies keep the mtimes, which date the images without EXIF
+    make_folder(str(tmp_path / 'original'), make_image)
+    results = []
+    for threads in (1, io_threads):
+        folder = str(tmp_path / f'photos_{threads}')
+        shutil.copytree(str(tmp_path / 'original'), folder)
+        processor = ImageProcessor(str(tmp_path), os.path.basename(folder), log_to_file=False,
+                                   journal_dir=None, metadata_cache_path=None, io_threads=threads)
+        # The plan spaces the dates by random amounts, both runs must get the same plan
+        random.seed(1)
+        processed = processor.execute_folder_plan(processor.plan_folder(folder))
+        results.append((processed, folder_state(folder)))
+
+    assert results[0] == results[1]
+    assert results[0][0] == 17
@@ -0,0 +1,17 @@
+import PIL.Image
+
+from gui.preview import PreviewCache, PREVIEW_SIZE
+from gui.thumbnail_cache import ThumbnailCache
+
+
+def test_disk_cached_preview_matches_the_decoded_one(tmp_path):
+    path = tmp_path / 'big.jpg'
+    PIL.Image.new('RGB', (PREVIEW_SIZE * 2, PREVIEW_SIZE), 'red').save(path)
+    thumbnail_cache = ThumbnailCache(str(tmp_path / 'cache'))
+
+    decoded = PreviewCache(disk_cache=thumbnail_cache).load(str(path))
+    # A new session finds the preview on disk instead of decoding the original
+    from_disk = PreviewCache(disk_cache=thumbnail_cache).load(str(path))
+    thumbnail_cache.close()
+
+    assert decoded.size == from_disk.size == (PREVIEW_SIZE, PREVIEW_SIZE // 2)
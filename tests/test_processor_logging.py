@@ -0,0 +1,38 @@
+import json
+import logging
+
+import pytest
+
+from processor_logging import configure_logging, shutdown_logging
+
+
+@pytest.fixture(autouse=True)
+def fresh_logging():
+    shutdown_logging()
+    yield
+    shutdown_logging()
+
+
+def test_one_handler_however_often_it_is_configured(tmp_path):
+    lines = []
+    for _ in range(3):
+        logger = configure_logging(lines.append, str(tmp_path / 'run.log'))
+    logger.info("once")
+    shutdown_logging()
+
+    assert [line.endswith("once") for line in lines] == [True]
+    assert (tmp_path / 'run.log').read_text(encoding='utf-8').count("once") == 1
+
+
+def test_later_call_switches_the_log_file(tmp_path):
+    logger = configure_logging(None, str(tmp_path / 'first.log'))
+    logger.info("first run")
+    configure_logging(None, str(tmp_path / 'second.log'), 'json')
+    logger.info("second run")
+    shutdown_logging()
+
+    assert "first run" in (tmp_path / 'first.log').read_text(encoding='utf-8')
+    assert "second run" not in (tmp_path / 'first.log').read_text(encoding='utf-8')
+    [record] = [json.loads(line) for line in (tmp_path / 'second.log').read_text(encoding='utf-8').splitlines()]
+    assert record['message'] == "second run" and record['level'] == 'INFO'
+    assert len(logging.getLogger('ImageProcessor').handlers) == 0
@@ -0,0 +1,30 @@
+import json
+import os
+import pstats
+
+from image_processor import ImageProcessor
+
+
+def test_parallel_run_writes_one_merged_profile(tmp_path, make_image):
+    for parent in ('a', 'b', 'c'):
+        folder = tmp_path / 'root' / parent / 'photos'
+        folder.mkdir(parents=True)
+        make_image('IMG_0001.JPG', folder=folder)
+        make_image('IMG_0003.JPG', folder=folder)
+    profile_dir = tmp_path / 'profile'
+    processor = ImageProcessor(str(tmp_path / 'root'), 'photos', log_to_file=False, workers=2,
+                               journal_dir=None, metadata_cache_path=None, profile_dir=str(profile_dir))
+
+    assert processor.run() == 3
+
+    files = sorted(os.listdir(profile_dir))
+    assert len(files) == 4 and all(name.startswith('run-') for name in files)
+    sections_path = [name for name in files if name.endswith('.sections.json')][0]
+    with open(profile_dir / sections_path, encoding='utf-8') as f:
+        sections = json.load(f)
+    # The run itself plus every folder a worker processed
+    assert sections['profiles'] == 4
+    assert sections['sections']['process_folder']['calls'] == 3
+
+    stats = pstats.Stats(str(profile_dir / sections_path.replace('.sections.json', '.pstats')))
+    assert any(name == 'process_folder' for _, _, name in stats.stats)
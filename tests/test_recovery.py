@@ -0,0 +1,160 @@
+import os
+from datetime import datetime, timedelta
+
+import pytest
+
+import exif_header
+from image_processor import ImageProcessor
+from journal import Journal, read_journals
+from image_formats import format_for_signature
+from rename_planner import plan_renames
+from execution_plan import FolderPlan, MetadataWrite
+
+
+def read_dates(path):
+    data = exif_header.read_header(path)
+    return exif_header.dates_from_tags(format_for_signature(data).find_date_tags(path, data))
+
+
+@pytest.fixture
+def folder(tmp_path, make_image):
+    folder = tmp_path / 'photos'
+    folder.mkdir()
+    # Closing the gap at IMG_0003 is a chain of renames, with a.jpg at its end
+    for name, color in [('IMG_0002.JPG', 'red'), ('IMG_0004.JPG', 'green'), ('IMG_0005.JPG', 'blue'),
+                        ('a.jpg', 'white'), ('b.jpg', 'black')]:
+        make_image(name, color=color, folder=folder)
+    return str(folder)
+
+
+@pytest.fixture
+def processor(tmp_path):
+    return ImageProcessor(str(tmp_path), 'photos', log_to_file=False, journal_dir=str(tmp_path / 'journal'),
+                          metadata_cache_path=None)
+
+
+def crash_after(processor, folder, renames, folder_plan=None, journaled=None):
+    """
+    Start processing a folder like a run that dies after the given number
+    of renames, of which only the first journaled ones reached the journal.
+    """
+    folder_plan = folder_plan or processor.plan_folder(folder)
+    journal = Journal(processor.journal_dir)
+    journal.begin(folder_plan)
+    for i, step in enumerate(folder_plan.rename_plan.steps[:renames]):
+        os.rename(os.path.join(folder, step.source), os.path.join(folder, step.destination))
+        if journaled is None or i < journaled:
+            journal.renamed(folder, step)
+    journal.sync()
+    # The process is gone, its lock with it
+    journal.file.close()
+    return folder_plan
+
+
+def contents(folder):
+    return {name: open(os.path.join(folder, name), 'rb').read()[-64:] for name in os.listdir(folder)}
+
+
+def test_recover_finishes_a_half_run_sequence(folder, processor):
+    before = contents(folder)
+    folder_plan = crash_after(processor, folder, 1)
+    assert len(folder_plan.rename_plan.sequences[0]) == 3
+
+    processor.recover_journal()
+
+    after = contents(folder)
+    assert sorted(after) == ['IMG_0002.JPG', 'IMG_0003.JPG', 'IMG_0004.JPG', 'IMG_0005.JPG', 'IMG_0006.JPG']
+    for original, target in folder_plan.rename_plan.targets:
+        assert after[target] == before[original]
+    for write in folder_plan.writes:
+        assert read_dates(os.path.join(folder, write.name)).DateTimeOriginal == write.date.strftime('%Y:%m:%d %H:%M:%S')
+    assert os.listdir(processor.journal_dir) == []
+
+
+def test_recover_rolls_back_when_a_file_went_missing(folder, processor):
+    folder_plan = crash_after(processor, folder, 1)
+    # The file the next step needs is gone
+    next_step = folder_plan.rename_plan.steps[1]
+    os.remove(os.path.join(folder, next_step.source))
+
+    processor.recover_journal()
+
+    # The chain is undone, the other files are still processed
+    assert sorted(os.listdir(folder)) == ['IMG_0002.JPG', 'IMG_0004.JPG', 'IMG_0006.JPG', 'a.jpg']
+    assert os.listdir(processor.journal_dir) == []
+
+
+@pytest.fixture
+def cycle_folder(tmp_path, make_image):
+    """A folder whose plan is a single cycle A -> B -> C -> A, plus its contents before."""
+    folder = tmp_path / 'cycle'
+    folder.mkdir()
+    for name, color in [('A.JPG', 'red'), ('B.JPG', 'green'), ('C.JPG', 'blue')]:
+        make_image(name, color=color, folder=folder)
+    targets = [('A.JPG', 'B.JPG'), ('B.JPG', 'C.JPG'), ('C.JPG', 'A.JPG')]
+    start = datetime(2021, 1, 1, 12, 0, 0)
+    writes = [MetadataWrite(target, current, start + timedelta(minutes=i)) for i, (current, target) in enumerate(targets)]
+    folder_plan = FolderPlan(str(folder), plan_renames(targets), writes)
+    assert folder_plan.rename_plan.rename_count == 4
+    return str(folder), folder_plan, contents(str(folder))
+
+
+def check_cycle_finished(folder, folder_plan, before):
+    after = contents(folder)
+    assert sorted(after) == ['A.JPG', 'B.JPG', 'C.JPG']
+    for write in folder_plan.writes:
+        assert after[write.name] == before[write.original_name]
+        assert read_dates(os.path.join(folder, write.name)).DateTimeOriginal == write.date.strftime('%Y:%m:%d %H:%M:%S')
+
+
+@pytest.mark.parametrize('renames, journaled', [
+    (4, 4),  # Finished, only the commit is missing
+    (4, 1),  # Finished, the records after the synced first step were lost
+    (2, 2),  # Halfway through
+    (2, 0),  # Halfway through, no record reached the journal
+    (1, 0),  # Only the first file moved to its temp name
+    (0, 0),  # Not started
+])
+def test_recover_cycle(cycle_folder, processor, renames, journaled):
+    folder, folder_plan, before = cycle_folder
+    crash_after(processor, folder, renames, folder_plan, journaled)
+
+    processor.recover_journal()
+
+    check_cycle_finished(folder, folder_plan, before)
+    assert os.listdir(processor.journal_dir) == []
+
+
+def test_cycle_first_step_is_synced(cycle_folder, processor):
+    folder, folder_plan, _ = cycle_folder
+    processor.journal = Journal(processor.journal_dir, batch_size=1000, sync_interval=3600)
+    processor.journal.begin(folder_plan)
+    processor.run_rename_sequence(folder, folder_plan.rename_plan.sequences[0])
+
+    # Only the begin record and the first step were written out
+    with open(processor.journal.path, encoding='utf-8') as f:
+        lines = f.read().splitlines()
+    assert len(lines) == 2 and '"destination": "TEMP_CYCLE_0.JPG"' in lines[1]
+    processor.close_journal()
+
+
+def test_unreachable_folder_keeps_its_journal(folder, processor, tmp_path):
+    crash_after(processor, folder, 1)
+    os.rename(folder, str(tmp_path / 'offline'))
+
+    processor.recover_journal()
+
+    journals, interrupted = read_journals(processor.journal_dir)
+    assert [item.folder_plan.folder for item in interrupted] == [folder]
+    for f in journals:
+        f.close()
+
+
+def test_journal_of_a_running_process_is_left_alone(folder, processor):
+    live = Journal(processor.journal_dir)
+    live.begin(processor.plan_folder(folder))
+
+    journals, interrupted = read_journals(processor.journal_dir)
+    assert journals == [] and interrupted == []
+    assert os.path.exists(live.path)
+    live.file.close()
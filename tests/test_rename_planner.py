@@ -0,0 +1,70 @@
+from rename_planner import plan_renames
+
+
+def execute(plan, files):
+    """Run a plan on a {name: contents} dict the way the processor renames files."""
+    files = dict(files)
+    for step in plan.steps:
+        assert step.destination not in files, f"{step.destination} would be overwritten"
+        files[step.destination] = files.pop(step.source)
+    return files
+
+
+def test_fixed_points_are_left_alone():
+    plan = plan_renames([('IMG_0001.JPG', 'IMG_0001.JPG'), ('IMG_0002.JPG', 'IMG_0002.JPG')])
+
+    assert plan.is_noop()
+    assert plan.unchanged == ['IMG_0001.JPG', 'IMG_0002.JPG']
+    assert plan.rename_count == 0
+
+
+def test_chain_runs_from_the_free_end():
+    targets = [('IMG_0002.JPG', 'IMG_0001.JPG'), ('IMG_0003.JPG', 'IMG_0002.JPG'), ('a.jpg', 'IMG_0003.JPG')]
+    plan = plan_renames(targets)
+
+    assert len(plan.sequences) == 1
+    assert plan.rename_count == 3
+    assert plan.temp_names == []
+    files = execute(plan, {current: current for current, _ in targets})
+    assert files == {target: current for current, target in targets}
+
+
+def test_cycle_uses_one_temp_name():
+    targets = [('IMG_0001.JPG', 'IMG_0002.JPG'), ('IMG_0002.JPG', 'IMG_0003.JPG'), ('IMG_0003.JPG', 'IMG_0001.JPG')]
+    plan = plan_renames(targets)
+
+    assert len(plan.sequences) == 1
+    assert plan.rename_count == 4
+    assert plan.temp_names == ['TEMP_CYCLE_0.JPG']
+    files = execute(plan, {current: current for current, _ in targets})
+    assert files == {target: current for current, target in targets}
+
+
+def test_temp_names_avoid_names_in_use():
+    targets = [
+        ('IMG_0001.JPG', 'IMG_0002.JPG'), ('IMG_0002.JPG', 'IMG_0001.JPG'),
+        ('TEMP_CYCLE_0.JPG', 'IMG_0003.JPG'),
+        ('IMG_0004.JPG', 'TEMP_CYCLE_1.JPG'), ('TEMP_CYCLE_1.JPG', 'IMG_0004.JPG'),
+    ]
+    plan = plan_renames(targets)
+
+    used = {name for pair in targets for name in pair}
+    assert len(plan.temp_names) == 2
+    assert not used & set(plan.temp_names)
+    files = execute(plan, {current: current for current, _ in targets})
+    assert files == {target: current for current, target in targets}
+
+
+def test_mixed_plan_only_renames_what_moves():
+    targets = [
+        ('IMG_0001.JPG', 'IMG_0001.JPG'),
+        ('IMG_0003.JPG', 'IMG_0002.JPG'),
+        ('b.jpg', 'IMG_0003.JPG'),
+        ('IMG_0005.PNG', 'IMG_0004.PNG'), ('IMG_0004.PNG', 'IMG_0005.PNG'),
+    ]
+    plan = plan_renames(targets)
+
+    assert plan.unchanged == ['IMG_0001.JPG']
+    assert len(plan.sequences) == 2
+    files = execute(plan, {current: current for current, _ in targets})
+    assert files == {target: current for current, target in targets}